@@ -0,0 +1,83 @@
+# amortization.py
+import numpy as np
+
+
+def bereken_maandlast(lening, rentevoet, looptijd_jaren):
+    """
+    Bereken de constante maandlast van een annuïteitenlening.
+
+    Werkt op scalars en op NumPy-arrays (broadcasting). Bij een rentevoet van 0
+    wordt de lening lineair afgelost: lening / aantal maanden. Een looptijd van 0
+    (of minder) heeft geen maandlast en geeft een ValueError.
+    """
+    maandrente = np.asarray(rentevoet, dtype=float) / 12
+    maanden = np.asarray(looptijd_jaren, dtype=float) * 12
+    if not np.all(maanden > 0):
+        raise ValueError("looptijd_jaren moet groter dan 0 zijn")
+    factor = (1 + maandrente) ** maanden
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        annuiteit = np.where(maandrente == 0, 1 / maanden, maandrente * factor / (factor - 1))
+
+    return lening * annuiteit
+
+
+def bereken_restschuld(lening, rentevoet, looptijd_jaren, maanden_betaald):
+    """
+    Bereken het openstaande kapitaal na een aantal betaalde maandlasten, in gesloten vorm.
+
+    Alle argumenten mogen NumPy-arrays zijn. Na de looptijd is de restschuld 0.
+    """
+    maandrente = np.asarray(rentevoet, dtype=float) / 12
+    maanden = np.asarray(looptijd_jaren, dtype=float) * 12
+    betaald = np.clip(maanden_betaald, 0, maanden)
+
+    factor_totaal = (1 + maandrente) ** maanden
+    factor_betaald = (1 + maandrente) ** betaald
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        resterend_deel = np.where(
+            maandrente == 0,
+            1 - betaald / maanden,
+            (factor_totaal - factor_betaald) / (factor_totaal - 1),
+        )
+
+    return lening * resterend_deel
+
+
+
+def bereken_aflossingstabel(lening, rentevoet, looptijd_jaren):
+    """
+    Bereken het volledige aflossingsschema als NumPy-arrays, zonder maand-per-maand lus.
+
+    Alle argumenten mogen arrays zijn (broadcasting); het schema staat dan op de laatste as en
+    loopt tot de langste looptijd, met rente en aflossing 0 na de eigen looptijd.
+    De restschuld-arrays bevatten ook het startpunt (index 0 = bij ondertekening).
+    """
+    lening, rentevoet, looptijd_jaren = (
+        np.expand_dims(waarde, -1) for waarde in np.broadcast_arrays(
+            np.asarray(lening, dtype=float), np.asarray(rentevoet, dtype=float), np.asarray(looptijd_jaren, dtype=float)
+        )
+    )
+    jaren = int(np.ceil(looptijd_jaren.max(initial=0)))
+    maanden = np.arange(jaren * 12 + 1)
+
+    maandlast = bereken_maandlast(lening, rentevoet, looptijd_jaren)
+    restschuld_per_maand = bereken_restschuld(lening, rentevoet, looptijd_jaren, maanden)
+
+    rente_per_maand = restschuld_per_maand[..., :-1] * (rentevoet / 12)
+    binnen_looptijd = maanden[:-1] < looptijd_jaren * 12
+    rente_per_maand = np.where(binnen_looptijd, rente_per_maand, 0.0)
+    aflossing_per_maand = np.where(binnen_looptijd, maandlast - rente_per_maand, 0.0)
+
+    jaarvorm = rente_per_maand.shape[:-1] + (jaren, 12)
+
+    return {
+        "maandlast": maandlast[..., 0],
+        "rente_per_maand": rente_per_maand,
+        "aflossing_per_maand": aflossing_per_maand,
+        "restschuld_per_maand": restschuld_per_maand,
+        "rente_per_jaar": rente_per_maand.reshape(jaarvorm).sum(axis=-1),
+        "aflossing_per_jaar": aflossing_per_maand.reshape(jaarvorm).sum(axis=-1),
+        "restschuld_per_jaar": restschuld_per_maand[..., ::12],
+    }
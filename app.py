@@ -1,9 +1,22 @@
+import math
+import time
+from collections import deque
+
 import streamlit as st
-from calculator import bereken_kopen, bereken_huur
+from calculator import bereken_kopen_traject, bereken_huur_traject
 from constants import DEFAULT_RENDEMENT, DEFAULT_VASTGOEDGROEI, DEFAULT_MAANDINKOMEN, DEFAULT_INFLATIE
-import matplotlib.pyplot as plt
-from matplotlib.ticker import FuncFormatter
-import pandas as pd
+from constants import (
+    DEFAULT_AANTAL_PADEN,
+    DEFAULT_VOLATILITEIT_HUURINDEXATIE,
+    DEFAULT_VOLATILITEIT_INFLATIE,
+    DEFAULT_VOLATILITEIT_RENDEMENT,
+    DEFAULT_VOLATILITEIT_VASTGOEDGROEI,
+)
+from opcentiemen import artefact_is_actueel, laad_opcentiemen, laad_provincie_per_gemeente, bereken_onroerende_voorheffing
+from lening import extra_aflossing, herfinanciering, valideer_gebeurtenissen, verkoop
+from voorberekend import bereken_vergelijking
+import profilering
+import vooruitrekenen
 
 st.set_page_config(
     page_title="Huren of Kopen?",
@@ -11,6 +24,18 @@ st.set_page_config(
     layout="wide"
 )
 
+# Profilering (HURENOFKOPEN_PROFIEL=1 of ?profiel=1): timers per fase, onderaan getoond. Uitgeschakeld
+# zijn de `profilering.meet`-blokken hieronder no-ops.
+profiel_aan = profilering.aan_via_omgeving() or st.query_params.get(profilering.QUERY_PARAMETER) == "1"
+if profiel_aan:
+    profilering.start_rerun(profiel=st.session_state.pop("profiel_volgende_rerun", False))
+
+# Speculatief vooruitrekenen (vooruitrekenen.py): de secties registreren wat ze berekenen, na de
+# rerun worden de buren van de recent gewijzigde invoer op de achtergrond al in de cache gezet.
+# Een nieuwe rerun schrapt eerst het werk voor de vorige invoer.
+vooruitrekenaar = st.session_state.setdefault("vooruitrekenaar", vooruitrekenen.Vooruitrekenaar())
+vooruitrekenaar.annuleer()
+
 
 st.markdown("""
 <style>
@@ -41,20 +66,15 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
-@st.cache_data
-def laad_opcentiemen():
-    df_gem = pd.read_csv("data/opcentiemen_gemeente.csv", delimiter=";")
-    df_prov = pd.read_csv("data/opcentiemen_provincie.csv", delimiter=";")
-
-    df_gem["Gemeente"] = df_gem["Gemeente"].astype(str).str.strip().str.upper()
-    df_gem["Gemeentelijke Opcentiemen"] = df_gem["Gemeentelijke Opcentiemen"].astype(str).str.replace(",", ".").astype(float)
-
-    df_prov["Provincie"] = df_prov["Provincie"].astype(str).str.strip()
-    df_prov["Provinciale Opcentiemen"] = df_prov["Provinciale Opcentiemen"].astype(str).str.replace(",", ".").astype(float)
-
-    return df_gem, df_prov
-
-gemeente_df, provincie_df = laad_opcentiemen()
+with profilering.meet("opcentiemen"):
+    gemeente_opcentiemen, provincie_opcentiemen = laad_opcentiemen()
+    provincie_per_gemeente = laad_provincie_per_gemeente()
+    # De CSV's hashen hoeft maar één keer per sessie
+    if "opcentiemen_actueel" not in st.session_state:
+        st.session_state.opcentiemen_actueel = artefact_is_actueel()
+if not st.session_state.opcentiemen_actueel:
+    st.sidebar.warning("De opcentiemen-CSV's zijn gewijzigd sinds `data/opcentiemen.json` gebouwd werd. "
+                       "Voer `python opcentiemen.py` uit en herstart de app.")
 
 # Invoer: algemeen
 st.sidebar.header("Algemene instellingen")
@@ -92,22 +112,23 @@ inflatie = st.sidebar.number_input(
 
 # Selectie woonplaats
 st.sidebar.header("Woonplaats")
-gekozen_provincie = st.sidebar.selectbox("Provincie", sorted(provincie_df["Provincie"].unique()),
-                                         help="Dit bepaalt de provinciale opcentiemen voor de onroerende voorheffing.")
-gekozen_gemeente = st.sidebar.selectbox("Gemeente", sorted(gemeente_df["Gemeente"].unique()),
+gekozen_gemeente = st.sidebar.selectbox("Gemeente", list(gemeente_opcentiemen),
                                             help="Dit bepaalt de gemeentelijke opcentiemen voor de onroerende voorheffing.")
+# De provincie volgt uit de gemeente
+gekozen_provincie = st.sidebar.selectbox("Provincie", [provincie_per_gemeente[gekozen_gemeente]], disabled=True,
+                                         help="De provincie van de gekozen gemeente; bepaalt de provinciale opcentiemen.")
 
 gki = st.sidebar.number_input("Geïndexeerd kadastraal inkomen (€)", min_value=500, max_value=10000, value=2500,
                               help = "Betreffende het aan te kopen huis. De huidige indexatie van het kadastraal inkomen is 218%")
 
-# Lookup opcentiemen
-prov_opcentiemen = provincie_df[provincie_df["Provincie"] == gekozen_provincie]["Provinciale Opcentiemen"].values[0]
-gem_opcentiemen = gemeente_df[gemeente_df["Gemeente"] == gekozen_gemeente]["Gemeentelijke Opcentiemen"].values[0]
-
 # Bereken voorheffing
-basisvoet = 0.025
-basisheffing = gki * basisvoet
-onroerende_voorheffing = basisheffing * (1 + gem_opcentiemen/100 + prov_opcentiemen/100)
+onroerende_voorheffing = bereken_onroerende_voorheffing(gki, gekozen_gemeente, gekozen_provincie)
+
+st.sidebar.header("Weergave")
+interactieve_grafieken = st.sidebar.toggle(
+    "Interactieve grafieken",
+    help="Teken de grafieken in je browser in plaats van als afbeelding op de server. Enkel de cijfers worden doorgestuurd."
+)
 
 st.sidebar.markdown(
     """
@@ -189,6 +210,36 @@ with col_koper:
                                         help="Totaal aan verzekeringen voor de woning en inboedel. Een brand- en woonverzekering is normaliter duurder dan een huurdersaansprakelijkheidsverzekering.")
     andere_kosten_koper = st.number_input("Andere kosten koper (€ / maand)", 0, 5000, 0)
 
+    with st.expander("Extra aflossing, herfinanciering of verkoop"):
+        st.caption("Jaar 0 = geen. Jaar 1 is het aankoopjaar. Break-even, gevoeligheid, gemeenten, Monte Carlo en backtest rekenen zonder deze gebeurtenissen.")
+        col_ev1, col_ev2 = st.columns(2)
+        aflossing_jaar = col_ev1.number_input("Extra aflossing in jaar", 0, 50, 0)
+        aflossing_bedrag = col_ev2.number_input("Extra aflossing (€)", 0, 2000000, 20000, step=1000)
+        herfinanciering_jaar = col_ev1.number_input("Herfinanciering in jaar", 0, 50, 0,
+                                                    help="Ook een herziening van een variabele rente: nieuwe rentevoet op het openstaande kapitaal.")
+        herfinanciering_rentevoet = col_ev2.number_input("Nieuwe rentevoet (%)", 0.0, 10.0, 2.5, step=0.01) / 100
+        herfinanciering_looptijd = col_ev1.number_input("Nieuwe looptijd (jaren)", 0, 40, 0, help="0 = einddatum behouden.")
+        herfinanciering_kosten = col_ev2.number_input("Herfinancieringskosten (€)", 0, 50000, 2000, step=100)
+        verkoop_jaar = col_ev1.number_input("Verkoop op het einde van jaar", 0, 50, 0)
+        verkoop_kosten_pct = col_ev2.number_input("Verkoopkosten (%)", 0.0, 10.0, 3.0, step=0.1) / 100
+        woonkost_na_verkoop = col_ev1.number_input("Woonkost na verkoop (€ / maand)", 0, 5000, 1000,
+                                                   help="In euro's van vandaag, geïndexeerd met de inflatie.")
+
+    gebeurtenissen = []
+    if aflossing_jaar:
+        gebeurtenissen.append(extra_aflossing(aflossing_jaar, aflossing_bedrag))
+    if herfinanciering_jaar:
+        gebeurtenissen.append(herfinanciering(herfinanciering_jaar, herfinanciering_rentevoet,
+                                              herfinanciering_looptijd or None, herfinanciering_kosten))
+    if verkoop_jaar:
+        gebeurtenissen.append(verkoop(verkoop_jaar, verkoop_kosten_pct, woonkost_na_verkoop))
+    gebeurtenissen = tuple(gebeurtenissen)
+    try:
+        valideer_gebeurtenissen(gebeurtenissen)
+    except ValueError as fout:
+        st.warning(f"Gebeurtenissen genegeerd: {fout}")
+        gebeurtenissen = ()
+
 with col_huurder:
     st.markdown("### Huren")
     maandhuur = st.number_input("Start huurprijs (€)", 300, 5000, 1000)
@@ -197,8 +248,8 @@ with col_huurder:
     verzekering_huur = st.number_input("Verzekering huurder (€ / jaar)", 0, 2000, 200)
     andere_kosten_huurder = st.number_input("Andere kosten huurder (€ / maand)", 0, 5000, 0)
 
-# Berekening
-koper = bereken_kopen(
+# Zelfde scenario als invoer voor de batch-modules (Monte Carlo, break-even)
+scenario = dict(
     woningprijs=woningprijs,
     overige_kosten_pct=overige_kosten_pct,
     eigen_inbreng_pct=eigen_inbreng_pct,
@@ -206,138 +257,644 @@ koper = bereken_kopen(
     looptijd_jaren=looptijd,
     onroerende_voorheffing=onroerende_voorheffing,
     onderhoud_pct=onderhoud_pct,
-    verzekering_per_jaar=verzekering_koper,
-    tijdshorizon=tijdshorizon,
-    verwacht_rendement=rendement,
-    vastgoedgroei=vastgoedgroei,
-    maandinkomen=maandinkomen,
-    inflatie=inflatie,
-    andere_kosten_per_maand=andere_kosten_koper
-)
-
-huurder = bereken_huur(
+    verzekering_koper=verzekering_koper,
     maandhuur=maandhuur,
     huurindexatie=huurindexatie,
-    verzekering_per_jaar=verzekering_huur,
-    maandlast_koper=koper["maandlast"],
+    verzekering_huurder=verzekering_huur,
     tijdshorizon=tijdshorizon,
-    woningprijs=woningprijs,
-    eigen_inbreng_pct=eigen_inbreng_pct,
-    overige_kosten_pct=overige_kosten_pct,
     verwacht_rendement=rendement,
+    vastgoedgroei=vastgoedgroei,
     maandinkomen=maandinkomen,
     inflatie=inflatie,
-    andere_kosten_per_maand=andere_kosten_huurder
+    andere_kosten_koper=andere_kosten_koper,
+    andere_kosten_huurder=andere_kosten_huurder,
 )
 
-st.markdown("---")
+st.subheader(f"Netto Vermogen na {tijdshorizon} jaar (in reële euro's van vandaag)")
+kerncijfer_vakken = [kolom.empty() for kolom in st.columns(3)]
+
+
+def toon_kerncijfers(netto_koper, netto_huurder):
+    # Toon ook eindwaarden in reële termen
+    netto_koper_reëel = netto_koper / (1 + inflatie) ** tijdshorizon
+    netto_huurder_reëel = netto_huurder / (1 + inflatie) ** tijdshorizon
+    vak_kopen, vak_huren, vak_verschil = kerncijfer_vakken
+    vak_kopen.metric("Kopen", f"€ {netto_koper_reëel:,.0f}")
+    vak_huren.metric("Huren", f"€ {netto_huurder_reëel:,.0f}")
+    vak_verschil.metric("Verschil", f"€ {netto_koper_reëel - netto_huurder_reëel:,.0f}")
+
+
+# Kerncijfers eerst, voorlopig: binnen het voorberekende rooster is dit een interpolatie van
+# enkele microseconden, zodat ze op het scherm staan voor de trajecten berekend zijn. Zodra de
+# trajecten er zijn, vervangen hun exacte eindwaarden ze: dezelfde cijfers als in de grafieken.
+# Het rooster en de batch-rekenkern kennen geen gebeurtenissen; dan wacht de app op de trajecten.
+with profilering.meet("kerncijfers"):
+    kerncijfers = None if gebeurtenissen else bereken_vergelijking(scenario)
+if kerncijfers is not None:
+    toon_kerncijfers(kerncijfers["koper_netto_vermogen"], kerncijfers["huurder_netto_vermogen"])
+
+# Berekening: alle horizonnen 0..tijdshorizon in één keer. Beide trajecten zijn apart
+# gecachet, zodat bv. een andere maandhuur de koper-kant niet opnieuw berekent.
+def bereken_trajecten(scenario, gebeurtenissen):
+    koper_traject = bereken_kopen_traject(
+        woningprijs=scenario["woningprijs"],
+        overige_kosten_pct=scenario["overige_kosten_pct"],
+        eigen_inbreng_pct=scenario["eigen_inbreng_pct"],
+        rentevoet=scenario["rentevoet"],
+        looptijd_jaren=scenario["looptijd_jaren"],
+        onroerende_voorheffing=scenario["onroerende_voorheffing"],
+        onderhoud_pct=scenario["onderhoud_pct"],
+        verzekering_per_jaar=scenario["verzekering_koper"],
+        tijdshorizon=scenario["tijdshorizon"],
+        verwacht_rendement=scenario["verwacht_rendement"],
+        vastgoedgroei=scenario["vastgoedgroei"],
+        maandinkomen=scenario["maandinkomen"],
+        inflatie=scenario["inflatie"],
+        andere_kosten_per_maand=scenario["andere_kosten_koper"],
+        gebeurtenissen=gebeurtenissen
+    )
+    huurder_traject = bereken_huur_traject(
+        maandhuur=scenario["maandhuur"],
+        huurindexatie=scenario["huurindexatie"],
+        verzekering_per_jaar=scenario["verzekering_huurder"],
+        tijdshorizon=scenario["tijdshorizon"],
+        maandlast_koper=koper_traject["maandlast"],
+        woningprijs=scenario["woningprijs"],
+        eigen_inbreng_pct=scenario["eigen_inbreng_pct"],
+        overige_kosten_pct=scenario["overige_kosten_pct"],
+        verwacht_rendement=scenario["verwacht_rendement"],
+        maandinkomen=scenario["maandinkomen"],
+        inflatie=scenario["inflatie"],
+        andere_kosten_per_maand=scenario["andere_kosten_huurder"]
+    )
+    return koper_traject, huurder_traject
 
 
-# Toon ook eindwaarden in reële termen
-defleerfactor = (1 + inflatie) ** tijdshorizon
-netto_koper_reëel = koper['netto_vermogen'] / defleerfactor
-netto_huurder_reëel = huurder['netto_vermogen'] / defleerfactor
+def evolutie(koper_traject, huurder_traject, tijdshorizon):
+    # Grafieken tonen jaar 0..tijdshorizon-1
+    kopers_netto = koper_traject["netto_vermogen"][:tijdshorizon]
+    huurders_netto = huurder_traject["netto_vermogen"][:tijdshorizon]
+    return list(range(0, tijdshorizon)), kopers_netto, huurders_netto, kopers_netto - huurders_netto
 
-st.subheader(f"Netto Vermogen na {tijdshorizon} jaar (in reële euro's van vandaag)")
-col1, col2, col3 = st.columns(3)
-col1.metric("Kopen", f"€ {netto_koper_reëel:,.0f}")
-col2.metric("Huren", f"€ {netto_huurder_reëel:,.0f}")
-col3.metric("Verschil", f"€ {netto_koper_reëel - netto_huurder_reëel:,.0f}")
+
+def reken_evolutie_vooruit(scenario, gebeurtenissen=gebeurtenissen, interactief=interactieve_grafieken):
+    # Speculatief: dezelfde trajecten en grafieken als hieronder, voor een buur van het scenario
+    jaren, kopers_netto, huurders_netto, verschillen = evolutie(*bereken_trajecten(scenario, gebeurtenissen), scenario["tijdshorizon"])
+    if not interactief:
+        from grafieken import teken_netto_vermogen, teken_verschil
+
+        teken_netto_vermogen(jaren, kopers_netto, huurders_netto)
+        teken_verschil(jaren, verschillen)
+
+
+vooruitrekenaar.registreer("evolutie", reken_evolutie_vooruit)
+
+with profilering.meet("trajecten"):
+    koper_traject, huurder_traject = bereken_trajecten(scenario, gebeurtenissen)
+toon_kerncijfers(koper_traject["netto_vermogen"][-1], huurder_traject["netto_vermogen"][-1])
+
+st.markdown("---")
 
 # Evolutie grafiek
-kopers_netto, huurders_netto, verschillen = [], [], []
-for jaar in range(0, tijdshorizon):
-    koper_y = bereken_kopen(
-        woningprijs=woningprijs,
-        overige_kosten_pct=overige_kosten_pct,
-        eigen_inbreng_pct=eigen_inbreng_pct,
-        rentevoet=rentevoet,
-        looptijd_jaren=looptijd,
-        onroerende_voorheffing=onroerende_voorheffing,
-        onderhoud_pct=onderhoud_pct,
-        verzekering_per_jaar=verzekering_koper,
-        tijdshorizon=jaar,
-        verwacht_rendement=rendement,
-        vastgoedgroei=vastgoedgroei,
-        maandinkomen=maandinkomen,
-        inflatie=inflatie,
-        andere_kosten_per_maand=andere_kosten_koper
-    )
-    huurder_y = bereken_huur(
-        maandhuur=maandhuur,
-        huurindexatie=huurindexatie,
-        verzekering_per_jaar=verzekering_huur,
-        tijdshorizon=jaar,
-        maandlast_koper=koper_y["maandlast"],
-        woningprijs=woningprijs,
-        eigen_inbreng_pct=eigen_inbreng_pct,
-        overige_kosten_pct=overige_kosten_pct,
-        verwacht_rendement=rendement,
-        maandinkomen=maandinkomen,
-        inflatie=inflatie,
-        andere_kosten_per_maand=andere_kosten_huurder
-    )
-    
-    kopers_netto.append(koper_y["netto_vermogen"])
-    huurders_netto.append(huurder_y["netto_vermogen"])
-    verschillen.append(koper_y["netto_vermogen"] - huurder_y["netto_vermogen"])
+jaren, kopers_netto, huurders_netto, verschillen = evolutie(koper_traject, huurder_traject, tijdshorizon)
 
 
 st.markdown("---")
 
 st.subheader(f"Evolutie Netto Vermogen (in reële euro's van vandaag)")
 
-jaren = list(range(0, tijdshorizon ))
-
 # Plot kolommen naast elkaar
 col_plot_koper, col_plot_verschil = st.columns(2)
 
+if not interactieve_grafieken:
+    # Matplotlib pas laden wanneer de grafieken aan de beurt zijn: de metrics hierboven
+    # staan dan al op het scherm bij een koude start
+    with profilering.meet("import grafieken"):
+        from grafieken import teken_netto_vermogen, teken_verschil
+
 with col_plot_koper:
     st.markdown("#### Netto vermogen: Kopen vs. Huren")
-    fig1, ax1 = plt.subplots(figsize=(6, 4))
-    ax1.plot(jaren, kopers_netto, label="Koper", linewidth=2, color="#0D3B66")
-    ax1.plot(jaren, huurders_netto, label="Huurder", linewidth=2, color="#2A9D8F")
-
-    # 🔵 Markeer het startpunt van de koper (t = 0)
-    ax1.plot(jaren[0], kopers_netto[0], "o", color="tab:grey", alpha=0.7)
-
-# 📌 Annotatie met pijl en tekst boven het punt
-    ax1.annotate(
-    f"Startkapitaal: € {kopers_netto[0]:,.0f}",
-    xy=(jaren[0], kopers_netto[0]),
-    xytext=(-tijdshorizon/7, kopers_netto[0]),  # vaste x-positie dicht bij y-as
-    arrowprops=dict(arrowstyle="->", color="tab:grey"),
-    fontsize=7,
-    color="tab:grey",
-    ha="right",
-    va="center",
-    alpha=0.7,
-    )
-
-    ax1.set_xlabel("Jaar")
-    ax1.set_ylabel("Netto vermogen (€)")
-    ax1.grid(True, linestyle="--", alpha=0.5)
-    ax1.set_xticks([j for j in jaren if j % 5 == 0 or j == 0])
-    ax1.set_xticklabels([str(j) for j in jaren if j % 5 == 0 or j == 0])
-    ax1.yaxis.set_major_formatter(FuncFormatter(lambda x, _: f"€ {x:,.0f}"))
-    ax1.legend()
-    st.pyplot(fig1)
+    if interactieve_grafieken:
+        with profilering.meet("grafieken"):
+            st.line_chart(
+                {"Jaar": jaren, "Koper": kopers_netto, "Huurder": huurders_netto},
+                x="Jaar",
+                y=["Koper", "Huurder"],
+                color=["#0D3B66", "#2A9D8F"],
+                y_label="Netto vermogen (€)",
+            )
+    else:
+        with profilering.meet("grafieken"):
+            grafiek = teken_netto_vermogen(jaren, kopers_netto, huurders_netto)
+        with profilering.meet("st.image"):
+            st.image(grafiek, width="stretch")
 
 with col_plot_verschil:
     st.markdown("#### Verschil in netto vermogen (koper - huurder)")
-    fig2, ax2 = plt.subplots(figsize=(6, 4))
-    ax2.bar(jaren, verschillen, color="gray", alpha=0.3)
-    ax2.axhline(0, linestyle="--", color="black", linewidth=1)
+    if interactieve_grafieken:
+        with profilering.meet("grafieken"):
+            st.bar_chart({"Jaar": jaren, "Verschil": verschillen}, x="Jaar", y="Verschil", color="#808080", y_label="Verschil (€)")
+    else:
+        with profilering.meet("grafieken"):
+            grafiek = teken_verschil(jaren, verschillen)
+        with profilering.meet("st.image"):
+            st.image(grafiek, width="stretch")
+
+
+def kasstromen_als_csv(scenario=scenario):
+    # Pas bij een klik opgeroepen: een rerun rekent het kasstroomoverzicht niet uit. Streamlit
+    # verwacht de volledige inhoud; voor één scenario is dat hoogstens enkele tientallen kB.
+    from kasstromen import als_csv, kasstroom_rijen
+
+    return als_csv(kasstroom_rijen(scenario))
+
+
+st.download_button(
+    "Download kasstroomoverzicht per jaar (CSV)",
+    kasstromen_als_csv,
+    f"kasstromen_{woningprijs:.0f}_{tijdshorizon}j.csv",
+    "text/csv",
+    on_click="ignore",
+    help=(
+        "Per jaar de afbetaling (rente en kapitaal), restschuld, onderhoud, onroerende voorheffing, verzekering, "
+        "huur, stortingen en rendement van de beleggingen, woningwaarde en het netto vermogen, nominaal en reëel."
+        + (" Zonder de gebeurtenissen op de lening." if gebeurtenissen else "")
+    ),
+)
 
-    ax2.set_xlabel("Jaar")
-    ax2.set_ylabel("Verschil (€)")
-    ax2.grid(True, linestyle="--", alpha=0.5)
-    ax2.set_xticks([j for j in jaren if j % 5 == 0 or j == 0])
-    ax2.set_xticklabels([str(j) for j in jaren if j % 5 == 0 or j == 0])
-    ax2.yaxis.set_major_formatter(FuncFormatter(lambda x, _: f"€ {x:,.0f}"))
-    st.pyplot(fig2)
+
+st.markdown("---")
+st.subheader("Break-even: wanneer wint kopen?")
+
+# Fragment: een andere parameter kiezen herberekent enkel deze sectie, niet de hele app
+@st.fragment
+def toon_breakeven(scenario, tijdshorizon):
+    breakeven_parameters = {
+        "maandhuur": ("Start huurprijs", lambda x: f"€ {x:,.0f}"),
+        "woningprijs": ("Woningprijs", lambda x: f"€ {x:,.0f}"),
+        "verwacht_rendement": ("Rendement beleggingen", lambda x: f"{x * 100:.2f} %"),
+        "vastgoedgroei": ("Vastgoedgroei", lambda x: f"{x * 100:.2f} %"),
+    }
+    breakeven_parameter = st.selectbox(
+        "Bij welke waarde van ... is kopen even goed als huren?",
+        list(breakeven_parameters),
+        format_func=lambda naam: breakeven_parameters[naam][0],
+        help="De andere invoer blijft gelijk. Gezocht wordt binnen een ruim interval; zonder omslagpunt verschijnt er geen waarde."
+    )
+    breakeven_label, breakeven_opmaak = breakeven_parameters[breakeven_parameter]
+    from breakeven import GEEN_TEKENWISSEL, NIET_GECONVERGEERD, zoek_breakeven_per_horizon
+
+    breakeven = zoek_breakeven_per_horizon(breakeven_parameter, scenario)
+    vooruitrekenaar.registreer("breakeven", lambda buur: zoek_breakeven_per_horizon(breakeven_parameter, buur))
+    breakeven_eind = breakeven["breakeven"][-1]
+
+    col_be_waarde, col_be_grafiek = st.columns([1, 2])
+    col_be_waarde.metric(
+        f"Break-even {breakeven_label.lower()} na {tijdshorizon} jaar",
+        breakeven_opmaak(breakeven_eind) if math.isfinite(breakeven_eind) else {
+            GEEN_TEKENWISSEL: "geen omslagpunt",
+            NIET_GECONVERGEERD: "niet gevonden",
+        }.get(breakeven["status"][-1], "ongeldige invoer"),
+    )
+    col_be_grafiek.line_chart(
+        {"Jaar": breakeven["tijdshorizon"], breakeven_label: breakeven["breakeven"]},
+        x="Jaar",
+        y=breakeven_label,
+        height=220,
+    )
+
+
+with profilering.meet("breakeven"):
+    toon_breakeven(scenario, tijdshorizon)
+
+st.markdown("---")
+st.subheader("Gevoeligheid: welke aanname weegt het zwaarst?")
+
+# Fragment: andere verstoringen herberekenen enkel deze sectie
+@st.fragment
+def toon_gevoeligheid(scenario, interactieve_grafieken):
+    gevoeligheid_labels = {
+        "woningprijs": "Woningprijs",
+        "overige_kosten_pct": "Overige aankoopkosten",
+        "eigen_inbreng_pct": "Eigen inbreng",
+        "rentevoet": "Rentevoet",
+        "looptijd_jaren": "Looptijd lening",
+        "onroerende_voorheffing": "Onroerende voorheffing",
+        "onderhoud_pct": "Onderhoud",
+        "verzekering_koper": "Verzekering koper",
+        "maandhuur": "Start huurprijs",
+        "huurindexatie": "Huurindexatie",
+        "verzekering_huurder": "Verzekering huurder",
+        "verwacht_rendement": "Rendement beleggingen",
+        "vastgoedgroei": "Vastgoedgroei",
+        "maandinkomen": "Maandinkomen",
+        "inflatie": "Inflatie",
+    }
+    with st.expander("Instellingen gevoeligheid"):
+        col_gv1, col_gv2, col_gv3 = st.columns(3)
+        procentpunt = col_gv1.number_input("Percentages ± (procentpunt)", 0.1, 5.0, 1.0, step=0.1,
+                                           help="Voor rentevoet, rendement, groei, inflatie, ...") / 100
+        relatief = col_gv2.number_input("Bedragen ± (%)", 1.0, 50.0, 10.0, step=1.0,
+                                        help="Voor woningprijs, huur, inkomen, kosten, ...") / 100
+        jaren = col_gv3.number_input("Looptijd ± (jaren)", 1, 10, 5)
+
+    from gevoeligheid import bereken_gevoeligheid
+
+    def bereken_sectie(scenario):
+        # Ook voor het vooruitrekenen: de berekening en de afbeelding, zonder Streamlit-oproepen
+        gevoeligheid = bereken_gevoeligheid(scenario, procentpunt=procentpunt, relatief=relatief, jaren=jaren)
+        labels = [gevoeligheid_labels[naam] for naam in gevoeligheid["parameters"]]
+        if interactieve_grafieken:
+            return gevoeligheid, labels, None
+        from grafieken import teken_tornado
+
+        tornado = teken_tornado(labels, gevoeligheid["verschil_laag"], gevoeligheid["verschil_hoog"], gevoeligheid["basis"])
+        return gevoeligheid, labels, tornado
+
+    gevoeligheid, labels, tornado = bereken_sectie(scenario)
+    vooruitrekenaar.registreer("gevoeligheid", bereken_sectie)
+
+    st.markdown("#### Reëel verschil (koper - huurder) bij een lage en een hoge waarde van elke aanname")
+    if interactieve_grafieken:
+        st.vega_lite_chart(
+            {
+                "values": [
+                    {"Aanname": label, "Waarde": waarde, "Basis": gevoeligheid["basis"], "Verschil": verschil}
+                    for label, laag, hoog in zip(labels, gevoeligheid["verschil_laag"].tolist(), gevoeligheid["verschil_hoog"].tolist())
+                    for waarde, verschil in (("Laag", laag), ("Hoog", hoog))
+                ]
+            },
+            {
+                "mark": "bar",
+                "encoding": {
+                    "y": {"field": "Aanname", "type": "nominal", "sort": labels, "title": None},
+                    "x": {"field": "Basis", "type": "quantitative", "title": "Verschil (€)"},
+                    "x2": {"field": "Verschil"},
+                    "color": {
+                        "field": "Waarde",
+                        "type": "nominal",
+                        "scale": {"domain": ["Laag", "Hoog"], "range": ["#2A9D8F", "#0D3B66"]},
+                    },
+                },
+            },
+        )
+    else:
+        st.image(tornado, width="stretch")
+
+
+with profilering.meet("gevoeligheid"):
+    toon_gevoeligheid(scenario, interactieve_grafieken)
+
+st.markdown("---")
+st.subheader("Financiering: welke eigen inbreng en looptijd?")
+
+# Fragment: andere voorwaarden herberekenen enkel deze sectie
+@st.fragment
+def toon_financiering(scenario, eigen_inbreng_pct, looptijd, interactieve_grafieken):
+    doelen = {"Netto vermogen koper": "koper", "Verschil met huren": "verschil"}
+    with st.expander("Voorwaarden financiering"):
+        col_fi1, col_fi2, col_fi3 = st.columns(3)
+        max_lastratio = col_fi1.number_input("Maximale maandlast (% van inkomen)", 10.0, 100.0, 33.0, step=1.0,
+                                             help="Banken laten de maandlast meestal niet boven een derde van het netto inkomen gaan.") / 100
+        max_eigen_inbreng = col_fi2.number_input("Beschikbaar eigen vermogen (% van woningprijs)", 0.0, 100.0,
+                                                 max(50.0, eigen_inbreng_pct * 100), step=1.0,
+                                                 help="Wat je niet inbrengt, wordt belegd tegen het verwachte rendement.") / 100
+        doel_label = col_fi3.radio("Maximaliseer", list(doelen))
+
+    from financiering import optimaliseer_financiering
+
+    def bereken_sectie(scenario):
+        # Ook voor het vooruitrekenen: het optimum en de heatmap, zonder Streamlit-oproepen
+        optimum = optimaliseer_financiering(
+            scenario, max_lastratio=max_lastratio, eigen_inbreng_bereik=(0.0, max_eigen_inbreng), doel=doelen[doel_label]
+        )
+        if interactieve_grafieken or not optimum["haalbaar"]:
+            return optimum, None
+        from grafieken import teken_heatmap
+
+        landschap = optimum["landschap"]
+        heatmap = teken_heatmap(
+            landschap["eigen_inbreng_pct"], landschap["looptijd_jaren"], landschap["waarde"],
+            (optimum["eigen_inbreng_pct"], optimum["looptijd_jaren"]), f"{doel_label} (€, reëel)",
+        )
+        return optimum, heatmap
+
+    optimum, heatmap = bereken_sectie(scenario)
+    vooruitrekenaar.registreer("financiering", bereken_sectie)
+    if not optimum["haalbaar"]:
+        st.warning(f"Geen enkele combinatie houdt de maandlast onder € {optimum['max_maandlast']:,.0f}.")
+        return
+
+    col_fi_inbreng, col_fi_looptijd, col_fi_maandlast = st.columns(3)
+    col_fi_inbreng.metric("Beste eigen inbreng", f"{optimum['eigen_inbreng_pct'] * 100:.1f} %",
+                          f"{(optimum['eigen_inbreng_pct'] - eigen_inbreng_pct) * 100:+.1f} procentpunt")
+    col_fi_looptijd.metric("Beste looptijd", f"{optimum['looptijd_jaren']} jaar", f"{optimum['looptijd_jaren'] - looptijd:+d} jaar")
+    col_fi_maandlast.metric("Maandlast", f"€ {optimum['maandlast']:,.0f}", f"max. € {optimum['max_maandlast']:,.0f}", delta_color="off")
+
+    landschap = optimum["landschap"]
+    st.markdown(f"#### {doel_label} na {tijdshorizon} jaar (reëel) per eigen inbreng en looptijd")
+    if interactieve_grafieken:
+        st.vega_lite_chart(
+            {
+                "values": [
+                    {"Eigen inbreng (%)": round(inbreng * 100, 1), "Looptijd": looptijd_jaren, "Waarde": waarde}
+                    for inbreng, rij in zip(landschap["eigen_inbreng_pct"].tolist(), landschap["waarde"].tolist())
+                    for looptijd_jaren, waarde in zip(landschap["looptijd_jaren"].tolist(), rij)
+                    if math.isfinite(waarde)
+                ]
+            },
+            {
+                "mark": "rect",
+                "encoding": {
+                    "x": {"field": "Eigen inbreng (%)", "type": "ordinal"},
+                    "y": {"field": "Looptijd", "type": "ordinal", "sort": "descending", "title": "Looptijd (jaren)"},
+                    "color": {"field": "Waarde", "type": "quantitative", "title": "€"},
+                },
+            },
+        )
+    else:
+        st.image(heatmap, width="stretch")
+    st.caption(f"Witte of ontbrekende vakjes: maandlast boven € {optimum['max_maandlast']:,.0f}. "
+               f"Optimum gevonden met {optimum['evaluaties']} berekeningen.")
+
+
+with profilering.meet("financiering"):
+    toon_financiering(scenario, eigen_inbreng_pct, looptijd, interactieve_grafieken)
+
+st.markdown("---")
+st.subheader("Locatie: waar loont kopen het meest?")
+
+# Fragment: de tabel tonen of verbergen herberekent enkel deze sectie
+@st.fragment
+def toon_gemeenten(scenario, gki, gekozen_gemeente):
+    if not st.checkbox(
+        "Vergelijk alle gemeenten bij deze woningprijs en dit GKI",
+        help="Enkel de opcentiemen, en dus de onroerende voorheffing, verschillen; de rest van de invoer blijft gelijk."
+    ):
+        return
+
+    from rangschikking import rangschik_gemeenten
+
+    rangschikking = rangschik_gemeenten(
+        {naam: waarde for naam, waarde in scenario.items() if naam != "onroerende_voorheffing"}, gki
+    )
+    vooruitrekenaar.registreer("gemeenten", lambda buur: rangschik_gemeenten(
+        {naam: waarde for naam, waarde in buur.items() if naam != "onroerende_voorheffing"}, gki
+    ))
+    positie = list(rangschikking["gemeente"]).index(gekozen_gemeente)
+    st.metric(
+        f"Rang van {gekozen_gemeente.title()}",
+        f"{positie + 1} / {len(rangschikking['rang'])}",
+        help="1 = de gemeente waar kopen het meest oplevert t.o.v. huren.",
+    )
+    st.dataframe(
+        {
+            "Rang": rangschikking["rang"],
+            "Gemeente": rangschikking["gemeente"],
+            "Provincie": rangschikking["provincie"],
+            "Onroerende voorheffing (€ / jaar)": rangschikking["onroerende_voorheffing"],
+            "Verschil koper - huurder (€, reëel)": rangschikking["verschil_reeel"],
+        },
+        hide_index=True,
+        height=300,
+        column_config={
+            "Onroerende voorheffing (€ / jaar)": st.column_config.NumberColumn(format="€ %.0f"),
+            "Verschil koper - huurder (€, reëel)": st.column_config.NumberColumn(format="€ %.0f"),
+        },
+    )
 
 
+with profilering.meet("gemeenten"):
+    toon_gemeenten(scenario, gki, gekozen_gemeente)
+
+st.markdown("---")
+st.subheader("Onzekerheid: Monte Carlo-simulatie")
+
+# Fragment: de simulatie aan- of uitzetten en de instellingen wijzigen herberekent enkel deze sectie
+@st.fragment
+def toon_monte_carlo(scenario, tijdshorizon, interactieve_grafieken):
+    simuleer = st.checkbox(
+        "Simuleer onzekere rendementen, vastgoedgroei, inflatie en huurindexatie",
+        help="In plaats van constante percentages trekken we duizenden gecorreleerde jaarpaden rond de gekozen gemiddelden."
+    )
+
+    if simuleer:
+        with st.expander("Instellingen simulatie"):
+            col_mc1, col_mc2, col_mc3 = st.columns(3)
+            aantal_paden = col_mc1.number_input("Aantal paden", 1000, 50000, DEFAULT_AANTAL_PADEN, step=1000)
+            volatiliteit_rendement = col_mc2.number_input(
+                "Volatiliteit rendement (%)", 0.0, 50.0, DEFAULT_VOLATILITEIT_RENDEMENT * 100, step=0.5) / 100
+            volatiliteit_vastgoedgroei = col_mc3.number_input(
+                "Volatiliteit vastgoedgroei (%)", 0.0, 20.0, DEFAULT_VOLATILITEIT_VASTGOEDGROEI * 100, step=0.5) / 100
+            volatiliteit_inflatie = col_mc1.number_input(
+                "Volatiliteit inflatie (%)", 0.0, 10.0, DEFAULT_VOLATILITEIT_INFLATIE * 100, step=0.1) / 100
+            volatiliteit_huurindexatie = col_mc2.number_input(
+                "Volatiliteit huurindexatie (%)", 0.0, 10.0, DEFAULT_VOLATILITEIT_HUURINDEXATIE * 100, step=0.1) / 100
+
+        from montecarlo import simuleer_monte_carlo
+
+        simulatie = simuleer_monte_carlo(
+            **scenario,
+            aantal_paden=aantal_paden,
+            volatiliteit_rendement=volatiliteit_rendement,
+            volatiliteit_vastgoedgroei=volatiliteit_vastgoedgroei,
+            volatiliteit_inflatie=volatiliteit_inflatie,
+            volatiliteit_huurindexatie=volatiliteit_huurindexatie,
+            seed=0,
+        )
+
+        col_mc_kans, col_mc_mediaan = st.columns(2)
+        col_mc_kans.metric(f"Kans dat kopen wint na {tijdshorizon} jaar", f"{simulatie['kans_kopen_wint'][-1] * 100:.0f} %")
+        col_mc_mediaan.metric("Mediaan verschil (P50)", f"€ {simulatie['percentielen'][50][-1]:,.0f}")
+
+        st.markdown("#### Verschil in netto vermogen (koper - huurder): P5 - P50 - P95")
+        if interactieve_grafieken:
+            st.vega_lite_chart(
+                {
+                    "values": [
+                        {"Jaar": int(jaar), "P5": p5, "P50": p50, "P95": p95}
+                        for jaar, p5, p50, p95 in zip(
+                            simulatie["jaren"],
+                            simulatie["percentielen"][5].tolist(),
+                            simulatie["percentielen"][50].tolist(),
+                            simulatie["percentielen"][95].tolist(),
+                        )
+                    ]
+                },
+                {
+                    "encoding": {"x": {"field": "Jaar", "type": "quantitative"}},
+                    "layer": [
+                        {
+                            "mark": {"type": "area", "opacity": 0.2, "color": "#0D3B66"},
+                            "encoding": {
+                                "y": {"field": "P5", "type": "quantitative", "title": "Verschil (€)"},
+                                "y2": {"field": "P95"},
+                            },
+                        },
+                        {"mark": {"type": "line", "color": "#0D3B66"}, "encoding": {"y": {"field": "P50", "type": "quantitative"}}},
+                    ],
+                },
+            )
+        else:
+            from grafieken import teken_waaier
+
+            st.image(
+                teken_waaier(
+                    simulatie["jaren"],
+                    simulatie["percentielen"][5],
+                    simulatie["percentielen"][50],
+                    simulatie["percentielen"][95],
+                ),
+                width="stretch",
+            )
+
+
+with profilering.meet("monte_carlo"):
+    toon_monte_carlo(scenario, tijdshorizon, interactieve_grafieken)
+
+st.markdown("---")
+st.subheader("Historische backtest")
+
+# Fragment: de backtest aan- of uitzetten herberekent enkel deze sectie
+@st.fragment
+def toon_backtest(scenario, tijdshorizon, interactieve_grafieken):
+    from backtest import HISTORIEK, bereken_backtest, laad_historiek
+
+    if not HISTORIEK.exists():
+        st.caption(
+            f"Plaats historische jaarreeksen in `data/{HISTORIEK.name}` "
+            "(Jaar;Rendement;Vastgoedgroei;Inflatie;Hypotheekrente, in %) om de vergelijking "
+            "te herhalen voor elk historisch startjaar."
+        )
+        return
+
+    historiek = laad_historiek()
+    if not st.checkbox(
+        f"Herhaal de vergelijking voor elk startjaar van {historiek['jaren'][0]} tot {historiek['jaren'][-1]}",
+        help="In plaats van constante percentages gebruiken we de werkelijke jaarreeksen vanaf elk startjaar.",
+    ):
+        return
+    if tijdshorizon > len(historiek["jaren"]):
+        st.warning(f"De historiek bevat maar {len(historiek['jaren'])} jaar; kies een kortere tijdshorizon.")
+        return
+
+    backtest = bereken_backtest(scenario, historiek)
+    vooruitrekenaar.registreer("backtest", lambda buur: bereken_backtest(buur, historiek))
+
+    col_bt_kans, col_bt_mediaan, col_bt_aantal = st.columns(3)
+    col_bt_kans.metric(f"Kopen won na {tijdshorizon} jaar in", f"{backtest['kans_kopen_wint'][-1] * 100:.0f} % van de startjaren")
+    col_bt_mediaan.metric("Mediaan verschil", f"€ {backtest['percentielen'][50][-1]:,.0f}")
+    col_bt_aantal.metric("Startjaren met volledige historiek", f"{backtest['aantal_startjaren'][-1]}")
+
+    st.markdown("#### Verschil in netto vermogen (koper - huurder) over de historische startjaren: P5 - P50 - P95")
+    if interactieve_grafieken:
+        st.line_chart(
+            {
+                "Jaar": backtest["jaren"],
+                "P5": backtest["percentielen"][5],
+                "P50": backtest["percentielen"][50],
+                "P95": backtest["percentielen"][95],
+            },
+            x="Jaar",
+            y=["P5", "P50", "P95"],
+            y_label="Verschil (€)",
+        )
+    else:
+        from grafieken import teken_waaier
+
+        st.image(
+            teken_waaier(
+                backtest["jaren"],
+                backtest["percentielen"][5],
+                backtest["percentielen"][50],
+                backtest["percentielen"][95],
+            ),
+            width="stretch",
+        )
+
+
+with profilering.meet("backtest"):
+    toon_backtest(scenario, tijdshorizon, interactieve_grafieken)
+
+st.markdown("---")
+st.subheader("Scenario's vergelijken")
+
+# Fragment: bewaren en verwijderen herberekent enkel deze sectie. De werkruimte staat kolomsgewijs
+# in de sessie; alle bewaarde scenario's samen zijn één oproep van de rekenkern.
+@st.fragment
+def toon_werkruimte(scenario, gemeente, provincie, gki, interactieve_grafieken):
+    from werkruimte import (
+        MAX_SCENARIOS, aantal_scenarios, bereken_werkruimte, bewaar_scenario, lege_werkruimte, verwijder_scenario,
+    )
+
+    werkruimte = st.session_state.setdefault("werkruimte", lege_werkruimte())
+    col_naam, col_bewaar = st.columns([3, 1], vertical_alignment="bottom")
+    naam = col_naam.text_input(
+        "Naam scenario",
+        value=f"€ {scenario['woningprijs'] / 1000:,.0f}k in {gemeente.title()} aan {scenario['rentevoet'] * 100:.2f} %, {scenario['tijdshorizon']} jaar",
+        max_chars=60,
+    )
+    if col_bewaar.button("Bewaar huidig scenario", disabled=not naam.strip()):
+        try:
+            werkruimte = st.session_state["werkruimte"] = bewaar_scenario(
+                werkruimte, naam.strip(), scenario, gemeente=gemeente, provincie=provincie, gki=gki
+            )
+        except ValueError as fout:
+            st.warning(f"{fout}. Verwijder eerst een scenario.")
+
+    if not aantal_scenarios(werkruimte):
+        st.caption(f"Bewaar tot {MAX_SCENARIOS} scenario's om hun evolutie naast elkaar te zien.")
+        return
+
+    def verwijder():
+        st.session_state["werkruimte"] = verwijder_scenario(st.session_state["werkruimte"], st.session_state["te_verwijderen"])
+
+    # Verwijderen in de callback, vóór de rerun: zo toont de sectie meteen de overblijvende scenario's
+    col_verwijder, col_knop = st.columns([3, 1], vertical_alignment="bottom")
+    col_verwijder.selectbox("Bewaard scenario", werkruimte["naam"].tolist(), key="te_verwijderen")
+    col_knop.button("Verwijder", on_click=verwijder)
+
+    resultaat = bereken_werkruimte(werkruimte)
+    namen = resultaat["naam"].tolist()
+
+    st.markdown("#### Verschil in netto vermogen (koper - huurder, reëel) per scenario")
+    if interactieve_grafieken:
+        st.line_chart(
+            {"Jaar": resultaat["jaren"], **dict(zip(namen, resultaat["verschil_reeel"]))},
+            x="Jaar",
+            y=namen,
+            y_label="Verschil (€)",
+        )
+    else:
+        from grafieken import teken_scenarios
+
+        st.image(teken_scenarios(resultaat["jaren"], tuple(namen), resultaat["verschil_reeel"]), width="stretch")
+
+    st.dataframe(
+        {
+            "Scenario": namen,
+            "Gemeente": [naam_gemeente.title() for naam_gemeente in werkruimte["gemeente"].tolist()],
+            "Onroerende voorheffing (€ / jaar)": werkruimte["onroerende_voorheffing"],
+            "Tijdshorizon": werkruimte["tijdshorizon"].astype(int),
+            "Maandlast (€)": resultaat["maandlast"],
+            "Kopen (€, reëel)": resultaat["eind_koper_netto_reeel"],
+            "Huren (€, reëel)": resultaat["eind_huurder_netto_reeel"],
+            "Verschil (€, reëel)": resultaat["eind_verschil_reeel"],
+        },
+        hide_index=True,
+        column_config={
+            kolom: st.column_config.NumberColumn(format="€ %.0f")
+            for kolom in (
+                "Onroerende voorheffing (€ / jaar)", "Maandlast (€)", "Kopen (€, reëel)", "Huren (€, reëel)", "Verschil (€, reëel)",
+            )
+        },
+    )
+    st.caption("Bewaarde scenario's rekenen zonder gebeurtenissen; de waarden staan bij de eigen tijdshorizon van elk scenario.")
+
+
+with profilering.meet("werkruimte"):
+    toon_werkruimte(scenario, gekozen_gemeente, gekozen_provincie, gki, interactieve_grafieken)
+
 st.markdown("---")
 st.header("Berekeningsmethode")
 
@@ -380,3 +937,54 @@ with col_h:
     st.markdown("**4. Netto vermogen huurder**")
     st.latex(r"V_{\text{huurder}} = B_{\text{huurder}}")
     st.latex(r"\text{Reële waarde} = \frac{V_{\text{huurder}}}{(1 + \pi)^T}")
+
+
+@st.fragment
+def toon_profilering(metingen):
+    fasen = list(dict.fromkeys(fase for meting in metingen for fase in meting["fasen"]))
+    tellers = list(dict.fromkeys(teller for meting in metingen for teller in meting["tellers"]))
+    st.dataframe(
+        {
+            "Tijdstip": [time.strftime("%H:%M:%S", time.localtime(meting["tijdstip"])) for meting in reversed(metingen)],
+            "Totaal (ms)": [meting["totaal"] * 1000 for meting in reversed(metingen)],
+            **{f"{fase} (ms)": [meting["fasen"].get(fase, 0.0) * 1000 for meting in reversed(metingen)] for fase in fasen},
+            **{teller: [meting["tellers"].get(teller, 0) for meting in reversed(metingen)] for teller in tellers},
+        },
+        hide_index=True,
+    )
+    st.caption("Fasen kunnen genest zijn: 'png' (savefig) valt binnen 'grafieken' en binnen de secties.")
+    vooruit = vooruitrekenaar.statistieken()
+    st.caption(
+        f"Vooruitrekenen: {vooruit['voltooid']} buren klaar, {vooruit['lopend']} bezig, {vooruit['geannuleerd']} geannuleerd; "
+        f"recent gewijzigd: {', '.join(vooruit['recent']) or '-'}."
+    )
+
+    col_export, col_profiel = st.columns(2)
+    col_export.download_button(
+        "Download als JSON lines", profilering.als_json_lines(metingen), "profilering.jsonl", "application/jsonl",
+    )
+    if col_profiel.button("Profileer de volgende rerun met cProfile"):
+        st.session_state["profiel_volgende_rerun"] = True
+        st.rerun(scope="app")
+
+    profiel = next((meting["profiel"] for meting in reversed(metingen) if meting["profiel"] is not None), None)
+    if profiel is not None:
+        st.code(profilering.profiel_als_tekst(profiel), language="text")
+        st.download_button(
+            "Download cProfile-dump (.prof, voor pstats of snakeviz)", profiel, "rerun.prof", "application/octet-stream",
+        )
+
+
+# Profileringspaneel: de laatste reruns van deze sessie, zonder het paneel zelf
+if profiel_aan:
+    meting = profilering.einde_rerun()
+    metingen = st.session_state.setdefault("profiel_metingen", deque(maxlen=profilering.DEFAULT_AANTAL_RERUNS))
+    metingen.append(meting)
+    st.markdown("---")
+    with st.expander(f"Profilering: laatste {len(metingen)} reruns", expanded=True):
+        toon_profilering(list(metingen))
+
+
+# Na de volledige rerun: de buren van de recent gewijzigde invoer op de achtergrond uitrekenen
+if vooruitrekenen.aan_via_omgeving():
+    vooruitrekenaar.plan(scenario)
@@ -0,0 +1,113 @@
+# backtest.py
+import csv
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from batch import bereken_vergelijking_paden
+from cache import gememoiseerd
+from montecarlo import PERCENTIELEN
+
+HISTORIEK = Path(__file__).resolve().parent / "data" / "historiek.csv"
+
+# Kolommen van het historiekbestand (percentages per jaar); Huurindexatie is optioneel en volgt anders de inflatie
+KOLOMMEN = {
+    "Rendement": "verwacht_rendement",
+    "Vastgoedgroei": "vastgoedgroei",
+    "Inflatie": "inflatie",
+    "Hypotheekrente": "rentevoet",
+}
+OPTIONELE_KOLOMMEN = {"Huurindexatie": "huurindexatie"}
+
+
+@lru_cache(maxsize=None)
+def laad_historiek(pad=HISTORIEK):
+    """
+    Lees jaarreeksen uit een CSV met "Jaar;Rendement;Vastgoedgroei;Inflatie;Hypotheekrente"
+    (en optioneel "Huurindexatie"), in procent met decimale komma's, zoals de opcentiemen-CSV's.
+
+    Geeft een dict met de jaren en per modelparameter een alleen-lezen array van fracties.
+    De jaren moeten aaneensluitend zijn; elke waarde moet ingevuld zijn.
+    """
+    pad = Path(pad)
+    with open(pad, encoding="utf-8-sig", newline="") as bestand:
+        lezer = csv.DictReader(bestand, delimiter=";")
+        velden = [veld.strip() for veld in lezer.fieldnames or []]
+        ontbrekend = [kolom for kolom in ["Jaar", *KOLOMMEN] if kolom not in velden]
+        if ontbrekend:
+            raise ValueError(f"{pad.name}: ontbrekende kolommen {', '.join(ontbrekend)}")
+        kolommen = {**KOLOMMEN, **{kolom: naam for kolom, naam in OPTIONELE_KOLOMMEN.items() if kolom in velden}}
+
+        jaren, reeksen = [], {naam: [] for naam in kolommen.values()}
+        for regel, rij in enumerate(lezer, start=2):
+            rij = {sleutel.strip(): waarde for sleutel, waarde in rij.items()}
+            try:
+                jaren.append(int(rij["Jaar"]))
+                for kolom, naam in kolommen.items():
+                    reeksen[naam].append(float(rij[kolom].strip().replace(",", ".")) / 100)
+            except (AttributeError, ValueError):
+                raise ValueError(f"{pad.name}:{regel}: ongeldige of lege waarde") from None
+
+    jaren = np.array(jaren)
+    if len(jaren) == 0:
+        raise ValueError(f"{pad.name}: geen gegevens")
+    if (np.diff(jaren) != 1).any():
+        raise ValueError(f"{pad.name}: de jaren moeten aaneensluitend en oplopend zijn")
+
+    historiek = {"jaren": jaren, **{naam: np.array(reeks) for naam, reeks in reeksen.items()}}
+    historiek.setdefault("huurindexatie", historiek["inflatie"])
+    for reeks in historiek.values():
+        reeks.flags.writeable = False
+    return historiek
+
+
+def _vensters(reeks, tijdshorizon):
+    # Eén venster per startjaar; vensters die voorbij het laatste jaar lopen, worden met NaN
+    # aangevuld, zodat ze enkel voor kortere horizonnen meetellen
+    aangevuld = np.concatenate((reeks, np.full(tijdshorizon - 1, np.nan)))
+    return sliding_window_view(aangevuld, tijdshorizon)
+
+
+@gememoiseerd
+def bereken_backtest(scenario, historiek, percentielen=PERCENTIELEN):
+    """
+    Evalueer `scenario` (de invoer van `batch.bereken_vergelijking_batch`) voor elk historisch
+    startjaar, met de werkelijke jaarlijkse rendementen, vastgoedgroei, inflatie en huurindexatie
+    vanaf dat jaar. De lening loopt aan de hypotheekrente van het startjaar.
+
+    Alle startjaren worden samen berekend: `sliding_window_view` maakt een (startjaren, jaren)-
+    matrix van de reeksen die als per-jaar-percentages door `bereken_vergelijking_paden` loopt.
+    Een startjaar telt voor horizon t mee als er t jaar historiek vanaf dat jaar is.
+
+    Geeft een dict met de startjaren, het reële verschil koper - huurder per startjaar en
+    horizon (NaN zonder voldoende historiek), en per horizon de percentielen, de kans dat
+    kopen wint en het aantal startjaren.
+    """
+    tijdshorizon = int(scenario["tijdshorizon"])
+    aantal_jaren = len(historiek["jaren"])
+    if not 1 <= tijdshorizon <= aantal_jaren:
+        raise ValueError(f"tijdshorizon moet tussen 1 en {aantal_jaren} jaar liggen (lengte van de historiek)")
+
+    with np.errstate(invalid="ignore"):
+        paden = bereken_vergelijking_paden(**{
+            **scenario,
+            "verwacht_rendement": _vensters(historiek["verwacht_rendement"], tijdshorizon),
+            "vastgoedgroei": _vensters(historiek["vastgoedgroei"], tijdshorizon),
+            "inflatie": _vensters(historiek["inflatie"], tijdshorizon),
+            "huurindexatie": _vensters(historiek["huurindexatie"], tijdshorizon),
+            "rentevoet": historiek["rentevoet"],
+        })
+        verschil = paden["verschil_reeel"]
+        geldig = ~np.isnan(verschil)
+        aantal = geldig.sum(axis=0)
+
+        return {
+            "startjaren": historiek["jaren"],
+            "jaren": np.arange(tijdshorizon + 1),
+            "verschil_reeel": verschil,
+            "percentielen": dict(zip(percentielen, np.nanpercentile(verschil, percentielen, axis=0))),
+            "kans_kopen_wint": np.where(geldig, verschil > 0, 0).sum(axis=0) / aantal,
+            "aantal_startjaren": aantal,
+        }
@@ -0,0 +1,557 @@
+# batch.py
+import math
+
+import numpy as np
+
+from amortization import bereken_aflossingstabel, bereken_maandlast, bereken_restschuld
+from constants import DEFAULT_INFLATIE, DEFAULT_RENDEMENT, DEFAULT_VASTGOEDGROEI, DEFAULT_MAANDINKOMEN, MAX_TIJDSHORIZON
+import kernels
+
+KOPEN_DTYPE = np.dtype([("totale_kost", "f8"), ("netto_vermogen", "f8"), ("maandlast", "f8")])
+HUUR_DTYPE = np.dtype([("totale_kost", "f8"), ("netto_vermogen", "f8")])
+VERGELIJKING_DTYPE = np.dtype([
+    ("koper_totale_kost", "f8"),
+    ("koper_netto_vermogen", "f8"),
+    ("maandlast", "f8"),
+    ("huurder_totale_kost", "f8"),
+    ("huurder_netto_vermogen", "f8"),
+    ("verschil_reeel", "f8"),
+])
+# Percentages die in `bereken_vergelijking_paden` en `bereken_kasstromen` per jaar mogen verschillen
+JAARPERCENTAGES = ("verwacht_rendement", "vastgoedgroei", "inflatie", "huurindexatie")
+
+
+def maak_rooster(**assen):
+    """
+    Zet 1-D parameterreeksen elk op een eigen as, zodat broadcasting elke combinatie oplevert.
+
+    Voorbeeld: `bereken_kopen_batch(**maak_rooster(woningprijs=prijzen, rentevoet=renten), ...)`
+    geeft een resultaat met vorm (len(prijzen), len(renten)).
+    """
+    aantal = len(assen)
+    rooster = {}
+    for as_index, (naam, waarden) in enumerate(assen.items()):
+        vorm = [1] * aantal
+        vorm[as_index] = -1
+        rooster[naam] = np.asarray(waarden).reshape(vorm)
+    return rooster
+
+
+def _vlak(*waarden):
+    # Korte binnenste assen maken NumPy traag: reken op aaneengesloten 1-D arrays
+    # (scalars blijven scalars) en geef het resultaat pas op het einde de rooster-vorm.
+    vorm = np.broadcast_shapes(*(np.shape(w) for w in waarden))
+    return vorm, [w if np.ndim(w) == 0 else np.broadcast_to(w, vorm).ravel() for w in waarden]
+
+
+def _horizon(tijdshorizon):
+    # Een geheel aantal jaren van 0 tot MAX_TIJDSHORIZON (NaN en oneindig vallen hier ook uit)
+    tijdshorizon = np.asarray(tijdshorizon)
+    if tijdshorizon.size and not (
+        np.all((tijdshorizon >= 0) & (tijdshorizon <= MAX_TIJDSHORIZON)) and np.all(tijdshorizon == np.round(tijdshorizon))
+    ):
+        raise ValueError(f"tijdshorizon moet een geheel aantal jaren van 0 tot {MAX_TIJDSHORIZON} zijn")
+    return tijdshorizon
+
+
+def _kopen_jaarlus(aantal, jaarinkomen, groei_inkomen, kost_tijdens_lening, kost_na_lening, looptijd_jaren, tijdshorizon, groei_belegging):
+    # NumPy-backend: loopt over de jaren, met gemaskeerde bewerkingen over alle scenario's
+    # tegelijk. Geeft (belegd overschot, totale kost); zie kernels.py voor de Numba-versie.
+    max_horizon = int(np.max(tijdshorizon, initial=0))
+    totaal_belegd_overschot = np.zeros(aantal)
+    totale_kost = np.zeros(aantal)
+    jaarinkomen = np.array(np.broadcast_to(jaarinkomen, aantal), dtype=float)
+    jaarlijkse_overschot = np.empty(aantal)
+
+    # Jaar 1 is het aankoopmoment: maandlasten en overschot starten in jaar 2
+    for jaar in range(2, max_horizon + 1):
+        np.multiply(jaarinkomen, groei_inkomen, out=jaarinkomen)
+        actief = tijdshorizon >= jaar
+
+        jaarlijkse_kost = np.where(looptijd_jaren >= jaar, kost_tijdens_lening, kost_na_lening)
+        np.subtract(jaarinkomen, jaarlijkse_kost, out=jaarlijkse_overschot)
+        np.maximum(jaarlijkse_overschot, 0, out=jaarlijkse_overschot)
+
+        np.multiply(totaal_belegd_overschot, groei_belegging, out=totaal_belegd_overschot, where=actief)
+        np.add(totaal_belegd_overschot, jaarlijkse_overschot, out=totaal_belegd_overschot, where=actief)
+        np.add(totale_kost, jaarlijkse_kost, out=totale_kost, where=actief)
+
+    return totaal_belegd_overschot, totale_kost
+
+
+def _huur_jaarlus(aantal, totaal_gespaard, jaarhuur, jaarinkomen, vaste_kost, jaarlijkse_maandlasten, tijdshorizon,
+                  groei_belegging, groei_huur, groei_inkomen):
+    # NumPy-backend van de jaarlus in `bereken_huur_batch`. Geeft (totaal gespaard, totale kost).
+    max_horizon = int(np.max(tijdshorizon, initial=0))
+    totaal_gespaard = np.array(np.broadcast_to(totaal_gespaard, aantal), dtype=float)
+    totale_kost = np.zeros(aantal)
+    jaarhuur = np.array(np.broadcast_to(jaarhuur, aantal), dtype=float)
+    jaarinkomen = np.array(np.broadcast_to(jaarinkomen, aantal), dtype=float)
+    jaarlijkse_kost = np.empty(aantal)
+    inleg = np.empty(aantal)
+    overschot = np.empty(aantal)
+
+    for jaar in range(max_horizon):
+        actief = tijdshorizon > jaar
+
+        np.add(jaarhuur, vaste_kost, out=jaarlijkse_kost)
+        np.subtract(jaarlijkse_maandlasten, jaarhuur, out=inleg)
+        np.maximum(inleg, 0, out=inleg)
+        np.subtract(jaarinkomen, jaarlijkse_kost, out=overschot)
+        np.maximum(overschot, 0, out=overschot)
+        inleg += overschot
+
+        np.add(totaal_gespaard, inleg, out=totaal_gespaard, where=actief)
+        np.multiply(totaal_gespaard, groei_belegging, out=totaal_gespaard, where=actief)
+        np.add(totale_kost, jaarlijkse_kost, out=totale_kost, where=actief)
+
+        np.multiply(jaarhuur, groei_huur, out=jaarhuur)
+        np.multiply(jaarinkomen, groei_inkomen, out=jaarinkomen)
+
+    return totaal_gespaard, totale_kost
+
+
+def bereken_kopen_batch(
+    woningprijs,
+    overige_kosten_pct,
+    eigen_inbreng_pct,
+    rentevoet,
+    looptijd_jaren,
+    onroerende_voorheffing,
+    onderhoud_pct,
+    verzekering_per_jaar,
+    tijdshorizon,
+    verwacht_rendement=DEFAULT_RENDEMENT,
+    vastgoedgroei=DEFAULT_VASTGOEDGROEI,
+    maandinkomen=DEFAULT_MAANDINKOMEN,
+    inflatie=DEFAULT_INFLATIE,
+    andere_kosten_per_maand=0
+):
+    """
+    Vectorized versie van `calculator.bereken_kopen`.
+
+    Elke parameter mag een NumPy-array zijn; alle parameters worden samen gebroadcast
+    en het resultaat is een structured array (KOPEN_DTYPE) met die vorm. De jaarlus
+    loopt over de jaren, niet over de scenario's: de `max(..., 0)` en de looptijd-
+    en horizontoetsen zijn gemaskeerde array-bewerkingen.
+    """
+    tijdshorizon = _horizon(tijdshorizon)
+    vorm, (
+        woningprijs, overige_kosten_pct, eigen_inbreng_pct, rentevoet, looptijd_jaren, onroerende_voorheffing,
+        onderhoud_pct, verzekering_per_jaar, tijdshorizon, verwacht_rendement, vastgoedgroei, maandinkomen,
+        inflatie, andere_kosten_per_maand,
+    ) = _vlak(
+        woningprijs, overige_kosten_pct, eigen_inbreng_pct, rentevoet, looptijd_jaren, onroerende_voorheffing,
+        onderhoud_pct, verzekering_per_jaar, tijdshorizon, verwacht_rendement, vastgoedgroei, maandinkomen,
+        inflatie, andere_kosten_per_maand,
+    )
+    aantal = math.prod(vorm)
+
+    eigen_inbreng = woningprijs * eigen_inbreng_pct
+    overige_kosten = woningprijs * overige_kosten_pct
+    lening = woningprijs - eigen_inbreng
+
+    maandlast = bereken_maandlast(lening, rentevoet, looptijd_jaren)
+    jaarlijkse_maandlasten = maandlast * 12
+    vaste_kost = woningprijs * onderhoud_pct + verzekering_per_jaar + onroerende_voorheffing + andere_kosten_per_maand * 12
+    groei_belegging = 1 + verwacht_rendement
+    groei_inkomen = 1 + inflatie
+
+    kost_tijdens_lening = np.broadcast_to(jaarlijkse_maandlasten + vaste_kost, aantal)
+    kost_na_lening = np.broadcast_to(vaste_kost, aantal)
+
+    jaarlus = kernels.kopen_jaarlus if kernels.actieve_backend() == "numba" else _kopen_jaarlus
+    totaal_belegd_overschot, totale_kost = jaarlus(
+        aantal, maandinkomen * 12.0, groei_inkomen, kost_tijdens_lening, kost_na_lening, looptijd_jaren, tijdshorizon, groei_belegging,
+    )
+    totale_kost += overige_kosten * (1 + groei_belegging ** tijdshorizon)
+
+    afbetaalde_jaren = np.minimum(tijdshorizon, looptijd_jaren) - 1
+    restschuld = bereken_restschuld(lening, rentevoet, looptijd_jaren, afbetaalde_jaren * 12)
+    netto_vermogen = woningprijs * (1 + vastgoedgroei) ** tijdshorizon - restschuld + totaal_belegd_overschot
+
+    start = tijdshorizon == 0
+    resultaat = np.empty(vorm, dtype=KOPEN_DTYPE)
+    resultaat["totale_kost"] = np.where(start, 0, totale_kost).reshape(vorm)
+    resultaat["netto_vermogen"] = np.where(start, eigen_inbreng + overige_kosten, netto_vermogen).reshape(vorm)
+    # De maandlast is een scalar als enkel invoer buiten de lening varieert
+    resultaat["maandlast"] = np.broadcast_to(np.where(start, 0, maandlast), aantal).reshape(vorm)
+    return resultaat
+
+
+def bereken_huur_batch(
+    maandhuur,
+    huurindexatie,
+    verzekering_per_jaar,
+    maandlast_koper,
+    tijdshorizon,
+    woningprijs,
+    eigen_inbreng_pct,
+    overige_kosten_pct,
+    verwacht_rendement=DEFAULT_RENDEMENT,
+    maandinkomen=DEFAULT_MAANDINKOMEN,
+    inflatie=DEFAULT_INFLATIE,
+    andere_kosten_per_maand=0
+):
+    """
+    Vectorized versie van `calculator.bereken_huur`, met dezelfde broadcasting als
+    `bereken_kopen_batch`. Geeft een structured array (HUUR_DTYPE).
+    """
+    tijdshorizon = _horizon(tijdshorizon)
+    vorm, (
+        maandhuur, huurindexatie, verzekering_per_jaar, maandlast_koper, tijdshorizon, woningprijs,
+        eigen_inbreng_pct, overige_kosten_pct, verwacht_rendement, maandinkomen, inflatie, andere_kosten_per_maand,
+    ) = _vlak(
+        maandhuur, huurindexatie, verzekering_per_jaar, maandlast_koper, tijdshorizon, woningprijs,
+        eigen_inbreng_pct, overige_kosten_pct, verwacht_rendement, maandinkomen, inflatie, andere_kosten_per_maand,
+    )
+    aantal = math.prod(vorm)
+
+    vaste_kost = verzekering_per_jaar + andere_kosten_per_maand * 12
+    jaarlijkse_maandlasten = maandlast_koper * 12
+    groei_belegging = 1 + verwacht_rendement
+    groei_huur = 1 + huurindexatie
+    groei_inkomen = 1 + inflatie
+
+    # Belegd bedrag start als eigen inbreng + aankoopkosten en groeit mee
+    jaarlus = kernels.huur_jaarlus if kernels.actieve_backend() == "numba" else _huur_jaarlus
+    totaal_gespaard, totale_kost = jaarlus(
+        aantal, woningprijs * (eigen_inbreng_pct + overige_kosten_pct), maandhuur * 12.0, maandinkomen * 12.0, vaste_kost,
+        jaarlijkse_maandlasten, tijdshorizon, groei_belegging, groei_huur, groei_inkomen,
+    )
+
+    resultaat = np.empty(vorm, dtype=HUUR_DTYPE)
+    resultaat["totale_kost"] = totale_kost.reshape(vorm)
+    resultaat["netto_vermogen"] = (totaal_gespaard - totale_kost).reshape(vorm)
+    return resultaat
+
+
+def bereken_vergelijking_batch(
+    woningprijs,
+    overige_kosten_pct,
+    eigen_inbreng_pct,
+    rentevoet,
+    looptijd_jaren,
+    onroerende_voorheffing,
+    onderhoud_pct,
+    verzekering_koper,
+    maandhuur,
+    huurindexatie,
+    verzekering_huurder,
+    tijdshorizon,
+    verwacht_rendement=DEFAULT_RENDEMENT,
+    vastgoedgroei=DEFAULT_VASTGOEDGROEI,
+    maandinkomen=DEFAULT_MAANDINKOMEN,
+    inflatie=DEFAULT_INFLATIE,
+    andere_kosten_koper=0,
+    andere_kosten_huurder=0
+):
+    """
+    Bereken koper en huurder samen voor een rooster van scenario's, zoals app.py dat
+    voor één scenario doet. Geeft een structured array (VERGELIJKING_DTYPE) met ook
+    het verschil koper - huurder in reële euro's van vandaag.
+    """
+    koper = bereken_kopen_batch(
+        woningprijs=woningprijs,
+        overige_kosten_pct=overige_kosten_pct,
+        eigen_inbreng_pct=eigen_inbreng_pct,
+        rentevoet=rentevoet,
+        looptijd_jaren=looptijd_jaren,
+        onroerende_voorheffing=onroerende_voorheffing,
+        onderhoud_pct=onderhoud_pct,
+        verzekering_per_jaar=verzekering_koper,
+        tijdshorizon=tijdshorizon,
+        verwacht_rendement=verwacht_rendement,
+        vastgoedgroei=vastgoedgroei,
+        maandinkomen=maandinkomen,
+        inflatie=inflatie,
+        andere_kosten_per_maand=andere_kosten_koper,
+    )
+    huurder = bereken_huur_batch(
+        maandhuur=maandhuur,
+        huurindexatie=huurindexatie,
+        verzekering_per_jaar=verzekering_huurder,
+        maandlast_koper=koper["maandlast"],
+        tijdshorizon=tijdshorizon,
+        woningprijs=woningprijs,
+        eigen_inbreng_pct=eigen_inbreng_pct,
+        overige_kosten_pct=overige_kosten_pct,
+        verwacht_rendement=verwacht_rendement,
+        maandinkomen=maandinkomen,
+        inflatie=inflatie,
+        andere_kosten_per_maand=andere_kosten_huurder,
+    )
+
+    vorm = np.broadcast_shapes(koper.shape, huurder.shape)
+    resultaat = np.empty(vorm, dtype=VERGELIJKING_DTYPE)
+    resultaat["koper_totale_kost"] = koper["totale_kost"]
+    resultaat["koper_netto_vermogen"] = koper["netto_vermogen"]
+    resultaat["maandlast"] = koper["maandlast"]
+    resultaat["huurder_totale_kost"] = huurder["totale_kost"]
+    resultaat["huurder_netto_vermogen"] = huurder["netto_vermogen"]
+    resultaat["verschil_reeel"] = (koper["netto_vermogen"] - huurder["netto_vermogen"]) / (1 + inflatie) ** tijdshorizon
+    return resultaat
+
+
+def _cumulatieve_groei(percentages):
+    # (..., T) jaarpercentages -> (..., T + 1) groeifactoren sinds jaar 0
+    groei = np.cumprod(1 + percentages, axis=-1)
+    return np.concatenate((np.ones(groei.shape[:-1] + (1,)), groei), axis=-1)
+
+
+def _jaarposten(
+    woningprijs,
+    overige_kosten_pct,
+    eigen_inbreng_pct,
+    rentevoet,
+    looptijd_jaren,
+    onroerende_voorheffing,
+    onderhoud_pct,
+    verzekering_koper,
+    maandhuur,
+    huurindexatie,
+    verzekering_huurder,
+    tijdshorizon,
+    verwacht_rendement,
+    vastgoedgroei,
+    maandinkomen,
+    inflatie,
+    andere_kosten_koper,
+    andere_kosten_huurder,
+):
+    # Gedeelde jaarposten van `bereken_vergelijking_paden` en `bereken_kasstromen`: de
+    # scenarioparameters met een jaaras van lengte 1, de groeifactoren (..., T + 1) en de
+    # reeksen van jaar 1..T (..., T)
+    tijdshorizon = int(_horizon(tijdshorizon))
+
+    def per_jaar(percentage):
+        percentage = np.asarray(percentage, dtype=float)
+        return np.broadcast_to(percentage, percentage.shape[:-1] + (tijdshorizon,)) if percentage.ndim else np.full(tijdshorizon, percentage)
+
+    def per_scenario(waarde):
+        return np.expand_dims(np.asarray(waarde, dtype=float), -1)
+
+    groei_belegging = _cumulatieve_groei(per_jaar(verwacht_rendement))
+    groei_woning = _cumulatieve_groei(per_jaar(vastgoedgroei))
+    prijsindex = _cumulatieve_groei(per_jaar(inflatie))
+    huurindex = _cumulatieve_groei(per_jaar(huurindexatie))
+
+    (
+        woningprijs, overige_kosten_pct, eigen_inbreng_pct, rentevoet, looptijd_jaren, onroerende_voorheffing,
+        onderhoud_pct, verzekering_koper, maandhuur, verzekering_huurder, maandinkomen,
+        andere_kosten_koper, andere_kosten_huurder,
+    ) = map(per_scenario, (
+        woningprijs, overige_kosten_pct, eigen_inbreng_pct, rentevoet, looptijd_jaren, onroerende_voorheffing,
+        onderhoud_pct, verzekering_koper, maandhuur, verzekering_huurder, maandinkomen,
+        andere_kosten_koper, andere_kosten_huurder,
+    ))
+
+    eigen_inbreng = woningprijs * eigen_inbreng_pct
+    overige_kosten = woningprijs * overige_kosten_pct
+    lening = woningprijs - eigen_inbreng
+    maandlast = bereken_maandlast(lening, rentevoet, looptijd_jaren)
+
+    # Inkomen en huur in jaar 0..T-1; koperjaar j (1..T) hoort bij index j - 1
+    jaarinkomen = maandinkomen * 12 * prijsindex[..., :-1]
+    jaarhuur = maandhuur * 12 * huurindex[..., :-1]
+    jaren = np.arange(1, tijdshorizon + 1)
+
+    # Koper: jaar 1 is het aankoopmoment, daarna maandlasten en vaste kosten
+    vaste_kost_koper = woningprijs * onderhoud_pct + verzekering_koper + onroerende_voorheffing + andere_kosten_koper * 12
+    koper_kost = np.where(jaren <= looptijd_jaren, maandlast * 12, 0) + vaste_kost_koper
+    koper_kost = np.where(jaren == 1, 0, koper_kost)
+    koper_overschot = np.where(jaren == 1, 0, np.maximum(jaarinkomen - koper_kost, 0))
+    koper_belegd = groei_belegging[..., 1:] * np.cumsum(koper_overschot / groei_belegging[..., 1:], axis=-1)
+    koper_totale_kost = overige_kosten * (1 + groei_belegging[..., 1:]) + np.cumsum(koper_kost, axis=-1)
+    restschuld = bereken_restschuld(lening, rentevoet, looptijd_jaren, (np.minimum(jaren, looptijd_jaren) - 1) * 12)
+    woningwaarde = woningprijs * groei_woning[..., 1:]
+    koper_netto = woningwaarde - restschuld + koper_belegd
+
+    # Huurder: inleg in jaar j groeit tot horizon t met het rendement van de jaren j+1..t
+    huurder_kost = jaarhuur + verzekering_huurder + andere_kosten_huurder * 12
+    inleg = np.maximum(maandlast * 12 - jaarhuur, 0) + np.maximum(jaarinkomen - huurder_kost, 0)
+    initieel_belegd = woningprijs * (eigen_inbreng_pct + overige_kosten_pct)
+    huurder_gespaard = groei_belegging[..., 1:] * (initieel_belegd + np.cumsum(inleg / groei_belegging[..., :-1], axis=-1))
+    huurder_totale_kost = np.cumsum(huurder_kost, axis=-1)
+    huurder_netto = huurder_gespaard - huurder_totale_kost
+
+    return {
+        "jaren": jaren,
+        "woningprijs": woningprijs,
+        "rentevoet": rentevoet,
+        "looptijd_jaren": looptijd_jaren,
+        "onroerende_voorheffing": onroerende_voorheffing,
+        "onderhoud_pct": onderhoud_pct,
+        "verzekering_koper": verzekering_koper,
+        "verzekering_huurder": verzekering_huurder,
+        "andere_kosten_koper": andere_kosten_koper,
+        "andere_kosten_huurder": andere_kosten_huurder,
+        "prijsindex": prijsindex,
+        "eigen_inbreng": eigen_inbreng,
+        "overige_kosten": overige_kosten,
+        "lening": lening,
+        "maandlast": maandlast,
+        "jaarhuur": jaarhuur,
+        "koper_overschot": koper_overschot,
+        "koper_belegd": koper_belegd,
+        "koper_totale_kost": koper_totale_kost,
+        "restschuld": restschuld,
+        "woningwaarde": woningwaarde,
+        "koper_netto": koper_netto,
+        "inleg": inleg,
+        "initieel_belegd": initieel_belegd,
+        "huurder_gespaard": huurder_gespaard,
+        "huurder_totale_kost": huurder_totale_kost,
+        "huurder_netto": huurder_netto,
+    }
+
+
+def _met_start(startwaarde, reeks):
+    # Zet de waarde bij horizon 0 vooraan de reeks van horizon 1..T
+    return np.concatenate((np.broadcast_to(startwaarde, reeks.shape[:-1] + (1,)), reeks), axis=-1)
+
+
+def bereken_vergelijking_paden(
+    woningprijs,
+    overige_kosten_pct,
+    eigen_inbreng_pct,
+    rentevoet,
+    looptijd_jaren,
+    onroerende_voorheffing,
+    onderhoud_pct,
+    verzekering_koper,
+    maandhuur,
+    huurindexatie,
+    verzekering_huurder,
+    tijdshorizon,
+    verwacht_rendement=DEFAULT_RENDEMENT,
+    vastgoedgroei=DEFAULT_VASTGOEDGROEI,
+    maandinkomen=DEFAULT_MAANDINKOMEN,
+    inflatie=DEFAULT_INFLATIE,
+    andere_kosten_koper=0,
+    andere_kosten_huurder=0
+):
+    """
+    Bereken koper en huurder voor elk jaar 0..tijdshorizon met percentages die per jaar verschillen.
+
+    `verwacht_rendement`, `vastgoedgroei`, `inflatie` en `huurindexatie` zijn scalars of reeksen
+    met vorm (..., tijdshorizon), bv. (paden, jaren) in een Monte Carlo-simulatie. De andere
+    parameters broadcasten over de voorste assen. Geeft een dict met arrays van vorm
+    (..., tijdshorizon + 1); bij constante percentages is dat `calculator.bereken_kopen_traject`
+    en `bereken_huur_traject` voor alle paden tegelijk.
+    """
+    posten = _jaarposten(
+        woningprijs, overige_kosten_pct, eigen_inbreng_pct, rentevoet, looptijd_jaren, onroerende_voorheffing,
+        onderhoud_pct, verzekering_koper, maandhuur, huurindexatie, verzekering_huurder, tijdshorizon,
+        verwacht_rendement, vastgoedgroei, maandinkomen, inflatie, andere_kosten_koper, andere_kosten_huurder,
+    )
+    koper_netto = _met_start(posten["eigen_inbreng"] + posten["overige_kosten"], posten["koper_netto"])
+    huurder_netto = _met_start(posten["initieel_belegd"], posten["huurder_netto"])
+
+    return {
+        "koper_totale_kost": _met_start(np.zeros(1), posten["koper_totale_kost"]),
+        "koper_netto_vermogen": koper_netto,
+        "restschuld": _met_start(posten["lening"], posten["restschuld"]),
+        "maandlast": posten["maandlast"][..., 0],
+        "huurder_totale_kost": _met_start(np.zeros(1), posten["huurder_totale_kost"]),
+        "huurder_netto_vermogen": huurder_netto,
+        "verschil_reeel": (koper_netto - huurder_netto) / posten["prijsindex"],
+    }
+
+
+def bereken_kasstromen(
+    woningprijs,
+    overige_kosten_pct,
+    eigen_inbreng_pct,
+    rentevoet,
+    looptijd_jaren,
+    onroerende_voorheffing,
+    onderhoud_pct,
+    verzekering_koper,
+    maandhuur,
+    huurindexatie,
+    verzekering_huurder,
+    tijdshorizon,
+    verwacht_rendement=DEFAULT_RENDEMENT,
+    vastgoedgroei=DEFAULT_VASTGOEDGROEI,
+    maandinkomen=DEFAULT_MAANDINKOMEN,
+    inflatie=DEFAULT_INFLATIE,
+    andere_kosten_koper=0,
+    andere_kosten_huurder=0
+):
+    """
+    Het kasstroomoverzicht achter `bereken_vergelijking_paden`: per jaar 0..tijdshorizon de
+    uitgaven van koper en huurder, de opsplitsing van de afbetaling in rente en kapitaal, de
+    stortingen en het rendement van de beleggingen, en de standen (woningwaarde, restschuld,
+    belegd, netto vermogen nominaal en reëel). Geeft een dict met arrays van vorm
+    (..., tijdshorizon + 1), in de volgorde van een kasstroomtabel.
+
+    Uitgaven en stortingen gelden voor het jaar dat eindigt bij de index; jaar 0 bevat enkel de
+    beginstand (het netto vermogen is dan het startkapitaal van beide).
+    """
+    posten = _jaarposten(
+        woningprijs, overige_kosten_pct, eigen_inbreng_pct, rentevoet, looptijd_jaren, onroerende_voorheffing,
+        onderhoud_pct, verzekering_koper, maandhuur, huurindexatie, verzekering_huurder, tijdshorizon,
+        verwacht_rendement, vastgoedgroei, maandinkomen, inflatie, andere_kosten_koper, andere_kosten_huurder,
+    )
+    jaren = posten["jaren"]
+
+    def jaarlijks(bedrag, vanaf=1):
+        # Een vast bedrag per jaar vanaf jaar `vanaf`, met 0 bij jaar 0
+        return _met_start(np.zeros(1), np.where(jaren >= vanaf, bedrag, 0.0))
+
+    # Rente en kapitaal uit het aflossingsschema: jaar t (2..looptijd) betaalt leningjaar t - 1,
+    # want jaar 1 is het aankoopjaar
+    afbetaald = (jaren >= 2) & (jaren <= posten["looptijd_jaren"])
+    tabel = bereken_aflossingstabel(posten["lening"][..., 0], posten["rentevoet"][..., 0], posten["looptijd_jaren"][..., 0])
+
+    def uit_tabel(leningjaren):
+        leningjaar = np.clip(jaren - 2, 0, leningjaren.shape[-1] - 1)
+        return _met_start(np.zeros(1), np.where(afbetaald, np.take(leningjaren, leningjaar, axis=-1), 0.0))
+
+    restschuld = _met_start(posten["lening"], posten["restschuld"])
+    koper_afbetaling = jaarlijks(np.where(afbetaald, posten["maandlast"] * 12, 0))
+    koper_rente = uit_tabel(tabel["rente_per_jaar"])
+    koper_aflossing = uit_tabel(tabel["aflossing_per_jaar"])
+    koper_overschot = _met_start(np.zeros(1), posten["koper_overschot"])
+    koper_belegd = _met_start(np.zeros(1), posten["koper_belegd"])
+    huurder_inleg = _met_start(np.zeros(1), posten["inleg"])
+    huurder_belegd = _met_start(posten["initieel_belegd"], posten["huurder_gespaard"])
+    koper_netto = _met_start(posten["eigen_inbreng"] + posten["overige_kosten"], posten["koper_netto"])
+    huurder_netto = _met_start(posten["initieel_belegd"], posten["huurder_netto"])
+    prijsindex = posten["prijsindex"]
+
+    def rendement(belegd, stortingen):
+        return _met_start(np.zeros(1), np.diff(belegd, axis=-1) - stortingen[..., 1:])
+
+    kasstromen = {
+        "woningwaarde": _met_start(posten["woningprijs"], posten["woningwaarde"]),
+        "aankoopkosten": jaarlijks(posten["overige_kosten"] * (jaren == 1)),
+        "koper_afbetaling": koper_afbetaling,
+        "koper_rente": koper_rente,
+        "koper_aflossing": koper_aflossing,
+        "restschuld": restschuld,
+        "onderhoud": jaarlijks(posten["woningprijs"] * posten["onderhoud_pct"], vanaf=2),
+        "onroerende_voorheffing": jaarlijks(posten["onroerende_voorheffing"], vanaf=2),
+        "verzekering_koper": jaarlijks(posten["verzekering_koper"], vanaf=2),
+        "andere_kosten_koper": jaarlijks(posten["andere_kosten_koper"] * 12, vanaf=2),
+        "koper_overschot": koper_overschot,
+        "koper_rendement": rendement(koper_belegd, koper_overschot),
+        "koper_belegd": koper_belegd,
+        "koper_totale_kost": _met_start(np.zeros(1), posten["koper_totale_kost"]),
+        "koper_netto_vermogen": koper_netto,
+        "koper_netto_reeel": koper_netto / prijsindex,
+        "huur": _met_start(np.zeros(1), posten["jaarhuur"]),
+        "verzekering_huurder": jaarlijks(posten["verzekering_huurder"]),
+        "andere_kosten_huurder": jaarlijks(posten["andere_kosten_huurder"] * 12),
+        "huurder_inleg": huurder_inleg,
+        "huurder_rendement": rendement(huurder_belegd, huurder_inleg),
+        "huurder_belegd": huurder_belegd,
+        "huurder_totale_kost": _met_start(np.zeros(1), posten["huurder_totale_kost"]),
+        "huurder_netto_vermogen": huurder_netto,
+        "huurder_netto_reeel": huurder_netto / prijsindex,
+        "verschil_reeel": (koper_netto - huurder_netto) / prijsindex,
+    }
+    # Koper- en huurderposten kunnen over andere scenarioassen variëren: allemaal dezelfde vorm
+    vorm = np.broadcast_shapes(*(reeks.shape for reeks in kasstromen.values()))
+    return {veld: np.broadcast_to(reeks, vorm) for veld, reeks in kasstromen.items()}
@@ -0,0 +1,81 @@
+# benchmarks/backends.py
+"""
+Vergelijk de NumPy- en Numba-backend van de batch-jaarlussen (kernels.py) op willekeurige scenario's:
+controleer dat de resultaten bitgelijk zijn en meet de tijd per backend.
+
+    python benchmarks/backends.py --scenarios 100000 --horizon 30
+"""
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import kernels  # noqa: E402
+from batch import bereken_vergelijking_batch  # noqa: E402
+
+
+def willekeurige_scenarios(aantal, horizon, seed=0):
+    """Scenario's met willekeurige invoer rond de standaardwaarden en horizonnen tot `horizon`."""
+    rng = np.random.default_rng(seed)
+    return dict(
+        woningprijs=rng.uniform(150_000, 800_000, aantal),
+        overige_kosten_pct=rng.uniform(0.02, 0.15, aantal),
+        eigen_inbreng_pct=rng.uniform(0.0, 0.5, aantal),
+        rentevoet=rng.uniform(0.0, 0.07, aantal),
+        looptijd_jaren=rng.integers(1, 41, aantal),
+        onroerende_voorheffing=rng.uniform(500, 3_000, aantal),
+        onderhoud_pct=rng.uniform(0.0, 0.03, aantal),
+        verzekering_koper=rng.uniform(0, 1_000, aantal),
+        maandhuur=rng.uniform(500, 2_500, aantal),
+        huurindexatie=rng.uniform(0.0, 0.04, aantal),
+        verzekering_huurder=rng.uniform(0, 500, aantal),
+        tijdshorizon=rng.integers(0, horizon + 1, aantal),
+        verwacht_rendement=rng.uniform(-0.02, 0.12, aantal),
+        vastgoedgroei=rng.uniform(-0.02, 0.08, aantal),
+        maandinkomen=rng.uniform(1_500, 10_000, aantal),
+        inflatie=rng.uniform(0.0, 0.05, aantal),
+    )
+
+
+def meet(backend, scenarios, herhalingen):
+    """Resultaat en mediane tijd (s) van `bereken_vergelijking_batch` met `backend`."""
+    vorige = kernels.kies_backend(backend)
+    try:
+        resultaat = bereken_vergelijking_batch(**scenarios)  # ook de eerste (JIT-)compilatie
+        timer = timeit.Timer(lambda: bereken_vergelijking_batch(**scenarios))
+        aantal, _ = timer.autorange()
+        tijden = [tijd / aantal for tijd in timer.repeat(herhalingen, aantal)]
+        return resultaat, float(np.median(tijden))
+    finally:
+        kernels.kies_backend(vorige)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", type=int, default=100_000)
+    parser.add_argument("--horizon", type=int, default=30, help="maximale tijdshorizon")
+    parser.add_argument("--herhalingen", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if not kernels.numba_beschikbaar():
+        print("Numba is niet geïnstalleerd (pip install numba); enkel de NumPy-backend is beschikbaar.")
+        return 1
+
+    scenarios = willekeurige_scenarios(args.scenarios, args.horizon)
+    referentie, tijd_numpy = meet("numpy", scenarios, args.herhalingen)
+    resultaat, tijd_numba = meet("numba", scenarios, args.herhalingen)
+
+    afwijkend = [veld for veld in referentie.dtype.names if not np.array_equal(referentie[veld], resultaat[veld], equal_nan=True)]
+    print(f"{args.scenarios:,} scenario's, horizon tot {args.horizon} jaar")
+    print(f"  numpy  {tijd_numpy * 1000:10.2f} ms")
+    print(f"  numba  {tijd_numba * 1000:10.2f} ms   x{tijd_numpy / tijd_numba:.1f}")
+    print("  resultaten bitgelijk" if not afwijkend else f"  AFWIJKEND: {', '.join(afwijkend)}")
+    return 1 if afwijkend else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
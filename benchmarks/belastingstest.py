@@ -0,0 +1,128 @@
+# benchmarks/belastingstest.py
+"""
+Belastingstest voor service.py: een aantal gelijktijdige clients sturen elk over één
+keep-alive-verbinding scenario's naar POST /bereken. Rapporteert p50/p99-latentie en verzoeken/s.
+
+    python service.py &
+    python benchmarks/belastingstest.py --clients 64 --duur 10
+    python benchmarks/belastingstest.py --start-dienst    # start zelf een dienst in dit proces
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+SCENARIO = dict(
+    woningprijs=400_000,
+    overige_kosten_pct=0.12,
+    eigen_inbreng_pct=0.20,
+    rentevoet=0.03,
+    looptijd_jaren=25,
+    onderhoud_pct=0.01,
+    verzekering_koper=400,
+    maandhuur=1200,
+    huurindexatie=0.02,
+    verzekering_huurder=200,
+    tijdshorizon=20,
+    gemeente="GENT",
+    provincie="Oost-Vlaanderen",
+    gki=1500,
+)
+
+
+def _verzoek(host, scenario):
+    lichaam = json.dumps(scenario).encode()
+    return (
+        f"POST /bereken HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(lichaam)}\r\n\r\n"
+    ).encode("latin-1") + lichaam
+
+
+async def _lees_antwoord(lezer):
+    status = int((await lezer.readline()).split()[1])
+    lengte = 0
+    while (regel := await lezer.readline()) not in (b"\r\n", b""):
+        naam, _, waarde = regel.decode("latin-1").partition(":")
+        if naam.lower() == "content-length":
+            lengte = int(waarde)
+    await lezer.readexactly(lengte)
+    return status
+
+
+async def client(host, poort, einde, latenties, fouten):
+    lezer, schrijver = await asyncio.open_connection(host, poort)
+    willekeurig = random.Random()
+    try:
+        while time.perf_counter() < einde:
+            # Licht variërende scenario's, zodat geen enkele cache het resultaat kan leveren
+            scenario = {**SCENARIO, "woningprijs": willekeurig.uniform(250_000, 600_000)}
+            start = time.perf_counter()
+            schrijver.write(_verzoek(host, scenario))
+            await schrijver.drain()
+            status = await _lees_antwoord(lezer)
+            latenties.append(time.perf_counter() - start)
+            if status != 200:
+                fouten.append(status)
+    finally:
+        schrijver.close()
+
+
+async def belast(host, poort, clients, duur):
+    latenties, fouten = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, poort, start + duur, latenties, fouten) for _ in range(clients)))
+    verstreken = time.perf_counter() - start
+
+    kwantielen = statistics.quantiles(latenties, n=100)
+    return {
+        "verzoeken": len(latenties),
+        "fouten": len(fouten),
+        "verzoeken_per_s": len(latenties) / verstreken,
+        "p50_ms": kwantielen[49] * 1000,
+        "p99_ms": kwantielen[98] * 1000,
+    }
+
+
+async def _main(args):
+    server = bundelaar = None
+    if args.start_dienst:
+        import service
+
+        bundelaar = service.Bundelaar(args.venster_ms)
+        server = await service.start(args.host, args.poort, bundelaar)
+    try:
+        resultaat = await belast(args.host, args.poort, args.clients, args.duur)
+    finally:
+        if server is not None:
+            server.close()
+
+    print(
+        f"{resultaat['verzoeken']:,} verzoeken ({resultaat['fouten']} fouten), "
+        f"{resultaat['verzoeken_per_s']:,.0f} verzoeken/s, "
+        f"p50 {resultaat['p50_ms']:.2f} ms, p99 {resultaat['p99_ms']:.2f} ms"
+    )
+    if bundelaar is not None:
+        print(f"{bundelaar.scenarios:,} scenario's in {bundelaar.bundels:,} bundels ({bundelaar.scenarios / max(bundelaar.bundels, 1):.1f} per bundel)")
+    return 1 if resultaat["fouten"] else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--poort", type=int, default=8765)
+    parser.add_argument("--clients", type=int, default=64, help="aantal gelijktijdige keep-alive-verbindingen")
+    parser.add_argument("--duur", type=float, default=10.0, help="duur van de test in seconden")
+    parser.add_argument("--start-dienst", action="store_true", help="start de dienst in hetzelfde proces")
+    parser.add_argument("--venster-ms", type=float, default=2.0, help="bundelvenster van de gestarte dienst")
+    args = parser.parse_args(argv)
+    return asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,259 @@
+# benchmarks/regressie.py
+"""
+Benchmark- en regressiesuite voor de rekenkern en het rerun-pad van de app.
+
+Meet `bereken_kopen` en `bereken_huur` (horizon 1/20/50, looptijd 1/25/40, zonder cache),
+de evolutie per jaar zoals app.py die toont, het opzoeken van opcentiemen en een
+headless rerun van app.py via AppTest, en controleert de golden values.
+
+    python benchmarks/regressie.py                    # meten, vergelijken en golden values controleren
+    python benchmarks/regressie.py --bijwerken        # huidige metingen als nieuwe baseline bewaren
+    python benchmarks/regressie.py --golden-bijwerken # golden values opnieuw vastleggen
+
+De toegestane vertraging is `--drempel` (standaard 1.5, of HURENOFKOPEN_BENCH_DREMPEL).
+Geeft exitcode 1 bij een overschreden drempel of een afwijkende golden value.
+"""
+import argparse
+import json
+import math
+import os
+import statistics
+import subprocess
+import sys
+import timeit
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO))
+
+import calculator  # noqa: E402
+import opcentiemen  # noqa: E402
+
+BASELINE = Path(__file__).resolve().parent / "regressie_baseline.json"
+GOLDEN = Path(__file__).resolve().parent / "golden.json"
+
+HORIZONNEN = (1, 20, 50)
+LOOPTIJDEN = (1, 25, 40)
+GOLDEN_HORIZONNEN = (0, 1, 2, 20, 50)
+GOLDEN_RENTEVOETEN = (0.0, 0.03)
+RELATIEVE_TOLERANTIE = 1e-9
+
+KOPEN = dict(
+    woningprijs=300_000,
+    overige_kosten_pct=0.07,
+    eigen_inbreng_pct=0.20,
+    rentevoet=0.03,
+    looptijd_jaren=25,
+    onroerende_voorheffing=1000,
+    onderhoud_pct=0.01,
+    verzekering_per_jaar=400,
+    tijdshorizon=20,
+    verwacht_rendement=0.04,
+    vastgoedgroei=0.02,
+    maandinkomen=3000,
+    inflatie=0.02,
+    andere_kosten_per_maand=50,
+)
+HUUR = dict(
+    maandhuur=1000,
+    huurindexatie=0.02,
+    verzekering_per_jaar=200,
+    tijdshorizon=20,
+    woningprijs=300_000,
+    eigen_inbreng_pct=0.20,
+    overige_kosten_pct=0.07,
+    verwacht_rendement=0.04,
+    maandinkomen=3000,
+    inflatie=0.02,
+    andere_kosten_per_maand=25,
+)
+
+APP_RERUN = """
+import json, statistics, time
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file({app!r}, default_timeout=120)
+app.run()
+tijden = []
+for _ in range({herhalingen}):
+    start = time.perf_counter()
+    app.run()
+    tijden.append(time.perf_counter() - start)
+if app.exception:
+    raise SystemExit(str(app.exception))
+print(json.dumps({{"app_rerun_ms": statistics.median(tijden) * 1000}}))
+"""
+
+
+def _ongecachet(functie):
+    # De benchmarks meten het rekenwerk, niet de resultatencache
+    return getattr(functie, "__wrapped__", functie)
+
+
+def _evolutie_per_jaar(tijdshorizon):
+    # De evolutielus zoals app.py die oorspronkelijk draaide: één volledige berekening per jaar
+    kopen, huur = _ongecachet(calculator.bereken_kopen), _ongecachet(calculator.bereken_huur)
+    kopers_netto, huurders_netto = [], []
+    for jaar in range(tijdshorizon):
+        koper = kopen(**{**KOPEN, "tijdshorizon": jaar})
+        huurder = huur(**{**HUUR, "tijdshorizon": jaar, "maandlast_koper": koper["maandlast"]})
+        kopers_netto.append(koper["netto_vermogen"])
+        huurders_netto.append(huurder["netto_vermogen"])
+    return kopers_netto, huurders_netto
+
+
+def _evolutie_traject(tijdshorizon):
+    # De evolutie zoals app.py ze nu berekent: alle horizonnen in één doorloop
+    koper = _ongecachet(calculator.bereken_kopen_traject)(**{**KOPEN, "tijdshorizon": tijdshorizon})
+    huurder = _ongecachet(calculator.bereken_huur_traject)(
+        **{**HUUR, "tijdshorizon": tijdshorizon, "maandlast_koper": koper["maandlast"]}
+    )
+    return koper["netto_vermogen"][:tijdshorizon], huurder["netto_vermogen"][:tijdshorizon]
+
+
+def _opcentiemen_opzoeken():
+    gemeenten, provincies = opcentiemen.laad_opcentiemen()
+    provincie = next(iter(provincies))
+    for gemeente in gemeenten:
+        opcentiemen.bereken_onroerende_voorheffing(1500, gemeente, provincie)
+
+
+def gevallen():
+    """Naam en functie zonder argumenten van elke micro-benchmark."""
+    kopen, huur = _ongecachet(calculator.bereken_kopen), _ongecachet(calculator.bereken_huur)
+    maandlast = kopen(**KOPEN)["maandlast"]
+
+    resultaat = {}
+    for horizon in HORIZONNEN:
+        for looptijd in LOOPTIJDEN:
+            invoer = {**KOPEN, "tijdshorizon": horizon, "looptijd_jaren": looptijd}
+            resultaat[f"kopen_h{horizon}_l{looptijd}_us"] = lambda invoer=invoer: kopen(**invoer)
+        invoer = {**HUUR, "tijdshorizon": horizon, "maandlast_koper": maandlast}
+        resultaat[f"huur_h{horizon}_us"] = lambda invoer=invoer: huur(**invoer)
+    for horizon in (20, 50):
+        resultaat[f"evolutie_per_jaar_h{horizon}_us"] = lambda horizon=horizon: _evolutie_per_jaar(horizon)
+        resultaat[f"evolutie_traject_h{horizon}_us"] = lambda horizon=horizon: _evolutie_traject(horizon)
+    resultaat["opcentiemen_alle_gemeenten_us"] = _opcentiemen_opzoeken
+    return resultaat
+
+
+def meet_functie(functie, herhalingen):
+    """Mediaan over `herhalingen` van de duur van één oproep in µs."""
+    timer = timeit.Timer(functie)
+    aantal, _ = timer.autorange()
+    return statistics.median(timer.repeat(repeat=herhalingen, number=aantal)) / aantal * 1e6
+
+
+def meet_app_rerun(herhalingen):
+    """Mediaan van de duur van een rerun van app.py (na een eerste run) in een vers proces, in ms."""
+    proces = subprocess.run(
+        [sys.executable, "-c", APP_RERUN.format(app=str(REPO / "app.py"), herhalingen=herhalingen)],
+        cwd=REPO, capture_output=True, text=True, check=True,
+    )
+    return json.loads(proces.stdout.strip().splitlines()[-1])["app_rerun_ms"]
+
+
+def meet(herhalingen, met_app=True):
+    resultaten = {naam: meet_functie(functie, herhalingen) for naam, functie in gevallen().items()}
+    if met_app:
+        resultaten["app_rerun_ms"] = meet_app_rerun(herhalingen)
+    return resultaten
+
+
+def vergelijk(resultaten, baseline, drempel):
+    overschreden = []
+    for naam, waarde in resultaten.items():
+        grens = baseline.get(naam)
+        eenheid = naam.rsplit("_", 1)[-1]
+        status = ""
+        if grens is not None:
+            factor = waarde / grens
+            status = f"  x{factor:.2f}"
+            if factor > drempel:
+                overschreden.append(naam)
+                status += f"  > drempel x{drempel}"
+        print(f"{naam:<36} {waarde:10.1f} {eenheid}{status}")
+    return overschreden
+
+
+def golden_gevallen():
+    """Invoer van elk golden-geval: (functie, invoer), met de maandlast uit het bijhorende koopscenario."""
+    for rentevoet in GOLDEN_RENTEVOETEN:
+        for looptijd in LOOPTIJDEN:
+            for horizon in GOLDEN_HORIZONNEN:
+                kopen = {**KOPEN, "rentevoet": rentevoet, "looptijd_jaren": looptijd, "tijdshorizon": horizon}
+                maandlast = calculator.bereken_kopen(**{**kopen, "tijdshorizon": 1})["maandlast"]
+                yield "bereken_kopen", kopen
+                yield "bereken_huur", {**HUUR, "tijdshorizon": horizon, "maandlast_koper": maandlast}
+
+
+def bereken_golden():
+    gevallen = []
+    for functie, invoer in golden_gevallen():
+        uitvoer = getattr(calculator, functie)(**invoer)
+        gevallen.append({"functie": functie, "invoer": invoer, "uitvoer": {k: float(v) for k, v in uitvoer.items()}})
+    kopers_netto, huurders_netto = _evolutie_per_jaar(50)
+    evolutie = {
+        "kopen": KOPEN,
+        "huur": HUUR,
+        "kopers_netto": [float(w) for w in kopers_netto],
+        "huurders_netto": [float(w) for w in huurders_netto],
+    }
+    return {"gevallen": gevallen, "evolutie": evolutie}
+
+
+def controleer_golden(golden):
+    """Vergelijk de huidige uitkomsten met de golden values. Geeft een lijst van afwijkingen."""
+    afwijkingen = []
+    for geval in golden["gevallen"]:
+        uitvoer = getattr(calculator, geval["functie"])(**geval["invoer"])
+        for sleutel, verwacht in geval["uitvoer"].items():
+            if not math.isclose(uitvoer[sleutel], verwacht, rel_tol=RELATIEVE_TOLERANTIE, abs_tol=1e-6):
+                afwijkingen.append(
+                    f"{geval['functie']}(horizon={geval['invoer']['tijdshorizon']}): {sleutel} {uitvoer[sleutel]!r} != {verwacht!r}"
+                )
+
+    evolutie = golden["evolutie"]
+    for naam, reeks in zip(("kopers_netto", "huurders_netto"), _evolutie_traject(len(evolutie["kopers_netto"]))):
+        for jaar, (waarde, verwacht) in enumerate(zip(reeks, evolutie[naam])):
+            if not math.isclose(waarde, verwacht, rel_tol=RELATIEVE_TOLERANTIE, abs_tol=1e-6):
+                afwijkingen.append(f"evolutie {naam}[{jaar}]: {waarde!r} != {verwacht!r}")
+    return afwijkingen
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--herhalingen", type=int, default=5, help="aantal metingen per benchmark (mediaan)")
+    parser.add_argument(
+        "--drempel",
+        type=float,
+        default=float(os.environ.get("HURENOFKOPEN_BENCH_DREMPEL", 1.5)),
+        help="toegestane vertragingsfactor t.o.v. de baseline",
+    )
+    parser.add_argument("--zonder-app", action="store_true", help="sla de AppTest-rerun over")
+    parser.add_argument("--bijwerken", action="store_true", help="bewaar de metingen als nieuwe baseline")
+    parser.add_argument("--golden-bijwerken", action="store_true", help="leg de golden values opnieuw vast")
+    args = parser.parse_args(argv)
+
+    if args.golden_bijwerken:
+        GOLDEN.write_text(json.dumps(bereken_golden(), indent=1) + "\n")
+        print(f"Golden values bewaard in {GOLDEN.name}")
+        return 0
+
+    afwijkingen = controleer_golden(json.loads(GOLDEN.read_text()))
+    for afwijking in afwijkingen:
+        print(f"GOLDEN  {afwijking}")
+
+    resultaten = meet(args.herhalingen, met_app=not args.zonder_app)
+
+    if args.bijwerken:
+        BASELINE.write_text(json.dumps({naam: round(waarde, 1) for naam, waarde in resultaten.items()}, indent=2) + "\n")
+        print(f"Baseline bewaard in {BASELINE.name}")
+        return 1 if afwijkingen else 0
+
+    baseline = json.loads(BASELINE.read_text()) if BASELINE.exists() else {}
+    overschreden = vergelijk(resultaten, baseline, args.drempel)
+    return 1 if overschreden or afwijkingen else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+# benchmarks/startup.py
+"""
+Meet de koude start van de app: importtijd (`python -X importtime`) van de rekenkern en
+van de app-modules, en de tijd tot de eerste volledige render van app.py in een vers proces.
+
+    python benchmarks/startup.py              # meten en vergelijken met het budget
+    python benchmarks/startup.py --bijwerken  # huidige metingen als nieuw budget bewaren
+
+Geeft exitcode 1 als een meting het budget met meer dan de toegestane marges overschrijdt.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parent.parent
+BUDGET = Path(__file__).resolve().parent / "startup_budget.json"
+
+# Modules die een koude start van de rekenkern en de app bepalen
+IMPORT_MODULES = ("calculator", "batch", "opcentiemen", "streamlit")
+
+EERSTE_RENDER = """
+import json, time
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file({app!r}, default_timeout=120)
+start = time.perf_counter()
+app.run()
+duur = time.perf_counter() - start
+if app.exception:
+    raise SystemExit(str(app.exception))
+print(json.dumps({{"eerste_render_ms": duur * 1000}}))
+"""
+
+
+def meet_importtijd(module):
+    """Cumulatieve importtijd in ms van `module` in een vers proces, plus de zwaarste submodules."""
+    proces = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO, capture_output=True, text=True, check=True,
+    )
+    metingen = []
+    for regel in proces.stderr.splitlines():
+        if not regel.startswith("import time:") or "cumulative" in regel:
+            continue
+        _, cumulatief, naam = regel.removeprefix("import time:").split("|")
+        metingen.append((naam.strip(), int(cumulatief) / 1000))
+
+    totaal = next(ms for naam, ms in reversed(metingen) if naam == module)
+    zwaarste = sorted(((naam, ms) for naam, ms in metingen if "." not in naam and naam != module), key=lambda m: -m[1])
+    return totaal, zwaarste[:5]
+
+
+def meet_eerste_render():
+    """Duur van de eerste run van app.py in een vers proces (imports van de app inbegrepen)."""
+    proces = subprocess.run(
+        [sys.executable, "-c", EERSTE_RENDER.format(app=str(REPO / "app.py"))],
+        cwd=REPO, capture_output=True, text=True, check=True,
+    )
+    return json.loads(proces.stdout.strip().splitlines()[-1])["eerste_render_ms"]
+
+
+def meet(herhalingen):
+    resultaten = {}
+    for module in IMPORT_MODULES:
+        tijden = [meet_importtijd(module)[0] for _ in range(herhalingen)]
+        resultaten[f"import_{module}_ms"] = statistics.median(tijden)
+    resultaten["eerste_render_ms"] = statistics.median(meet_eerste_render() for _ in range(herhalingen))
+    return resultaten
+
+
+def vergelijk(resultaten, budget, marge, marge_ms):
+    # Kleine metingen ruisen sterk: een overschrijding moet zowel relatief als absoluut gelden
+    overschreden = []
+    for naam, waarde in resultaten.items():
+        grens = budget.get(naam)
+        status = ""
+        if grens is not None and waarde > grens * marge + marge_ms:
+            overschreden.append(naam)
+            status = f"  > budget {grens:.0f} ms x {marge} + {marge_ms:.0f} ms"
+        print(f"{naam:<28} {waarde:8.1f} ms{status}")
+    return overschreden
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--herhalingen", type=int, default=3, help="aantal metingen per onderdeel (mediaan)")
+    parser.add_argument("--marge", type=float, default=1.5, help="toegestane factor boven het budget")
+    parser.add_argument("--marge-ms", type=float, default=25.0, help="toegestane absolute marge in ms")
+    parser.add_argument("--bijwerken", action="store_true", help="bewaar de metingen als nieuw budget")
+    parser.add_argument("--zwaarste", action="store_true", help="toon de zwaarste imports van app-modules")
+    args = parser.parse_args(argv)
+
+    resultaten = meet(args.herhalingen)
+
+    if args.zwaarste:
+        for module in IMPORT_MODULES:
+            _, zwaarste = meet_importtijd(module)
+            print(f"{module}: " + ", ".join(f"{naam} {ms:.0f} ms" for naam, ms in zwaarste))
+
+    if args.bijwerken:
+        BUDGET.write_text(json.dumps({naam: round(waarde, 1) for naam, waarde in resultaten.items()}, indent=2) + "\n")
+        print(f"Budget bewaard in {BUDGET.name}")
+        return 0
+
+    budget = json.loads(BUDGET.read_text()) if BUDGET.exists() else {}
+    overschreden = vergelijk(resultaten, budget, args.marge, args.marge_ms)
+    return 1 if overschreden else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+# breakeven.py
+import math
+
+import numpy as np
+
+from batch import bereken_vergelijking_batch
+from cache import gememoiseerd
+
+# Standaard zoekintervallen voor de parameters waarvoor een break-even zinvol is
+ZOEKBEREIK = {
+    "maandhuur": (0, 10_000),
+    "woningprijs": (10_000, 5_000_000),
+    "verwacht_rendement": (-0.05, 0.30),
+    "vastgoedgroei": (-0.05, 0.20),
+    "rentevoet": (0.0, 0.15),
+    "huurindexatie": (-0.05, 0.20),
+    "onderhoud_pct": (0.0, 0.10),
+    "eigen_inbreng_pct": (0.0, 1.0),
+}
+
+# Waarom een break-even (niet) gevonden werd, per probleem in "status"
+GEVONDEN = "gevonden"
+GEEN_TEKENWISSEL = "geen_tekenwissel"
+NIET_GECONVERGEERD = "niet_geconvergeerd"
+ONGELDIG = "ongeldig"
+STATUSSEN = (GEVONDEN, GEEN_TEKENWISSEL, NIET_GECONVERGEERD, ONGELDIG)
+
+
+def zoek_breakeven(parameter, scenario, ondergrens=None, bovengrens=None, xtol=None, max_iteraties=100):
+    """
+    Zoek de waarde van `parameter` waarbij kopen en huren hetzelfde netto vermogen opleveren.
+
+    `scenario` bevat alle andere parameters van `batch.bereken_vergelijking_batch`; arrays
+    in het scenario (of in de grenzen) geven een batch van break-evens die samen opgelost
+    worden. Gebruikt de methode van Chandrupatla, een begrensde methode in de familie van
+    Brent die goed vectoriseert: elke iteratie is één batch-evaluatie van de nog niet
+    geconvergeerde problemen.
+
+    Geeft een dict met "breakeven" (NaN als er geen gevonden werd), "status" (GEVONDEN,
+    GEEN_TEKENWISSEL als het verschil binnen de grenzen niet van teken wisselt, NIET_GECONVERGEERD
+    na `max_iteraties` of ONGELDIG als het model bij een grens geen eindig verschil geeft),
+    "residu" (het verschil koper - huurder bij de gevonden waarde) en het aantal model-evaluaties.
+    """
+    standaard_onder, standaard_boven = ZOEKBEREIK.get(parameter, (None, None))
+    ondergrens = standaard_onder if ondergrens is None else ondergrens
+    bovengrens = standaard_boven if bovengrens is None else bovengrens
+    if ondergrens is None or bovengrens is None:
+        raise ValueError(f"Geef een zoekinterval op voor '{parameter}'")
+
+    namen = [naam for naam in scenario if naam != parameter]
+    vorm = np.broadcast_shapes(np.shape(ondergrens), np.shape(bovengrens), *(np.shape(scenario[naam]) for naam in namen))
+    vlak = {naam: np.broadcast_to(scenario[naam], vorm).ravel() for naam in namen}
+    aantal = math.prod(vorm)
+
+    evaluaties = 0
+
+    def verschil(x, index):
+        nonlocal evaluaties
+        evaluaties += 1
+        invoer = {naam: waarden[index] for naam, waarden in vlak.items()}
+        return bereken_vergelijking_batch(**invoer, **{parameter: x})["verschil_reeel"]
+
+    alle = np.arange(aantal)
+    b = np.broadcast_to(np.asarray(ondergrens, dtype=float), vorm).ravel().copy()
+    a = np.broadcast_to(np.asarray(bovengrens, dtype=float), vorm).ravel().copy()
+    xtol = 1e-9 * np.abs(a - b) if xtol is None else np.broadcast_to(xtol, vorm).ravel()
+
+    fa = verschil(a, alle)
+    fb = verschil(b, alle)
+
+    breakeven = np.full(aantal, np.nan)
+    residu = np.full(aantal, np.nan)
+    status = np.full(aantal, GEEN_TEKENWISSEL, dtype=f"<U{max(map(len, STATUSSEN))}")
+    status[~(np.isfinite(fa) & np.isfinite(fb))] = ONGELDIG
+    for grens, f in ((a, fa), (b, fb)):
+        breakeven[f == 0] = grens[f == 0]
+        residu[f == 0] = 0.0
+        status[f == 0] = GEVONDEN
+    actief = np.flatnonzero(np.sign(fa) * np.sign(fb) < 0)
+    status[actief] = NIET_GECONVERGEERD
+
+    a, b, fa, fb, xtol = a[actief], b[actief], fa[actief], fb[actief], xtol[actief]
+    c, fc = a.copy(), fa.copy()
+    t = np.full(len(actief), 0.5)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for _ in range(max_iteraties):
+            if len(actief) == 0:
+                break
+
+            xt = a + t * (b - a)
+            ft = verschil(xt, actief)
+
+            # Houd het interval [a, b] rond de tekenwissel bij; c is het vorige eindpunt
+            zelfde_teken = np.sign(ft) == np.sign(fa)
+            c, fc = np.where(zelfde_teken, a, b), np.where(zelfde_teken, fa, fb)
+            b, fb = np.where(zelfde_teken, b, a), np.where(zelfde_teken, fb, fa)
+            a, fa = xt, ft
+
+            a_beter = np.abs(fa) < np.abs(fb)
+            beste_x = np.where(a_beter, a, b)
+            beste_f = np.where(a_beter, fa, fb)
+
+            tolerantie = 2 * np.finfo(float).eps * np.abs(beste_x) + xtol
+            t_grens = tolerantie / np.abs(b - c)
+            klaar = (beste_f == 0) | (t_grens > 0.5)
+            breakeven[actief[klaar]] = beste_x[klaar]
+            residu[actief[klaar]] = beste_f[klaar]
+            status[actief[klaar]] = GEVONDEN
+
+            # Inverse kwadratische interpolatie als die binnen het interval blijft, anders bisectie
+            xi = (a - b) / (c - b)
+            phi = (fa - fb) / (fc - fb)
+            interpoleer = (phi ** 2 < xi) & ((1 - phi) ** 2 < 1 - xi)
+            t = np.where(
+                interpoleer,
+                fa / (fb - fa) * fc / (fb - fc) + (c - a) / (b - a) * fa / (fc - fa) * fb / (fc - fb),
+                0.5,
+            )
+            t = np.clip(t, t_grens, 1 - t_grens)
+
+            nog_bezig = ~klaar
+            actief = actief[nog_bezig]
+            a, b, c, fa, fb, fc, t, xtol = (
+                a[nog_bezig], b[nog_bezig], c[nog_bezig], fa[nog_bezig], fb[nog_bezig], fc[nog_bezig], t[nog_bezig], xtol[nog_bezig]
+            )
+
+    return {
+        "breakeven": breakeven.reshape(vorm),
+        "status": status.reshape(vorm),
+        "residu": residu.reshape(vorm),
+        "evaluaties": evaluaties,
+    }
+
+
+@gememoiseerd
+def zoek_breakeven_per_horizon(parameter, scenario, ondergrens=None, bovengrens=None, **opties):
+    """
+    Zoek de break-even van `parameter` voor elke horizon 1..tijdshorizon van het scenario,
+    in één batch. Geeft de horizonnen en het resultaat van `zoek_breakeven`.
+    """
+    horizonnen = np.arange(1, int(scenario["tijdshorizon"]) + 1)
+    resultaat = zoek_breakeven(
+        parameter,
+        {**scenario, "tijdshorizon": horizonnen},
+        ondergrens=ondergrens,
+        bovengrens=bovengrens,
+        **opties,
+    )
+    return {"tijdshorizon": horizonnen, **resultaat}
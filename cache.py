@@ -0,0 +1,171 @@
+# cache.py
+import functools
+import inspect
+import math
+import numbers
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+DEFAULT_MAX_ITEMS = 4096
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+AFRONDING_DECIMALEN = 10
+
+
+class LRUCache:
+    """
+    Thread-safe LRU-cache met een maximum aantal items en een geheugenlimiet in bytes.
+
+    Eén instantie op moduleniveau wordt gedeeld door alle Streamlit-sessies in hetzelfde proces.
+    """
+
+    def __init__(self, max_items=DEFAULT_MAX_ITEMS, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evicties = 0
+
+    def haal(self, sleutel):
+        """Geef (True, waarde) bij een hit, anders (False, None)."""
+        with self._lock:
+            if sleutel in self._items:
+                self._items.move_to_end(sleutel)
+                self.hits += 1
+                return True, self._items[sleutel][0]
+            self.misses += 1
+            return False, None
+
+    def zet(self, sleutel, waarde, grootte):
+        with self._lock:
+            if sleutel in self._items:
+                self._bytes -= self._items.pop(sleutel)[1]
+            if grootte > self.max_bytes:
+                return
+            self._items[sleutel] = (waarde, grootte)
+            self._bytes += grootte
+            self._ruim_op()
+
+    def configureer(self, max_items=None, max_bytes=None):
+        """Pas de limieten aan; te veel items worden meteen verwijderd."""
+        with self._lock:
+            if max_items is not None:
+                self.max_items = max_items
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            self._ruim_op()
+
+    def _ruim_op(self):
+        # Verwijder de minst recent gebruikte items tot beide limieten gerespecteerd zijn
+        while self._items and (len(self._items) > self.max_items or self._bytes > self.max_bytes):
+            _, (_, vrijgekomen) = self._items.popitem(last=False)
+            self._bytes -= vrijgekomen
+            self.evicties += 1
+
+    def leeg(self):
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evicties = 0
+
+    def statistieken(self):
+        with self._lock:
+            opvragingen = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / opvragingen if opvragingen else 0.0,
+                "evicties": self.evicties,
+                "items": len(self._items),
+                "bytes": self._bytes,
+                "max_items": self.max_items,
+                "max_bytes": self.max_bytes,
+            }
+
+
+RESULTATEN = LRUCache(
+    max_items=int(os.environ.get("HURENOFKOPEN_CACHE_ITEMS", DEFAULT_MAX_ITEMS)),
+    max_bytes=int(float(os.environ.get("HURENOFKOPEN_CACHE_MB", DEFAULT_MAX_BYTES / 2**20)) * 2**20),
+)
+
+
+def _canoniek(waarde, decimalen):
+    # Maak een hashbare, afgeronde voorstelling zodat 0.1 + 0.2 en 0.3 dezelfde sleutel geven
+    if waarde is None or isinstance(waarde, (bool, str)):
+        return waarde
+    if isinstance(waarde, numbers.Real):
+        # NaN is niet gelijk aan zichzelf: als sleutel zou hij nooit gevonden worden
+        return round(float(waarde), decimalen) if waarde == waarde else "nan"
+    if isinstance(waarde, np.ndarray):
+        afgerond = np.round(waarde.astype(float).ravel(), decimalen).tolist()
+        if math.isnan(sum(afgerond)):
+            afgerond = ["nan" if w != w else w for w in afgerond]
+        return ("ndarray", waarde.shape, tuple(afgerond))
+    if isinstance(waarde, (list, tuple)):
+        return tuple(_canoniek(w, decimalen) for w in waarde)
+    if isinstance(waarde, dict):
+        return tuple(sorted((k, _canoniek(w, decimalen)) for k, w in waarde.items()))
+    raise TypeError(f"Geen cache-sleutel mogelijk voor {type(waarde).__name__}")
+
+
+def _grootte(waarde):
+    if isinstance(waarde, np.ndarray):
+        return sys.getsizeof(waarde) + (0 if waarde.base is None else waarde.nbytes)
+    if isinstance(waarde, dict):
+        return sys.getsizeof(waarde) + sum(_grootte(w) for w in waarde.values())
+    return sys.getsizeof(waarde)
+
+
+def _bevries(waarde):
+    # Gedeelde resultaten mogen niet door een sessie aangepast worden
+    if isinstance(waarde, np.ndarray):
+        waarde.flags.writeable = False
+    elif isinstance(waarde, dict):
+        for w in waarde.values():
+            _bevries(w)
+    return waarde
+
+
+def gememoiseerd(func=None, *, cache=RESULTATEN, decimalen=AFRONDING_DECIMALEN):
+    """
+    Decorator die resultaten bewaart onder een canonieke sleutel: functienaam en alle
+    argumenten (met standaardwaarden ingevuld), floats afgerond op `decimalen`.
+    Argumenten die niet te canoniseren zijn, slaan de cache over.
+    """
+    if func is None:
+        return functools.partial(gememoiseerd, cache=cache, decimalen=decimalen)
+
+    handtekening = inspect.signature(func)
+    naam = f"{func.__module__}.{func.__qualname__}"
+
+    def sleutel(*args, **kwargs):
+        argumenten = handtekening.bind(*args, **kwargs)
+        argumenten.apply_defaults()
+        return naam, tuple((n, _canoniek(w, decimalen)) for n, w in argumenten.arguments.items())
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            cache_sleutel = sleutel(*args, **kwargs)
+        except TypeError:
+            return func(*args, **kwargs)
+
+        gevonden, resultaat = cache.haal(cache_sleutel)
+        if not gevonden:
+            resultaat = _bevries(func(*args, **kwargs))
+            cache.zet(cache_sleutel, resultaat, _grootte(resultaat))
+
+        return dict(resultaat) if isinstance(resultaat, dict) else resultaat
+
+    wrapper.cache = cache
+    return wrapper
+
+
+def cache_statistieken():
+    return RESULTATEN.statistieken()
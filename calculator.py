@@ -1,10 +1,13 @@
-from utils import bereken_toekomstige_waarde
-from constants import DEFAULT_INFLATIE, DEFAULT_RENDEMENT, DEFAULT_VASTGOEDGROEI, DEFAULT_MAANDINKOMEN
-
 import numpy as np
-from utils import bereken_toekomstige_waarde
+
+from amortization import bereken_maandlast, bereken_restschuld
+from cache import gememoiseerd
 from constants import DEFAULT_INFLATIE, DEFAULT_RENDEMENT, DEFAULT_VASTGOEDGROEI, DEFAULT_MAANDINKOMEN
+from lening import bereken_leningverloop
+from maandelijks import RESOLUTIES, bereken_huur_maandelijks, bereken_kopen_maandelijks
+from utils import bereken_toekomstige_waarde
 
+@gememoiseerd
 def bereken_kopen(
     woningprijs,
     overige_kosten_pct,
@@ -19,8 +22,15 @@ def bereken_kopen(
     vastgoedgroei=DEFAULT_VASTGOEDGROEI,
     maandinkomen=DEFAULT_MAANDINKOMEN,
     inflatie=DEFAULT_INFLATIE,
-    andere_kosten_per_maand=0
+    andere_kosten_per_maand=0,
+    resolutie="jaar"
 ):
+    """
+    Kost en netto vermogen van de koper na `tijdshorizon` jaar. Met `resolutie="maand"` rekent
+    maandelijks.py met maandelijkse stortingen en kapitalisatie.
+    """
+    if resolutie not in RESOLUTIES:
+        raise ValueError(f"resolutie moet een van {', '.join(RESOLUTIES)} zijn")
     eigen_inbreng = woningprijs * eigen_inbreng_pct
     overige_kosten = woningprijs * overige_kosten_pct
     lening = woningprijs - eigen_inbreng
@@ -32,24 +42,23 @@ def bereken_kopen(
             "maandlast": 0,
         }
 
-    maandrente = rentevoet / 12
-    maanden = looptijd_jaren * 12
-    maandlast = lening * (maandrente * (1 + maandrente)**maanden) / ((1 + maandrente)**maanden - 1)
+    if resolutie == "maand":
+        maandelijks = bereken_kopen_maandelijks(
+            woningprijs, overige_kosten_pct, eigen_inbreng_pct, rentevoet, looptijd_jaren, onroerende_voorheffing,
+            onderhoud_pct, verzekering_per_jaar, tijdshorizon, verwacht_rendement, vastgoedgroei, maandinkomen,
+            inflatie, andere_kosten_per_maand,
+        )
+        return {
+            "totale_kost": float(maandelijks["totale_kost"][-1]),
+            "netto_vermogen": float(maandelijks["netto_vermogen"][-1]),
+            "maandlast": maandelijks["maandlast"],
+        }
 
-    # Bereken maandelijkse aflossingen
-    aflossing_per_maand = []
-    resterende_lening = lening
-    for maand in range(maanden):
-        rente = resterende_lening * maandrente
-        aflossing = maandlast - rente
-        aflossing_per_maand.append(aflossing)
-        resterende_lening -= aflossing
-    jaarlijkse_aflossingen = np.add.reduceat(aflossing_per_maand, np.arange(0, len(aflossing_per_maand), 12))
+    maandlast = bereken_maandlast(lening, rentevoet, looptijd_jaren)
 
     totaal_belegd_overschot = 0
     totale_kost = 0
     huidig_inkomen = maandinkomen
-    resterende_lening = lening
 
     for jaar in range(1, tijdshorizon + 1):
         woningwaarde = woningprijs * ((1 + vastgoedgroei) ** jaar)
@@ -60,9 +69,6 @@ def bereken_kopen(
             gemiste_rendement = bereken_toekomstige_waarde(overige_kosten, verwacht_rendement, tijdshorizon - jaar + 1)
             totale_kost += overige_kosten + gemiste_rendement
         else:
-            if jaar <= looptijd_jaren:
-                resterende_lening -= jaarlijkse_aflossingen[jaar - 2]
-
             jaarlijkse_kost = (
                 maandlast * 12 if jaar <= looptijd_jaren else 0
             ) + woningprijs * onderhoud_pct + verzekering_per_jaar + onroerende_voorheffing + andere_kosten_per_maand * 12
@@ -74,6 +80,11 @@ def bereken_kopen(
 
         huidig_inkomen *= (1 + inflatie)
 
+    # De eerste aflossing valt in jaar 2: na `tijdshorizon` jaar zijn er dus
+    # min(tijdshorizon, looptijd_jaren) - 1 jaar aan maandlasten afbetaald.
+    afbetaalde_jaren = min(tijdshorizon, looptijd_jaren) - 1
+    resterende_lening = bereken_restschuld(lening, rentevoet, looptijd_jaren, afbetaalde_jaren * 12)
+
     netto_vermogen = woningwaarde - resterende_lening + totaal_belegd_overschot
 
     return {
@@ -83,6 +94,7 @@ def bereken_kopen(
     }
 
 
+@gememoiseerd
 def bereken_huur(
     maandhuur,
     huurindexatie,
@@ -95,8 +107,25 @@ def bereken_huur(
     verwacht_rendement=DEFAULT_RENDEMENT,
     maandinkomen=DEFAULT_MAANDINKOMEN,
     inflatie=DEFAULT_INFLATIE,
-    andere_kosten_per_maand=0
+    andere_kosten_per_maand=0,
+    resolutie="jaar"
 ):
+    """
+    Kost en netto vermogen van de huurder na `tijdshorizon` jaar. Met `resolutie="maand"` rekent
+    maandelijks.py met maandelijkse stortingen en kapitalisatie.
+    """
+    if resolutie not in RESOLUTIES:
+        raise ValueError(f"resolutie moet een van {', '.join(RESOLUTIES)} zijn")
+    if resolutie == "maand" and tijdshorizon > 0:
+        maandelijks = bereken_huur_maandelijks(
+            maandhuur, huurindexatie, verzekering_per_jaar, maandlast_koper, tijdshorizon, woningprijs,
+            eigen_inbreng_pct, overige_kosten_pct, verwacht_rendement, maandinkomen, inflatie, andere_kosten_per_maand,
+        )
+        return {
+            "totale_kost": float(maandelijks["totale_kost"][-1]),
+            "netto_vermogen": float(maandelijks["netto_vermogen"][-1]),
+        }
+
     totale_huur = 0
     totaal_gespaard = 0
     totale_verzekering = 0
@@ -140,3 +169,190 @@ def bereken_huur(
         "totale_kost": totale_kost,
         "netto_vermogen": netto_vermogen,
     }
+
+
+# De trajecten hieronder zijn opgebouwd uit kleine stappen. Enkel de trajecten zelf zijn
+# gecachet: een stap kost minder dan een cache-sleutel over zijn argumenten, en een andere
+# maandhuur raakt het gecachete koperstraject sowieso niet.
+
+def bereken_leningschema(woningprijs, eigen_inbreng_pct, rentevoet, looptijd_jaren, tijdshorizon, gebeurtenissen=()):
+    """
+    Stap 1: lening, maandlasten en restschuld bij elke horizon 0..tijdshorizon, met de
+    gebeurtenissen van `lening.bereken_leningverloop` (extra aflossingen, herfinanciering, verkoop).
+
+    De eerste aflossing valt in jaar 2: zonder gebeurtenissen is er bij horizon t
+    min(t, looptijd_jaren) - 1 jaar afbetaald.
+    """
+    lening = woningprijs - woningprijs * eigen_inbreng_pct
+    return {"lening": lening, **bereken_leningverloop(lening, rentevoet, looptijd_jaren, tijdshorizon, gebeurtenissen)}
+
+
+def bereken_koper_kasstromen(
+    woningprijs,
+    maandlasten,
+    onroerende_voorheffing,
+    onderhoud_pct,
+    verzekering_per_jaar,
+    tijdshorizon,
+    maandinkomen=DEFAULT_MAANDINKOMEN,
+    inflatie=DEFAULT_INFLATIE,
+    andere_kosten_per_maand=0,
+    eenmalig=None,
+    verkoop=None
+):
+    """
+    Stap 2: jaarlijkse kost en belegbaar overschot van de koper in jaar 1..tijdshorizon.
+    Jaar 1 is het aankoopmoment: nog geen maandlasten of overschot.
+
+    `maandlasten` is de maandlast per jaar uit het leningschema. Eenmalige uitgaven (extra
+    aflossingen, herfinancieringskosten) tellen als kost en komen uit het belegd vermogen.
+    Na een verkoop vallen de eigenaarskosten weg en komt de woonkost van de verkoop in de plaats.
+    """
+    jaren = np.arange(1, tijdshorizon + 1)
+    eigenaarskosten = woningprijs * onderhoud_pct + verzekering_per_jaar + onroerende_voorheffing
+    if verkoop is not None:
+        woonkost = verkoop["woonkost_per_maand"] * 12 * (1 + inflatie) ** (jaren - 1)
+        eigenaarskosten = np.where(jaren <= verkoop["jaar"], eigenaarskosten, woonkost)
+    kost = np.asarray(maandlasten) * 12 + eigenaarskosten + andere_kosten_per_maand * 12
+    kost[:1] = 0
+    inkomen = maandinkomen * (1 + inflatie) ** (jaren - 1)
+    overschot = np.maximum(inkomen * 12 - kost, 0)
+    overschot[:1] = 0
+    if eenmalig is not None:
+        kost += eenmalig
+        overschot -= eenmalig
+    return {"kost": kost, "overschot": overschot}
+
+
+def bereken_huurder_kasstromen(
+    maandhuur,
+    huurindexatie,
+    verzekering_per_jaar,
+    maandlast_koper,
+    tijdshorizon,
+    maandinkomen=DEFAULT_MAANDINKOMEN,
+    inflatie=DEFAULT_INFLATIE,
+    andere_kosten_per_maand=0
+):
+    """
+    Stap 3: jaarlijkse kost en inleg van de huurder in jaar 0..tijdshorizon-1. De inleg is
+    het verschil met de maandlast van de koper plus het overschot op het inkomen.
+    """
+    jaren = np.arange(tijdshorizon)
+    huidige_huur = maandhuur * (1 + huurindexatie) ** jaren
+    inkomen = maandinkomen * (1 + inflatie) ** jaren
+    kost = huidige_huur * 12 + verzekering_per_jaar + andere_kosten_per_maand * 12
+
+    verschil = np.maximum(maandlast_koper - huidige_huur, 0) * 12
+    overschot = np.maximum(inkomen * 12 - kost, 0)
+    return {"kost": kost, "inleg": verschil + overschot}
+
+
+def bereken_belegging(startbedrag, stortingen, verwacht_rendement, eerste_jaar):
+    """
+    Stap 4: waarde van een belegging bij elke horizon 0..len(stortingen). Het startbedrag groeit
+    vanaf jaar 0; storting k valt in jaar `eerste_jaar + k` en groeit tot horizon t met (1 + r)^(t - j).
+    """
+    groei = 1 + verwacht_rendement
+    stortingsjaren = eerste_jaar + np.arange(len(stortingen))
+    horizonnen = np.arange(1, len(stortingen) + 1)
+    # Som over de stortingen tot horizon t van storting(j) * (1 + r)^(t - j), voor alle t tegelijk
+    waarde = groei ** horizonnen * (startbedrag + np.cumsum(stortingen * groei ** -stortingsjaren))
+    return np.concatenate(([startbedrag], waarde))
+
+
+@gememoiseerd
+def bereken_kopen_traject(
+    woningprijs,
+    overige_kosten_pct,
+    eigen_inbreng_pct,
+    rentevoet,
+    looptijd_jaren,
+    onroerende_voorheffing,
+    onderhoud_pct,
+    verzekering_per_jaar,
+    tijdshorizon,
+    verwacht_rendement=DEFAULT_RENDEMENT,
+    vastgoedgroei=DEFAULT_VASTGOEDGROEI,
+    maandinkomen=DEFAULT_MAANDINKOMEN,
+    inflatie=DEFAULT_INFLATIE,
+    andere_kosten_per_maand=0,
+    gebeurtenissen=()
+):
+    """
+    Bereken de koper-resultaten voor elke horizon 0..tijdshorizon in één doorloop.
+
+    Zonder `gebeurtenissen` is element t van elke array gelijk aan `bereken_kopen(..., tijdshorizon=t)`.
+    Met gebeurtenissen (zie lening.py) volgen de maandlasten, restschuld en kasstromen het
+    leningverloop, en telt de woning na een verkoop als belegde opbrengst.
+    """
+    eigen_inbreng = woningprijs * eigen_inbreng_pct
+    overige_kosten = woningprijs * overige_kosten_pct
+
+    schema = bereken_leningschema(woningprijs, eigen_inbreng_pct, rentevoet, looptijd_jaren, tijdshorizon, gebeurtenissen)
+    verkoop = schema["verkoop"] if schema["verkoop"] is not None and schema["verkoop"]["jaar"] <= tijdshorizon else None
+    stromen = bereken_koper_kasstromen(
+        woningprijs, schema["maandlasten"], onroerende_voorheffing, onderhoud_pct, verzekering_per_jaar,
+        tijdshorizon, maandinkomen, inflatie, andere_kosten_per_maand,
+        schema["eenmalig"] if gebeurtenissen else None, verkoop,
+    )
+
+    jaren = np.arange(1, tijdshorizon + 1)
+    woningwaarde = woningprijs * (1 + vastgoedgroei) ** jaren
+    overschot, kost = stromen["overschot"], stromen["kost"]
+    if verkoop is not None:
+        # Op het einde van het verkoopjaar wordt de woning cash: de opbrengst na verkoopkosten en
+        # restschuld is een storting in dat jaar, daarna telt de woning niet meer mee
+        verkoopjaar = int(verkoop["jaar"])
+        verkoopkosten = woningwaarde[verkoopjaar - 1] * verkoop["kosten_pct"]
+        overschot, kost = overschot.copy(), kost.copy()
+        overschot[verkoopjaar - 1] += woningwaarde[verkoopjaar - 1] - verkoopkosten - schema["restschuld_bij_verkoop"]
+        kost[verkoopjaar - 1] += verkoopkosten
+        woningwaarde = np.where(jaren < verkoopjaar, woningwaarde, 0.0)
+    belegd_overschot = bereken_belegging(0.0, overschot, verwacht_rendement, 1)[1:]
+
+    totale_kost = overige_kosten * (1 + (1 + verwacht_rendement) ** jaren) + np.cumsum(kost)
+    netto_vermogen = woningwaarde - schema["restschuld"][1:] + belegd_overschot
+
+    return {
+        "totale_kost": np.concatenate(([0.0], totale_kost)),
+        "netto_vermogen": np.concatenate(([eigen_inbreng + overige_kosten], netto_vermogen)),
+        "restschuld": schema["restschuld"],
+        "maandlast": schema["maandlast"],
+        "maandlasten": schema["maandlasten"],
+    }
+
+
+@gememoiseerd
+def bereken_huur_traject(
+    maandhuur,
+    huurindexatie,
+    verzekering_per_jaar,
+    maandlast_koper,
+    tijdshorizon,
+    woningprijs,
+    eigen_inbreng_pct,
+    overige_kosten_pct,
+    verwacht_rendement=DEFAULT_RENDEMENT,
+    maandinkomen=DEFAULT_MAANDINKOMEN,
+    inflatie=DEFAULT_INFLATIE,
+    andere_kosten_per_maand=0
+):
+    """
+    Bereken de huurder-resultaten voor elke horizon 0..tijdshorizon in één doorloop.
+
+    Element t van elke array is gelijk aan `bereken_huur(..., tijdshorizon=t)`.
+    """
+    initieel_belegd = woningprijs * (eigen_inbreng_pct + overige_kosten_pct)
+
+    stromen = bereken_huurder_kasstromen(
+        maandhuur, huurindexatie, verzekering_per_jaar, maandlast_koper, tijdshorizon,
+        maandinkomen, inflatie, andere_kosten_per_maand,
+    )
+    totaal_gespaard = bereken_belegging(initieel_belegd, stromen["inleg"], verwacht_rendement, 0)
+    totale_kost = np.concatenate(([0.0], np.cumsum(stromen["kost"])))
+
+    return {
+        "totale_kost": totale_kost,
+        "netto_vermogen": np.concatenate(([initieel_belegd], totaal_gespaard[1:] - totale_kost[1:])),
+    }
@@ -0,0 +1,331 @@
+# cli.py
+"""
+Bereken huren versus kopen voor een bestand met scenario's, zonder de app.
+
+Elke rij is één scenario met de parameters van `batch.bereken_vergelijking_batch` als kolommen
+(ontbrekende optionele kolommen krijgen de standaardwaarde; andere kolommen, bv. een klant-id,
+worden mee weggeschreven). Elke rij wordt gecontroleerd zoals de dienst een scenario controleert
+(service.py); een ongeldige rij wordt niet berekend maar met haar fout in de kolom "fout"
+weggeschreven, de andere rijen lopen gewoon door. Het bestand wordt in blokken gelezen, de blokken worden over een
+procespool verdeeld en de resultaten worden in volgorde weggeschreven zodra ze klaar zijn.
+
+    python cli.py scenarios.csv resultaten.csv
+    python cli.py scenarios.parquet resultaten.parquet --workers 8 --traject trajecten.parquet
+    python cli.py scenario.csv resultaat.csv --kasstromen kasstromen.xlsx
+"""
+import argparse
+import inspect
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import kernels
+from batch import JAARPERCENTAGES, bereken_vergelijking_batch, bereken_vergelijking_paden
+from constants import MAX_LOOPTIJD_JAREN, MAX_TIJDSHORIZON
+from kasstromen import DEFAULT_BLOKGROOTTE as KASSTROOM_BLOKGROOTTE, kasstroom_blokken
+
+PARAMETERS = inspect.signature(bereken_vergelijking_batch).parameters
+VERPLICHT = [naam for naam, parameter in PARAMETERS.items() if parameter.default is inspect.Parameter.empty]
+TRAJECT_VELDEN = (
+    "koper_totale_kost", "koper_netto_vermogen", "restschuld",
+    "huurder_totale_kost", "huurder_netto_vermogen", "verschil_reeel",
+)
+# Dezelfde grenzen als in service.py: een te grote horizon legt het hele blok stil
+JAARVELDEN = {"tijdshorizon": MAX_TIJDSHORIZON, "looptijd_jaren": MAX_LOOPTIJD_JAREN}
+DEFAULT_BLOKGROOTTE = 50_000
+MAX_XLSX_RIJEN = 1_048_576
+
+
+def lees_blokken(pad, blokgrootte, scheidingsteken=","):
+    """Lees een CSV- of Parquet-bestand als een reeks DataFrames van hoogstens `blokgrootte` rijen."""
+    pad = Path(pad)
+    if pad.suffix.lower() == ".parquet":
+        import pyarrow.parquet as pq
+
+        for record_batch in pq.ParquetFile(pad).iter_batches(batch_size=blokgrootte):
+            yield record_batch.to_pandas()
+    else:
+        yield from pd.read_csv(pad, sep=scheidingsteken, chunksize=blokgrootte)
+
+
+class CsvTekst:
+    """
+    Een DataFrame dat al als CSV-tekst opgemaakt is, met de kopregel apart. Het opmaken van
+    getallen weegt veel zwaarder dan het wegschrijven; zo gebeurt het in de workers.
+    """
+
+    def __init__(self, blok, scheidingsteken=","):
+        self.kop = blok.head(0).to_csv(sep=scheidingsteken, index=False)
+        self.tekst = blok.to_csv(sep=scheidingsteken, index=False, header=False)
+        self.rijen = len(blok)
+
+    def __len__(self):
+        return self.rijen
+
+
+class Schrijver:
+    """
+    Schrijft DataFrames blok per blok naar CSV, Parquet of XLSX, afhankelijk van de extensie.
+    Naar CSV kan een blok ook als `CsvTekst` komen. XLSX vereist `openpyxl` (in write-only
+    modus, rij per rij) en telt hoogstens 1.048.576 rijen.
+    """
+
+    def __init__(self, pad, scheidingsteken=","):
+        self.pad = Path(pad)
+        self.scheidingsteken = scheidingsteken
+        self.parquet = self.pad.suffix.lower() == ".parquet"
+        self.xlsx = self.pad.suffix.lower() == ".xlsx"
+        self.csv = not (self.parquet or self.xlsx)
+        self._parquet_schrijver = None
+        self._werkboek = None
+        self._rijen = 0
+        self._eerste = True
+
+    def schrijf(self, blok):
+        if self.xlsx:
+            if self._werkboek is None:
+                from openpyxl import Workbook
+
+                self._werkboek = Workbook(write_only=True)
+                self._werkblad = self._werkboek.create_sheet()
+                self._werkblad.append(list(blok.columns))
+                self._rijen = 1
+            self._rijen += len(blok)
+            if self._rijen > MAX_XLSX_RIJEN:
+                raise ValueError(f"{self.pad.name}: meer dan {MAX_XLSX_RIJEN:,} rijen past niet in XLSX; kies CSV of Parquet")
+            for rij in zip(*(blok[kolom].tolist() for kolom in blok.columns)):
+                self._werkblad.append(rij)
+        elif self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            tabel = pa.Table.from_pandas(blok, preserve_index=False)
+            if self._parquet_schrijver is None:
+                self._parquet_schrijver = pq.ParquetWriter(self.pad, tabel.schema)
+            self._parquet_schrijver.write_table(tabel)
+        elif isinstance(blok, CsvTekst):
+            with open(self.pad, "w" if self._eerste else "a", newline="") as bestand:
+                bestand.write(blok.kop + blok.tekst if self._eerste else blok.tekst)
+        else:
+            blok.to_csv(self.pad, sep=self.scheidingsteken, index=False, mode="w" if self._eerste else "a", header=self._eerste)
+        self._eerste = False
+
+    def sluit(self):
+        if self._parquet_schrijver is not None:
+            self._parquet_schrijver.close()
+        if self._werkboek is not None:
+            self._werkboek.save(self.pad)
+
+
+def _scenario_kolommen(blok):
+    """
+    De parameters van een blok als float-arrays, plus per rij de eerste fout ("" als de rij
+    geldig is). Een lege cel in een optionele kolom krijgt de standaardwaarde.
+    """
+    ontbrekend = [naam for naam in VERPLICHT if naam not in blok.columns]
+    if ontbrekend:
+        raise ValueError(f"Ontbrekende kolommen: {', '.join(ontbrekend)}")
+    fouten = np.full(len(blok), "", dtype=object)
+
+    def meld(ongeldig, fout):
+        fouten[ongeldig & (fouten == "")] = fout
+
+    invoer = {}
+    for naam, parameter in PARAMETERS.items():
+        if naam not in blok.columns:
+            continue
+        leeg = blok[naam].isna().to_numpy()
+        waarden = pd.to_numeric(blok[naam], errors="coerce").to_numpy(dtype=float)
+        if parameter.default is inspect.Parameter.empty:
+            meld(leeg, f"{naam} ontbreekt")
+        else:
+            waarden[leeg] = parameter.default
+        meld(np.isnan(waarden), f"{naam} moet een getal zijn")
+        meld(np.isinf(waarden), f"{naam} moet een eindig getal zijn")
+        invoer[naam] = waarden
+    for naam, maximum in JAARVELDEN.items():
+        if naam in invoer:
+            waarden = invoer[naam]
+            with np.errstate(invalid="ignore"):
+                ongeldig = ~((waarden >= 1) & (waarden <= maximum) & (waarden == np.round(waarden)))
+            meld(ongeldig, f"{naam} moet een geheel getal van 1 tot {maximum} zijn")
+    return invoer, fouten
+
+
+def bereken_blok(begin, blok, traject=False, kasstromen=False, als_csv=(), scheidingsteken=","):
+    """
+    Bereken één blok scenario's. Geeft (resultaten, trajecten, kasstromen, aantal ongeldige
+    rijen); de trajecten en het kasstroomoverzicht staan in lang formaat (één rij per scenario
+    en jaar 0..tijdshorizon) of zijn None. Ongeldige rijen staan in de resultaten met lege
+    cijfers en hun fout in de kolom "fout"; in de trajecten en kasstromen ontbreken ze. De
+    uitvoer die in `als_csv` genoemd wordt ("resultaten", "trajecten", "kasstromen"), komt al
+    opgemaakt terug als `CsvTekst`.
+
+    Staat op moduleniveau zodat de procespool het kan oproepen.
+    """
+    invoer, fouten = _scenario_kolommen(blok)
+    geldig = fouten == ""
+    invoer = {naam: waarden[geldig] for naam, waarden in invoer.items()}
+    rij = np.arange(begin, begin + len(blok))[geldig]
+    extra = blok[[kolom for kolom in blok.columns if kolom not in PARAMETERS]].reset_index(drop=True)
+
+    resultaat = bereken_vergelijking_batch(**invoer)
+    cijfers = pd.DataFrame(
+        {veld: resultaat[veld] for veld in resultaat.dtype.names}, index=np.flatnonzero(geldig)
+    ).reindex(range(len(blok)))
+    resultaten = pd.concat(
+        [pd.DataFrame({"rij": np.arange(begin, begin + len(blok))}), extra, cijfers, pd.DataFrame({"fout": fouten})],
+        axis=1,
+    )
+    ongeldig = int((~geldig).sum())
+    trajecten = kasstroom = None
+    if len(rij) == 0:
+        return _als_csv(als_csv, scheidingsteken, resultaten, trajecten, kasstroom) + (ongeldig,)
+
+    if traject:
+        # Eén doorloop tot de grootste horizon van het blok; kortere horizonnen worden nadien afgeknipt
+        horizonnen = invoer["tijdshorizon"].astype(int)
+        paden = bereken_vergelijking_paden(**{
+            **invoer,
+            **{naam: invoer[naam][:, None] for naam in JAARPERCENTAGES if naam in invoer},
+            "tijdshorizon": int(horizonnen.max()),
+        })
+        jaren = np.arange(horizonnen.max() + 1)
+        binnen_horizon = jaren <= horizonnen[:, None]
+        scenario_index, jaar = np.nonzero(binnen_horizon)
+        trajecten = pd.DataFrame({"rij": rij[scenario_index], "jaar": jaar})
+        for veld in TRAJECT_VELDEN:
+            trajecten[veld] = np.broadcast_to(paden[veld], binnen_horizon.shape)[binnen_horizon]
+    if kasstromen:
+        kasstroom = pd.concat([pd.DataFrame(deel) for deel in kasstroom_blokken(invoer)], ignore_index=True)
+        kasstroom["rij"] = rij[kasstroom["rij"].to_numpy()]
+    return _als_csv(als_csv, scheidingsteken, resultaten, trajecten, kasstroom) + (ongeldig,)
+
+
+def _als_csv(als_csv, scheidingsteken, *uitvoer):
+    return tuple(
+        CsvTekst(blok, scheidingsteken) if naam in als_csv and blok is not None else blok
+        for naam, blok in zip(("resultaten", "trajecten", "kasstromen"), uitvoer)
+    )
+
+
+def verwerk(invoer, uitvoer, traject=None, workers=None, blokgrootte=DEFAULT_BLOKGROOTTE, scheidingsteken=",", voortgang=None,
+            backend=None, kasstromen=None):
+    """
+    Verwerk een scenariobestand blok per blok. Hoogstens twee blokken per worker zijn
+    tegelijk onderweg, zodat het geheugengebruik begrensd blijft voor elke bestandsgrootte.
+    `backend` kiest de backend van de jaarlussen (zie kernels.py), ook in de workers.
+    Met `kasstromen` (een pad) wordt ook het kasstroomoverzicht per scenario en jaar
+    weggeschreven. De workers rekenen het uit; omdat het per scenario tientallen rijen telt,
+    zijn de blokken dan hoogstens `KASSTROOM_BLOKGROOTTE` scenario's groot.
+    Geeft het aantal verwerkte rijen en hoeveel daarvan ongeldig waren.
+    """
+    workers = workers or os.cpu_count() or 1
+    if kasstromen:
+        blokgrootte = min(blokgrootte, KASSTROOM_BLOKGROOTTE)
+    backend = backend or kernels.actieve_backend()
+    schrijver = Schrijver(uitvoer, scheidingsteken)
+    traject_schrijver = Schrijver(traject, scheidingsteken) if traject else None
+    kasstroom_schrijver = Schrijver(kasstromen, scheidingsteken) if kasstromen else None
+    # CSV-uitvoer wordt al in bereken_blok opgemaakt: het hoofdproces schrijft enkel nog tekst weg
+    als_csv = tuple(
+        naam for naam, uitvoer_schrijver in (
+            ("resultaten", schrijver), ("trajecten", traject_schrijver), ("kasstromen", kasstroom_schrijver),
+        ) if uitvoer_schrijver is not None and uitvoer_schrijver.csv
+    )
+    aantal = ongeldig = 0
+
+    def schrijf(resultaten, trajecten, kasstroom, ongeldig_in_blok):
+        nonlocal aantal, ongeldig
+        schrijver.schrijf(resultaten)
+        if traject_schrijver is not None and trajecten is not None:
+            traject_schrijver.schrijf(trajecten)
+        if kasstroom_schrijver is not None and kasstroom is not None:
+            kasstroom_schrijver.schrijf(kasstroom)
+        aantal += len(resultaten)
+        ongeldig += ongeldig_in_blok
+        if voortgang is not None:
+            voortgang(aantal)
+
+    try:
+        if workers == 1:
+            vorige = kernels.kies_backend(backend)
+            try:
+                begin = 0
+                for blok in lees_blokken(invoer, blokgrootte, scheidingsteken):
+                    schrijf(*bereken_blok(begin, blok, traject is not None, kasstroom_schrijver is not None, als_csv, scheidingsteken))
+                    begin += len(blok)
+            finally:
+                kernels.kies_backend(vorige)
+            return aantal, ongeldig
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=kernels.kies_backend, initargs=(backend,)) as pool:
+            onderweg = deque()
+            begin = 0
+            for blok in lees_blokken(invoer, blokgrootte, scheidingsteken):
+                onderweg.append(pool.submit(
+                    bereken_blok, begin, blok, traject is not None, kasstroom_schrijver is not None, als_csv, scheidingsteken
+                ))
+                begin += len(blok)
+                if len(onderweg) >= 2 * workers:
+                    schrijf(*onderweg.popleft().result())
+            while onderweg:
+                schrijf(*onderweg.popleft().result())
+        return aantal, ongeldig
+    finally:
+        schrijver.sluit()
+        if traject_schrijver is not None:
+            traject_schrijver.sluit()
+        if kasstroom_schrijver is not None:
+            kasstroom_schrijver.sluit()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("invoer", help="scenario's als .csv of .parquet")
+    parser.add_argument("uitvoer", help="resultaten als .csv of .parquet")
+    parser.add_argument("--traject", metavar="PAD", help="schrijf ook de evolutie per jaar (lang formaat) naar PAD")
+    parser.add_argument("--kasstromen", metavar="PAD",
+                        help="schrijf ook het kasstroomoverzicht per scenario en jaar naar PAD (.csv, .parquet of .xlsx)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="aantal processen (standaard: alle cores)")
+    parser.add_argument("--blokgrootte", type=int, default=DEFAULT_BLOKGROOTTE, help="aantal scenario's per blok")
+    parser.add_argument("--scheidingsteken", default=",", help="scheidingsteken voor CSV-bestanden")
+    parser.add_argument("--backend", choices=kernels.BACKENDS, help="backend van de jaarlussen (standaard: HURENOFKOPEN_BACKEND of numpy)")
+    parser.add_argument("--stil", action="store_true", help="geen voortgang tonen")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+
+    def toon_voortgang(aantal):
+        duur = time.perf_counter() - start
+        print(f"\r{aantal:,} scenario's, {aantal / duur:,.0f} scenario's/s", end="", file=sys.stderr, flush=True)
+
+    aantal, ongeldig = verwerk(
+        args.invoer,
+        args.uitvoer,
+        traject=args.traject,
+        workers=args.workers,
+        blokgrootte=args.blokgrootte,
+        scheidingsteken=args.scheidingsteken,
+        voortgang=None if args.stil else toon_voortgang,
+        backend=args.backend,
+        kasstromen=args.kasstromen,
+    )
+    duur = time.perf_counter() - start
+    print(
+        f"\r{aantal:,} scenario's in {duur:.1f} s ({aantal / duur:,.0f} scenario's/s, {args.workers} workers)",
+        file=sys.stderr,
+    )
+    if ongeldig:
+        print(f"{ongeldig:,} ongeldige rijen niet berekend; zie de kolom \"fout\" in {args.uitvoer}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,3 +4,23 @@ DEFAULT_RENDEMENT = 0.09
 DEFAULT_VASTGOEDGROEI = 0.04
 DEFAULT_MAANDINKOMEN = 6_000
 DEFAULT_OVERIGE_KOSTEN_PCT = 0.025
+# De jaarlussen lopen tot de grootste horizon: een onbegrensde horizon legt een hele batch stil
+MAX_TIJDSHORIZON = 100
+MAX_LOOPTIJD_JAREN = 100
+
+# Monte Carlo: jaarlijkse standaardafwijkingen en correlaties van
+# (rendement, vastgoedgroei, inflatie, huurindexatie)
+DEFAULT_VOLATILITEIT_RENDEMENT = 0.16
+DEFAULT_VOLATILITEIT_VASTGOEDGROEI = 0.05
+DEFAULT_VOLATILITEIT_INFLATIE = 0.015
+DEFAULT_VOLATILITEIT_HUURINDEXATIE = 0.015
+DEFAULT_CORRELATIES = (
+    (1.0, 0.2, -0.1, -0.1),
+    (0.2, 1.0, 0.3, 0.3),
+    (-0.1, 0.3, 1.0, 0.8),
+    (-0.1, 0.3, 0.8, 1.0),
+)
+DEFAULT_AANTAL_PADEN = 10_000
+
+# Onroerende voorheffing: basisvoet op het geïndexeerd kadastraal inkomen (Vlaanderen)
+BASISVOET_ONROERENDE_VOORHEFFING = 0.025
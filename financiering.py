@@ -0,0 +1,123 @@
+# financiering.py
+import math
+
+import numpy as np
+
+from batch import bereken_vergelijking_batch, maak_rooster
+from cache import gememoiseerd
+from constants import DEFAULT_INFLATIE, DEFAULT_MAANDINKOMEN, DEFAULT_RENDEMENT
+
+# De maandlast mag hoogstens dit deel van het netto maandinkomen zijn (vuistregel van de banken)
+DEFAULT_MAX_LASTRATIO = 1 / 3
+DEFAULT_EIGEN_INBRENG_BEREIK = (0.0, 1.0)
+DEFAULT_LOOPTIJD_BEREIK = (1, 40)
+DEFAULT_TOLERANTIE = 0.001
+
+# Grof rooster: ook het landschap voor de heatmap
+AANTAL_EIGEN_INBRENG = 21
+AANTAL_LOOPTIJDEN = 20
+
+DOELEN = ("koper", "verschil")
+
+
+@gememoiseerd
+def optimaliseer_financiering(
+    scenario,
+    max_lastratio=DEFAULT_MAX_LASTRATIO,
+    eigen_inbreng_bereik=DEFAULT_EIGEN_INBRENG_BEREIK,
+    looptijd_bereik=DEFAULT_LOOPTIJD_BEREIK,
+    doel="koper",
+    tolerantie=DEFAULT_TOLERANTIE,
+):
+    """
+    Zoek de eigen inbreng en looptijd die het reële netto vermogen van de koper maximaliseren
+    (`doel="koper"`), of het reële verschil koper - huurder (`doel="verschil"`), terwijl de
+    maandlast hoogstens `max_lastratio` van het maandinkomen is.
+
+    De bovengrens van `eigen_inbreng_bereik` is het beschikbare eigen vermogen. Voor het doel
+    "koper" wordt wat daarvan niet ingebracht wordt, belegd tegen het verwachte rendement;
+    anders zou een zo groot mogelijke inbreng altijd winnen, omdat het netto vermogen van de
+    koper het ingebrachte geld niet als gemiste belegging telt.
+
+    `scenario` bevat de overige parameters van `batch.bereken_vergelijking_batch`. Eerst wordt een
+    grof rooster over beide bereiken in één batch-oproep geëvalueerd; daarna zoekt een patroon-
+    zoektocht rond het beste punt met halverende stappen, tot de eigen inbreng op `tolerantie` en
+    de looptijd op één jaar nauwkeurig is. Elk punt wordt hoogstens één keer berekend.
+
+    Geeft een dict met het optimum (NaN als geen enkel punt haalbaar is), de maandlast en de
+    toegelaten maandlast, het aantal evaluaties en het landschap van het grove rooster
+    (waarde per eigen inbreng x looptijd, NaN waar de maandlast te hoog is).
+    """
+    if doel not in DOELEN:
+        raise ValueError(f"doel moet een van {', '.join(DOELEN)} zijn")
+    scenario = {naam: waarde for naam, waarde in scenario.items() if naam not in ("eigen_inbreng_pct", "looptijd_jaren")}
+    deflator = (1 + scenario.get("inflatie", DEFAULT_INFLATIE)) ** scenario["tijdshorizon"]
+    groei = (1 + scenario.get("verwacht_rendement", DEFAULT_RENDEMENT)) ** scenario["tijdshorizon"]
+    max_maandlast = max_lastratio * scenario.get("maandinkomen", DEFAULT_MAANDINKOMEN)
+    min_inbreng, max_inbreng = eigen_inbreng_bereik
+    min_looptijd, max_looptijd = looptijd_bereik
+
+    evaluaties = {}
+
+    def evalueer(inbreng, looptijd):
+        # Geeft de waarde per punt (-inf als de maandlast te hoog is); enkel nieuwe punten worden berekend
+        sleutels = [(round(i, 12), int(l)) for i, l in zip(np.asarray(inbreng).tolist(), np.asarray(looptijd).tolist())]
+        nieuw = [sleutel for sleutel in dict.fromkeys(sleutels) if sleutel not in evaluaties]
+        if nieuw:
+            nieuwe_inbreng, nieuwe_looptijd = (np.array(kolom) for kolom in zip(*nieuw))
+            resultaat = bereken_vergelijking_batch(**scenario, eigen_inbreng_pct=nieuwe_inbreng, looptijd_jaren=nieuwe_looptijd)
+            if doel == "verschil":
+                waarde = resultaat["verschil_reeel"]
+            else:
+                niet_ingebracht = (max_inbreng - nieuwe_inbreng) * scenario["woningprijs"] * groei
+                waarde = (resultaat["koper_netto_vermogen"] + niet_ingebracht) / deflator
+            waarde = np.where(resultaat["maandlast"] <= max_maandlast, waarde, -np.inf)
+            evaluaties.update(zip(nieuw, zip(waarde.tolist(), resultaat["maandlast"].tolist())))
+        return np.array([evaluaties[sleutel][0] for sleutel in sleutels])
+
+    # Grof rooster
+    inbreng_as = np.linspace(min_inbreng, max_inbreng, AANTAL_EIGEN_INBRENG)
+    looptijd_as = np.unique(np.round(np.linspace(min_looptijd, max_looptijd, AANTAL_LOOPTIJDEN)).astype(int))
+    rooster = maak_rooster(eigen_inbreng_pct=inbreng_as, looptijd_jaren=looptijd_as)
+    inbreng_rooster, looptijd_rooster = np.broadcast_arrays(rooster["eigen_inbreng_pct"], rooster["looptijd_jaren"])
+    landschap = evalueer(inbreng_rooster.ravel(), looptijd_rooster.ravel()).reshape(inbreng_rooster.shape)
+
+    beste = int(np.argmax(landschap))
+    beste_inbreng, beste_looptijd = float(inbreng_rooster.flat[beste]), int(looptijd_rooster.flat[beste])
+    beste_waarde = landschap.flat[beste]
+
+    if np.isfinite(beste_waarde):
+        # Patroonzoektocht: 5 x 5 punten rond het beste punt; stappen halveren tot de tolerantie
+        stap_inbreng = (inbreng_as[1] - inbreng_as[0]) if len(inbreng_as) > 1 else 0.0
+        stap_looptijd = int(np.diff(looptijd_as).max(initial=1))
+        verschuivingen = np.arange(-2, 3)
+        while True:
+            stap_inbreng = stap_inbreng / 2 if stap_inbreng > tolerantie else stap_inbreng
+            stap_looptijd = max(stap_looptijd // 2, 1)
+            inbreng = np.clip(beste_inbreng + stap_inbreng * verschuivingen, min_inbreng, max_inbreng)
+            looptijd = np.clip(beste_looptijd + stap_looptijd * verschuivingen, min_looptijd, max_looptijd)
+            inbreng, looptijd = (as_.ravel() for as_ in np.meshgrid(inbreng, looptijd, indexing="ij"))
+            waarden = evalueer(inbreng, looptijd)
+
+            index = int(np.argmax(waarden))
+            verbeterd = waarden[index] > beste_waarde
+            if verbeterd:
+                beste_inbreng, beste_looptijd, beste_waarde = float(inbreng[index]), int(looptijd[index]), waarden[index]
+            if not verbeterd and stap_inbreng <= tolerantie and stap_looptijd == 1:
+                break
+
+    haalbaar = bool(np.isfinite(beste_waarde))
+    return {
+        "haalbaar": haalbaar,
+        "eigen_inbreng_pct": beste_inbreng if haalbaar else math.nan,
+        "looptijd_jaren": beste_looptijd if haalbaar else math.nan,
+        "waarde": float(beste_waarde) if haalbaar else math.nan,
+        "maandlast": evaluaties[(round(beste_inbreng, 12), beste_looptijd)][1] if haalbaar else math.nan,
+        "max_maandlast": max_maandlast,
+        "evaluaties": len(evaluaties),
+        "landschap": {
+            "eigen_inbreng_pct": inbreng_as,
+            "looptijd_jaren": looptijd_as,
+            "waarde": np.where(np.isfinite(landschap), landschap, np.nan),
+        },
+    }
@@ -0,0 +1,74 @@
+# gevoeligheid.py
+import numpy as np
+
+from batch import bereken_vergelijking_batch
+from cache import gememoiseerd
+
+# Hoe elke parameter verstoord wordt: percentages met procentpunten, bedragen relatief,
+# looptijden met een aantal jaren. Ondergrenzen houden de verstoorde waarden geldig.
+PARAMETERS = {
+    "woningprijs": ("relatief", 0),
+    "overige_kosten_pct": ("procentpunt", 0),
+    "eigen_inbreng_pct": ("procentpunt", 0),
+    "rentevoet": ("procentpunt", 0),
+    "looptijd_jaren": ("jaren", 1),
+    "onroerende_voorheffing": ("relatief", 0),
+    "onderhoud_pct": ("procentpunt", 0),
+    "verzekering_koper": ("relatief", 0),
+    "maandhuur": ("relatief", 0),
+    "huurindexatie": ("procentpunt", -1),
+    "verzekering_huurder": ("relatief", 0),
+    "verwacht_rendement": ("procentpunt", -1),
+    "vastgoedgroei": ("procentpunt", -1),
+    "maandinkomen": ("relatief", 0),
+    "inflatie": ("procentpunt", -1),
+}
+
+DEFAULT_PROCENTPUNT = 0.01
+DEFAULT_RELATIEF = 0.10
+DEFAULT_JAREN = 5
+
+
+def verstoorde_waarden(parameter, waarde, procentpunt=DEFAULT_PROCENTPUNT, relatief=DEFAULT_RELATIEF, jaren=DEFAULT_JAREN):
+    """Geef (laag, hoog) voor één parameter rond `waarde`, begrensd op de ondergrens van de parameter."""
+    soort, ondergrens = PARAMETERS[parameter]
+    delta = {"procentpunt": procentpunt, "relatief": abs(waarde) * relatief, "jaren": jaren}[soort]
+    laag, hoog = max(waarde - delta, ondergrens), waarde + delta
+    if parameter == "eigen_inbreng_pct":
+        hoog = min(hoog, 1.0)
+    return laag, hoog
+
+
+@gememoiseerd
+def bereken_gevoeligheid(scenario, procentpunt=DEFAULT_PROCENTPUNT, relatief=DEFAULT_RELATIEF, jaren=DEFAULT_JAREN):
+    """
+    Verstoor elke parameter van `scenario` (de invoer van `batch.bereken_vergelijking_batch`)
+    naar beneden en naar boven, terwijl de rest gelijk blijft, en bereken het reële verschil
+    koper - huurder.
+
+    Alle 2 x N verstoringen plus het basisscenario zijn rijen van één batch-oproep: elke
+    parameter krijgt een kolom die overal de basiswaarde heeft, behalve in zijn eigen twee rijen.
+    Geeft een dict met de parameters (gesorteerd van grootste naar kleinste impact), de
+    verstoorde waarden, het verschil bij laag en hoog, en het basisverschil.
+    """
+    parameters = [naam for naam in PARAMETERS if naam in scenario]
+    aantal = 2 * len(parameters) + 1
+
+    kolommen = {naam: np.full(aantal, float(waarde)) for naam, waarde in scenario.items()}
+    waarden = np.empty((len(parameters), 2))
+    for index, naam in enumerate(parameters):
+        waarden[index] = verstoorde_waarden(naam, scenario[naam], procentpunt, relatief, jaren)
+        kolommen[naam][1 + 2 * index: 3 + 2 * index] = waarden[index]
+
+    verschil = bereken_vergelijking_batch(**kolommen)["verschil_reeel"]
+    laag, hoog = verschil[1::2], verschil[2::2]
+
+    volgorde = np.argsort(-np.abs(hoog - laag), kind="stable")
+    return {
+        "parameters": [parameters[index] for index in volgorde],
+        "waarde_laag": waarden[volgorde, 0],
+        "waarde_hoog": waarden[volgorde, 1],
+        "verschil_laag": laag[volgorde],
+        "verschil_hoog": hoog[volgorde],
+        "basis": float(verschil[0]),
+    }
@@ -0,0 +1,156 @@
+# grafieken.py
+import io
+
+from matplotlib.figure import Figure
+from matplotlib.ticker import FuncFormatter
+
+import profilering
+from cache import LRUCache, gememoiseerd
+
+# Gerenderde PNG's, gedeeld over sessies en gesleuteld op de geplotte reeksen en opmaak
+GRAFIEKEN = LRUCache(max_items=256, max_bytes=32 * 1024 * 1024)
+
+KLEUR_KOPER = "#0D3B66"
+KLEUR_HUURDER = "#2A9D8F"
+DPI = 200
+
+
+def _euro_as(as_):
+    as_.grid(True, linestyle="--", alpha=0.5)
+    as_.yaxis.set_major_formatter(FuncFormatter(lambda x, _: f"€ {x:,.0f}"))
+
+
+def _jaar_ticks(as_, jaren):
+    as_.set_xticks([j for j in jaren if j % 5 == 0 or j == 0])
+    as_.set_xticklabels([str(j) for j in jaren if j % 5 == 0 or j == 0])
+
+
+def _naar_png(figuur):
+    # Figure i.p.v. pyplot: de figuur komt niet in de globale pyplot-registry en wordt na het
+    # renderen expliciet losgelaten, zodat lange sessies geen geheugen opstapelen
+    buffer = io.BytesIO()
+    try:
+        with profilering.meet("png"):
+            figuur.savefig(buffer, format="png", dpi=DPI, bbox_inches="tight")
+    finally:
+        figuur.clear()
+    return buffer.getvalue()
+
+
+@gememoiseerd(cache=GRAFIEKEN)
+def teken_netto_vermogen(jaren, kopers_netto, huurders_netto):
+    """Lijngrafiek van het netto vermogen van koper en huurder, met het startkapitaal aangeduid. Geeft PNG-bytes."""
+    figuur = Figure(figsize=(6, 4))
+    as_ = figuur.subplots()
+    as_.plot(jaren, kopers_netto, label="Koper", linewidth=2, color=KLEUR_KOPER)
+    as_.plot(jaren, huurders_netto, label="Huurder", linewidth=2, color=KLEUR_HUURDER)
+
+    # 🔵 Markeer het startpunt van de koper (t = 0)
+    as_.plot(jaren[0], kopers_netto[0], "o", color="tab:grey", alpha=0.7)
+
+    # 📌 Annotatie met pijl en tekst boven het punt
+    as_.annotate(
+        f"Startkapitaal: € {kopers_netto[0]:,.0f}",
+        xy=(jaren[0], kopers_netto[0]),
+        xytext=(-len(jaren) / 7, kopers_netto[0]),  # vaste x-positie dicht bij y-as
+        arrowprops=dict(arrowstyle="->", color="tab:grey"),
+        fontsize=7,
+        color="tab:grey",
+        ha="right",
+        va="center",
+        alpha=0.7,
+    )
+
+    as_.set_xlabel("Jaar")
+    as_.set_ylabel("Netto vermogen (€)")
+    _jaar_ticks(as_, jaren)
+    _euro_as(as_)
+    as_.legend()
+    return _naar_png(figuur)
+
+
+@gememoiseerd(cache=GRAFIEKEN)
+def teken_verschil(jaren, verschillen):
+    """Staafgrafiek van het verschil in netto vermogen (koper - huurder). Geeft PNG-bytes."""
+    figuur = Figure(figsize=(6, 4))
+    as_ = figuur.subplots()
+    as_.bar(jaren, verschillen, color="gray", alpha=0.3)
+    as_.axhline(0, linestyle="--", color="black", linewidth=1)
+
+    as_.set_xlabel("Jaar")
+    as_.set_ylabel("Verschil (€)")
+    _jaar_ticks(as_, jaren)
+    _euro_as(as_)
+    return _naar_png(figuur)
+
+
+@gememoiseerd(cache=GRAFIEKEN)
+def teken_waaier(jaren, ondergrens, mediaan, bovengrens, label_band="P5 - P95"):
+    """Waaiergrafiek (fan chart) van een onzeker verschil: band tussen twee percentielen en de mediaan. Geeft PNG-bytes."""
+    figuur = Figure(figsize=(10, 4))
+    as_ = figuur.subplots()
+    as_.fill_between(jaren, ondergrens, bovengrens, color=KLEUR_KOPER, alpha=0.2, label=label_band)
+    as_.plot(jaren, mediaan, color=KLEUR_KOPER, linewidth=2, label="Mediaan")
+    as_.axhline(0, linestyle="--", color="black", linewidth=1)
+
+    as_.set_xlabel("Jaar")
+    as_.set_ylabel("Verschil (€)")
+    _euro_as(as_)
+    as_.legend()
+    return _naar_png(figuur)
+
+
+@gememoiseerd(cache=GRAFIEKEN)
+def teken_scenarios(jaren, namen, reeksen, ylabel="Verschil (€)"):
+    """Eén lijn per scenario (rij van `reeksen`, NaN na de eigen horizon) over elkaar. Geeft PNG-bytes."""
+    figuur = Figure(figsize=(10, 4))
+    as_ = figuur.subplots()
+    for naam, reeks in zip(namen, reeksen):
+        as_.plot(jaren, reeks, linewidth=2, label=naam)
+    as_.axhline(0, linestyle="--", color="black", linewidth=1)
+
+    as_.set_xlabel("Jaar")
+    as_.set_ylabel(ylabel)
+    _euro_as(as_)
+    as_.legend()
+    return _naar_png(figuur)
+
+
+@gememoiseerd(cache=GRAFIEKEN)
+def teken_tornado(labels, verschil_laag, verschil_hoog, basis):
+    """Tornadografiek: per parameter het verschil bij een lage en een hoge waarde, rond het basisverschil. Geeft PNG-bytes."""
+    figuur = Figure(figsize=(10, 0.5 + 0.35 * len(labels)))
+    as_ = figuur.subplots()
+    posities = list(range(len(labels)))[::-1]
+    as_.barh(posities, [laag - basis for laag in verschil_laag], left=basis, color=KLEUR_HUURDER, label="Lage waarde")
+    as_.barh(posities, [hoog - basis for hoog in verschil_hoog], left=basis, color=KLEUR_KOPER, label="Hoge waarde")
+    as_.axvline(basis, color="black", linewidth=1)
+
+    as_.set_yticks(posities)
+    as_.set_yticklabels(labels)
+    as_.set_xlabel("Verschil koper - huurder (€, reëel)")
+    as_.grid(True, axis="x", linestyle="--", alpha=0.5)
+    as_.xaxis.set_major_formatter(FuncFormatter(lambda x, _: f"€ {x:,.0f}"))
+    as_.legend(loc="lower center", bbox_to_anchor=(0.5, 1.0), ncol=2, frameon=False)
+    return _naar_png(figuur)
+
+
+@gememoiseerd(cache=GRAFIEKEN)
+def teken_heatmap(eigen_inbreng_pct, looptijd_jaren, waarden, optimum=None, label="Netto vermogen (€, reëel)"):
+    """
+    Heatmap van een waarde (in €) per eigen inbreng (fractie) x looptijd, met het optimum als
+    (eigen inbreng, looptijd) gemarkeerd. NaN-cellen (niet haalbaar) blijven wit. Geeft PNG-bytes.
+    """
+    figuur = Figure(figsize=(10, 5))
+    as_ = figuur.subplots()
+    vlak = as_.pcolormesh(
+        [100 * waarde for waarde in eigen_inbreng_pct], looptijd_jaren, waarden.T, shading="nearest", cmap="viridis"
+    )
+    kleurenschaal = figuur.colorbar(vlak, ax=as_, format=FuncFormatter(lambda x, _: f"€ {x:,.0f}"))
+    kleurenschaal.set_label(label)
+    if optimum is not None:
+        as_.plot(100 * optimum[0], optimum[1], marker="*", markersize=16, color="white", markeredgecolor="black", linestyle="none", label="Optimum")
+        as_.legend(loc="lower center", bbox_to_anchor=(0.5, 1.0), frameon=False)
+    as_.set_xlabel("Eigen inbreng (%)")
+    as_.set_ylabel("Looptijd lening (jaren)")
+    return _naar_png(figuur)
@@ -0,0 +1,77 @@
+# kasstromen.py
+"""
+Het kasstroomoverzicht achter de kerncijfers, jaar per jaar.
+
+Per scenario en jaar 0..tijdshorizon één rij met de velden van `batch.bereken_kasstromen`:
+de uitgaven van koper en huurder, de afbetaling opgesplitst in rente en kapitaal, stortingen en
+rendement van de beleggingen, en woningwaarde, restschuld en netto vermogen (nominaal en reëel).
+
+    for rij in kasstroom_rijen(scenario):
+        ...
+    for blok in kasstroom_blokken(scenarios):
+        schrijver.schrijf(pd.DataFrame(blok))
+
+`kasstroom_blokken` rekent per blok van `blokgrootte` scenario's in één gevectoriseerde oproep
+en geeft record batches (dicts van 1-D arrays) in lang formaat: het hele overzicht van een groot
+bestand staat nooit in het geheugen. Wegschrijven naar CSV, Parquet of XLSX doet `cli.Schrijver`;
+`als_csv` maakt de CSV-tekst van één scenario voor de downloadknop van de app.
+"""
+import csv
+import io
+
+import numpy as np
+
+from batch import JAARPERCENTAGES, bereken_kasstromen
+
+# 1000 scenario's x 51 jaar x 28 kolommen is ongeveer 11 MB per blok
+DEFAULT_BLOKGROOTTE = 1000
+
+
+def kasstroom_blokken(scenarios, blokgrootte=DEFAULT_BLOKGROOTTE, begin=0):
+    """
+    Het kasstroomoverzicht van een reeks scenario's als record batches: dicts met 1-D arrays
+    "rij" (begin + volgnummer van het scenario), "jaar" en de velden van `bereken_kasstromen`,
+    één element per scenario en jaar 0..eigen tijdshorizon.
+
+    `scenarios` is een dict met de parameters van `bereken_kasstromen` als kolommen (scalars
+    gelden voor elk scenario).
+    """
+    aantal = max((np.size(waarde) for waarde in scenarios.values()), default=0)
+    kolommen = {naam: np.broadcast_to(np.asarray(waarde, dtype=float), aantal) for naam, waarde in scenarios.items()}
+
+    for start in range(0, aantal, blokgrootte):
+        blok = {naam: waarden[start:start + blokgrootte] for naam, waarden in kolommen.items()}
+        # Eén doorloop tot de grootste horizon van het blok; kortere horizonnen worden nadien afgeknipt
+        horizonnen = blok["tijdshorizon"].astype(int)
+        kasstromen = bereken_kasstromen(**{
+            **blok,
+            **{naam: blok[naam][:, None] for naam in JAARPERCENTAGES if naam in blok},
+            "tijdshorizon": int(horizonnen.max()),
+        })
+        binnen_horizon = np.arange(horizonnen.max() + 1) <= horizonnen[:, None]
+        scenario_index, jaar = np.nonzero(binnen_horizon)
+        yield {
+            "rij": begin + start + scenario_index,
+            "jaar": jaar,
+            **{veld: reeks[binnen_horizon] for veld, reeks in kasstromen.items()},
+        }
+
+
+def kasstroom_rijen(scenario):
+    """Het kasstroomoverzicht van één scenario (dict met scalars), als één dict per jaar."""
+    for blok in kasstroom_blokken(scenario):
+        velden = {veld: reeks.tolist() for veld, reeks in blok.items() if veld != "rij"}
+        for rij in zip(*velden.values()):
+            yield dict(zip(velden, rij))
+
+
+def als_csv(rijen, scheidingsteken=","):
+    """CSV-tekst (met kopregel) voor een reeks rijen zoals `kasstroom_rijen` ze geeft."""
+    buffer = io.StringIO()
+    schrijver = None
+    for rij in rijen:
+        if schrijver is None:
+            schrijver = csv.DictWriter(buffer, fieldnames=list(rij), delimiter=scheidingsteken, lineterminator="\n")
+            schrijver.writeheader()
+        schrijver.writerow(rij)
+    return buffer.getvalue()
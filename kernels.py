@@ -0,0 +1,114 @@
+# kernels.py
+"""
+Optionele Numba-kernels voor de jaarlussen van `batch.bereken_kopen_batch` en `bereken_huur_batch`.
+
+De NumPy-versie loopt over de jaren en doet per jaar een handvol array-bewerkingen over alle
+scenario's; de kernels lopen (parallel) over de scenario's en per scenario sequentieel over de
+jaren, zonder tussenliggende arrays. Beide voeren per scenario dezelfde bewerkingen in dezelfde
+volgorde uit, dus de resultaten zijn bitgelijk.
+
+De backend is "numpy" (standaard), "numba" of "auto" (numba als het geïnstalleerd is), te kiezen
+met de omgevingsvariabele HURENOFKOPEN_BACKEND of met `kies_backend`. Zonder Numba valt elke
+keuze terug op NumPy. Numba wordt pas bij de eerste berekening geladen en gecompileerd (en op
+schijf gecachet), zodat de app er bij het opstarten niets van merkt.
+"""
+import importlib.util
+import os
+from functools import lru_cache
+
+import numpy as np
+
+BACKENDS = ("numpy", "numba", "auto")
+
+_backend = os.environ.get("HURENOFKOPEN_BACKEND", "numpy")
+
+
+def numba_beschikbaar():
+    return importlib.util.find_spec("numba") is not None
+
+
+def kies_backend(naam):
+    """Kies de backend voor de batch-jaarlussen; geeft de vorige keuze terug."""
+    global _backend
+    if naam not in BACKENDS:
+        raise ValueError(f"backend moet een van {', '.join(BACKENDS)} zijn")
+    vorige, _backend = _backend, naam
+    return vorige
+
+
+def actieve_backend():
+    """De backend die effectief gebruikt wordt: "numba" enkel als het gevraagd en geïnstalleerd is."""
+    return "numba" if _backend in ("numba", "auto") and numba_beschikbaar() else "numpy"
+
+
+@lru_cache(maxsize=None)
+def _kernels():
+    import numba
+
+    @numba.njit(parallel=True, cache=True)
+    def kopen_jaarlus(jaarinkomen, groei_inkomen, kost_tijdens_lening, kost_na_lening, looptijd_jaren, tijdshorizon, groei_belegging):
+        aantal = tijdshorizon.shape[0]
+        belegd_overschot = np.zeros(aantal)
+        totale_kost = np.zeros(aantal)
+        for index in numba.prange(aantal):
+            inkomen, belegd, kost = jaarinkomen[index], 0.0, 0.0
+            # Jaar 1 is het aankoopmoment: maandlasten en overschot starten in jaar 2
+            for jaar in range(2, int(tijdshorizon[index]) + 1):
+                inkomen *= groei_inkomen[index]
+                jaarlijkse_kost = kost_tijdens_lening[index] if looptijd_jaren[index] >= jaar else kost_na_lening[index]
+                overschot = inkomen - jaarlijkse_kost
+                if overschot < 0:
+                    overschot = 0.0
+                belegd = belegd * groei_belegging[index] + overschot
+                kost += jaarlijkse_kost
+            belegd_overschot[index] = belegd
+            totale_kost[index] = kost
+        return belegd_overschot, totale_kost
+
+    @numba.njit(parallel=True, cache=True)
+    def huur_jaarlus(totaal_gespaard, jaarhuur, jaarinkomen, vaste_kost, jaarlijkse_maandlasten, tijdshorizon,
+                     groei_belegging, groei_huur, groei_inkomen):
+        aantal = tijdshorizon.shape[0]
+        gespaard_uit = np.empty(aantal)
+        totale_kost = np.zeros(aantal)
+        for index in numba.prange(aantal):
+            gespaard, huur, inkomen, kost = totaal_gespaard[index], jaarhuur[index], jaarinkomen[index], 0.0
+            for _ in range(int(tijdshorizon[index])):
+                jaarlijkse_kost = huur + vaste_kost[index]
+                inleg = jaarlijkse_maandlasten[index] - huur
+                if inleg < 0:
+                    inleg = 0.0
+                overschot = inkomen - jaarlijkse_kost
+                if overschot < 0:
+                    overschot = 0.0
+                inleg += overschot
+                gespaard = (gespaard + inleg) * groei_belegging[index]
+                kost += jaarlijkse_kost
+                huur *= groei_huur[index]
+                inkomen *= groei_inkomen[index]
+            gespaard_uit[index] = gespaard
+            totale_kost[index] = kost
+        return gespaard_uit, totale_kost
+
+    return kopen_jaarlus, huur_jaarlus
+
+
+def _kolommen(aantal, *waarden):
+    # Eén layout (aaneengesloten float64) per argument, zodat Numba maar één versie compileert
+    return [np.ascontiguousarray(np.broadcast_to(waarde, aantal), dtype=np.float64) for waarde in waarden]
+
+
+def kopen_jaarlus(aantal, jaarinkomen, groei_inkomen, kost_tijdens_lening, kost_na_lening, looptijd_jaren, tijdshorizon, groei_belegging):
+    """Numba-versie van de jaarlus in `bereken_kopen_batch`. Geeft (belegd overschot, totale kost)."""
+    return _kernels()[0](*_kolommen(
+        aantal, jaarinkomen, groei_inkomen, kost_tijdens_lening, kost_na_lening, looptijd_jaren, tijdshorizon, groei_belegging,
+    ))
+
+
+def huur_jaarlus(aantal, totaal_gespaard, jaarhuur, jaarinkomen, vaste_kost, jaarlijkse_maandlasten, tijdshorizon,
+                 groei_belegging, groei_huur, groei_inkomen):
+    """Numba-versie van de jaarlus in `bereken_huur_batch`. Geeft (totaal gespaard, totale kost)."""
+    return _kernels()[1](*_kolommen(
+        aantal, totaal_gespaard, jaarhuur, jaarinkomen, vaste_kost, jaarlijkse_maandlasten, tijdshorizon,
+        groei_belegging, groei_huur, groei_inkomen,
+    ))
@@ -0,0 +1,184 @@
+# lening.py
+"""
+Leningverloop met gebeurtenissen: extra aflossingen, rentewijzigingen (variabele rente),
+herfinancieringen en de verkoop van de woning.
+
+Een gebeurtenis is een dict met een "soort" en een "jaar", zoals de functies hieronder ze
+maken; zo blijven ze hashbaar voor de cache en als JSON door te geven. Jaren volgen het
+kopersmodel: jaar 1 is het aankoopjaar, de eerste maandlasten vallen in jaar 2. Een
+leninggebeurtenis in jaar k geldt vanaf het begin van jaar k, vóór de maandlasten van dat
+jaar; een verkoop in jaar k gebeurt op het einde van jaar k.
+
+De gebeurtenissen delen het schema op in segmenten met een vaste rente en maandlast. Per
+segment volgt de restschuld in gesloten vorm uit `amortization.bereken_restschuld`: de
+gebeurtenissen kosten elk enkele scalaire bewerkingen, en alle jaren worden samen in één
+gevectoriseerde oproep ingevuld, ongeacht het aantal segmenten.
+"""
+import numpy as np
+
+from amortization import bereken_maandlast, bereken_restschuld
+
+LENINGGEBEURTENISSEN = ("extra_aflossing", "rentewijziging", "herfinanciering")
+
+
+def extra_aflossing(jaar, bedrag):
+    """Eenmalige kapitaalaflossing; de maandlast daalt, de einddatum blijft."""
+    return {"soort": "extra_aflossing", "jaar": jaar, "bedrag": bedrag}
+
+
+def rentewijziging(jaar, rentevoet):
+    """Nieuwe rentevoet op het openstaande kapitaal, bv. een herziening van een variabele rente."""
+    return {"soort": "rentewijziging", "jaar": jaar, "rentevoet": rentevoet}
+
+
+def variabele_rente(startjaar, rentevoeten, periode=1):
+    """Rentewijzigingen om de `periode` jaar vanaf `startjaar`, één per rentevoet."""
+    return tuple(rentewijziging(startjaar + index * periode, rentevoet) for index, rentevoet in enumerate(rentevoeten))
+
+
+def herfinanciering(jaar, rentevoet, looptijd_jaren=None, kosten=0):
+    """
+    Herfinanciering van het openstaande kapitaal aan `rentevoet`, met eenmalige `kosten`
+    (wederbeleggingsvergoeding, akte). Zonder `looptijd_jaren` blijft de einddatum behouden.
+    """
+    return {"soort": "herfinanciering", "jaar": jaar, "rentevoet": rentevoet, "looptijd_jaren": looptijd_jaren, "kosten": kosten}
+
+
+def verkoop(jaar, kosten_pct=0, woonkost_per_maand=0):
+    """
+    Verkoop van de woning op het einde van `jaar`. De restschuld wordt afgelost en de opbrengst
+    na `kosten_pct` verkoopkosten wordt belegd. Daarna vallen de eigenaarskosten weg en betaalt
+    de koper `woonkost_per_maand` (in euro's van vandaag, geïndexeerd met de inflatie).
+    """
+    return {"soort": "verkoop", "jaar": jaar, "kosten_pct": kosten_pct, "woonkost_per_maand": woonkost_per_maand}
+
+
+def zoek_verkoop(gebeurtenissen):
+    """Geef de verkoopgebeurtenis of None."""
+    verkopen = [gebeurtenis for gebeurtenis in gebeurtenissen if gebeurtenis["soort"] == "verkoop"]
+    if len(verkopen) > 1:
+        raise ValueError("er kan maar één verkoop zijn")
+    return verkopen[0] if verkopen else None
+
+
+def valideer_gebeurtenissen(gebeurtenissen):
+    """Controleer soort en jaar van de gebeurtenissen; geeft een ValueError bij een ongeldige tijdlijn."""
+    verkoopjaar = None
+    for gebeurtenis in gebeurtenissen:
+        soort, jaar = gebeurtenis.get("soort"), gebeurtenis.get("jaar")
+        if soort not in (*LENINGGEBEURTENISSEN, "verkoop"):
+            raise ValueError(f"onbekende gebeurtenis: {soort!r}")
+        if jaar != int(jaar) or jaar < (1 if soort == "verkoop" else 2):
+            raise ValueError(f"{soort}: ongeldig jaar {jaar!r} (leninggebeurtenissen vanaf jaar 2, verkoop vanaf jaar 1)")
+        if soort == "verkoop":
+            verkoopjaar = int(jaar)
+    if verkoopjaar is not None and any(g["jaar"] > verkoopjaar for g in gebeurtenissen):
+        raise ValueError(f"na de verkoop in jaar {verkoopjaar} kan er geen gebeurtenis meer volgen")
+
+
+def _restschuld(kapitaal, rentevoet, maanden, betaald):
+    # Scalaire `bereken_restschuld` in gewone floats: een NumPy-oproep per gebeurtenis zou het
+    # verloop met veel gebeurtenissen vele malen trager maken dan het verloop zonder
+    betaald = min(betaald, maanden)
+    if maanden <= 0:
+        return kapitaal
+    if rentevoet == 0:
+        return kapitaal * (1 - betaald / maanden)
+    groei = 1 + rentevoet / 12
+    factor_totaal = groei ** maanden
+    return kapitaal * (factor_totaal - groei ** betaald) / (factor_totaal - 1)
+
+
+def bereken_leningverloop(lening, rentevoet, looptijd_jaren, tijdshorizon, gebeurtenissen=()):
+    """
+    Bereken het leningverloop over jaar 1..tijdshorizon met de gegeven gebeurtenissen.
+
+    Geeft een dict met
+      - "maandlast": de maandlast bij aanvang,
+      - "maandlasten": de maandlast in elk jaar 1..tijdshorizon (0 als er niets betaald wordt),
+      - "eenmalig": de eenmalige uitgaven per jaar (extra aflossingen en herfinancieringskosten),
+      - "restschuld": de restschuld bij elke horizon 0..tijdshorizon (0 vanaf de verkoop),
+      - "verkoop": de verkoopgebeurtenis of None, en "restschuld_bij_verkoop".
+
+    Zonder gebeurtenissen is dit het schema van de oorspronkelijke rekenkern: de looptijd telt
+    vanaf het aankoopjaar, er wordt betaald in jaar 2..looptijd_jaren en bij horizon t is er
+    min(t, looptijd_jaren) - 1 jaar afbetaald. Een herfinanciering met een nieuwe looptijd
+    van n jaar in jaar k wordt in jaar k..k+n-1 volledig afbetaald.
+    """
+    if not gebeurtenissen:
+        # Eén segment: het gesloten schema rechtstreeks, zonder de segmentadministratie
+        jaren = np.arange(1, tijdshorizon + 1)
+        maandlast = float(bereken_maandlast(lening, rentevoet, looptijd_jaren))
+        restschuld = bereken_restschuld(lening, rentevoet, looptijd_jaren, (np.minimum(jaren, looptijd_jaren) - 1) * 12)
+        return {
+            "maandlast": maandlast,
+            "maandlasten": np.where((jaren >= 2) & (jaren <= looptijd_jaren), maandlast, 0.0),
+            "eenmalig": np.zeros(tijdshorizon),
+            "restschuld": np.concatenate(([float(lening)], restschuld)),
+            "verkoop": None,
+            "restschuld_bij_verkoop": 0.0,
+        }
+
+    valideer_gebeurtenissen(gebeurtenissen)
+    verkoop_gebeurtenis = zoek_verkoop(gebeurtenissen)
+    laatste_jaar = tijdshorizon if verkoop_gebeurtenis is None else min(tijdshorizon, int(verkoop_gebeurtenis["jaar"]))
+
+    # Segment: (eerste jaar, kapitaal bij aanvang, rentevoet, resterende maanden, laatste betaaljaar)
+    segmenten = [(2, float(lening), rentevoet, looptijd_jaren * 12, looptijd_jaren)]
+    eenmalig = np.zeros(tijdshorizon)
+
+    leninggebeurtenissen = sorted(
+        (g for g in gebeurtenissen if g["soort"] != "verkoop" and g["jaar"] <= laatste_jaar),
+        key=lambda g: g["jaar"],
+    )
+    for gebeurtenis in leninggebeurtenissen:
+        jaar = int(gebeurtenis["jaar"])
+        start, kapitaal, rente, maanden, einde = segmenten[-1]
+        betaald = max(min(jaar - 1, einde) - start + 1, 0) * 12
+        kapitaal = _restschuld(kapitaal, rente, maanden, betaald)
+        maanden = max(maanden - betaald, 0)
+
+        if gebeurtenis["soort"] == "extra_aflossing":
+            bedrag = min(gebeurtenis["bedrag"], kapitaal)
+            kapitaal -= bedrag
+            eenmalig[jaar - 1] += bedrag
+        else:
+            rente = gebeurtenis["rentevoet"]
+            if gebeurtenis["soort"] == "herfinanciering":
+                eenmalig[jaar - 1] += gebeurtenis["kosten"]
+                if gebeurtenis["looptijd_jaren"] is not None:
+                    maanden = gebeurtenis["looptijd_jaren"] * 12
+                    einde = jaar - 1 + gebeurtenis["looptijd_jaren"]
+
+        if segmenten[-1][0] == jaar:
+            segmenten[-1] = (jaar, kapitaal, rente, maanden, einde)
+        else:
+            segmenten.append((jaar, kapitaal, rente, maanden, einde))
+
+    # Alle jaren in één keer: zoek per jaar zijn segment en reken de restschuld in gesloten vorm
+    start, kapitaal, rente, maanden, einde = (np.array(kolom, dtype=float) for kolom in zip(*segmenten))
+    maandlast_per_segment = np.where(maanden > 0, bereken_maandlast(kapitaal, rente, np.maximum(maanden, 1) / 12), 0.0)
+
+    jaren = np.arange(1, tijdshorizon + 1)
+    segment = np.maximum(np.searchsorted(start, jaren, side="right") - 1, 0)
+    betaald = np.maximum(np.minimum(jaren, einde[segment]) - start[segment] + 1, 0) * 12
+    restschuld = bereken_restschuld(kapitaal[segment], rente[segment], maanden[segment] / 12, betaald)
+    restschuld = np.where(maanden[segment] > 0, restschuld, kapitaal[segment])
+    betaalt = (jaren >= 2) & (jaren <= einde[segment]) & (maanden[segment] > 0)
+    maandlasten = np.where(betaalt, maandlast_per_segment[segment], 0.0)
+
+    restschuld_bij_verkoop = 0.0
+    if verkoop_gebeurtenis is not None and verkoop_gebeurtenis["jaar"] <= tijdshorizon:
+        verkoopjaar = int(verkoop_gebeurtenis["jaar"])
+        restschuld_bij_verkoop = float(restschuld[verkoopjaar - 1])
+        restschuld[verkoopjaar - 1:] = 0.0
+        maandlasten[verkoopjaar:] = 0.0
+
+    return {
+        "maandlast": float(bereken_maandlast(lening, rentevoet, looptijd_jaren)),
+        "maandlasten": maandlasten,
+        "eenmalig": eenmalig,
+        "restschuld": np.concatenate(([float(lening)], restschuld)),
+        "verkoop": verkoop_gebeurtenis,
+        "restschuld_bij_verkoop": restschuld_bij_verkoop,
+    }
@@ -0,0 +1,165 @@
+# maandelijks.py
+"""
+Kopen en huren met maandresolutie: maandelijkse stortingen, maandelijkse kapitalisatie en
+indexatie op de verjaardag (huur en inkomen stijgen in maand 13, 25, ...).
+
+Alles volgt de tijdlijn van calculator.py: jaar 1 is het aankoopjaar, de maandlasten en het
+overschot van de koper starten in maand 13, de huurder belegt bij het begin van elke periode en
+de koper op het einde. `verwacht_rendement` blijft een effectief jaarrendement: per maand groeit
+een belegging met (1 + r)^(1/12), zodat een bedrag dat een heel jaar belegd staat evenveel
+opbrengt als in het jaarmodel. Het verschil met het jaarmodel komt van de stortingen: een
+maandelijkse storting renteert vanaf haar eigen maand in plaats van als één bedrag per jaar.
+
+Met `maandelijkse_stortingen=False` worden de stortingen per jaar gebundeld op het moment van
+het jaarmodel; `per_jaar` van het resultaat is dan gelijk aan `bereken_kopen_traject` en
+`bereken_huur_traject`.
+
+Er is geen lus over de maanden: de groei volgt uit cumulatieve producten van de maandfactoren
+en elke belegging uit één cumsum van verdisconteerde stortingen (zoals `bereken_belegging`).
+"""
+import numpy as np
+
+from amortization import bereken_maandlast, bereken_restschuld
+from cache import gememoiseerd
+from constants import DEFAULT_INFLATIE, DEFAULT_MAANDINKOMEN, DEFAULT_RENDEMENT, DEFAULT_VASTGOEDGROEI
+
+RESOLUTIES = ("jaar", "maand")
+
+
+def _groeifactoren(jaarlijkse_groei, maanden):
+    """(1 + g)^(m / 12) voor maand m = 0..maanden, als cumulatief product van de maandfactor."""
+    factoren = np.empty(maanden + 1)
+    factoren[0] = 1.0
+    np.cumprod(np.full(maanden, (1 + jaarlijkse_groei) ** (1 / 12)), out=factoren[1:])
+    return factoren
+
+
+def _per_maand(bedragen, positie=None):
+    """
+    Maandreeks uit één maandbedrag per jaar (indexatie op de verjaardag): elke maand van het jaar
+    hetzelfde bedrag, of met `positie` (0 = begin, 11 = einde) het jaartotaal gebundeld op die maand.
+    """
+    if positie is None:
+        return np.repeat(bedragen, 12)
+    gebundeld = np.zeros(12 * len(bedragen))
+    gebundeld[positie::12] = bedragen * 12
+    return gebundeld
+
+
+def _belegging(startbedrag, verdisconteerd, groei):
+    """
+    Waarde bij elke maand 0..n van een belegging. `verdisconteerd[k]` is storting k gedeeld door
+    de groeifactor van haar stortingsmaand; ze telt mee vanaf maand k + 1.
+    """
+    return np.concatenate(([startbedrag], groei[1:] * (startbedrag + np.cumsum(verdisconteerd))))
+
+
+def per_jaar(resultaat):
+    """Het jaaroverzicht van een maandresultaat: de maandarrays op maand 0, 12, ..., 12 x tijdshorizon."""
+    return {
+        sleutel: waarde[::12] if isinstance(waarde, np.ndarray) else waarde
+        for sleutel, waarde in resultaat.items()
+    }
+
+
+@gememoiseerd
+def bereken_kopen_maandelijks(
+    woningprijs,
+    overige_kosten_pct,
+    eigen_inbreng_pct,
+    rentevoet,
+    looptijd_jaren,
+    onroerende_voorheffing,
+    onderhoud_pct,
+    verzekering_per_jaar,
+    tijdshorizon,
+    verwacht_rendement=DEFAULT_RENDEMENT,
+    vastgoedgroei=DEFAULT_VASTGOEDGROEI,
+    maandinkomen=DEFAULT_MAANDINKOMEN,
+    inflatie=DEFAULT_INFLATIE,
+    andere_kosten_per_maand=0,
+    maandelijkse_stortingen=True
+):
+    """
+    De koper van `calculator.bereken_kopen` per maand. Geeft "maandlast" en de arrays
+    "totale_kost", "netto_vermogen", "restschuld" en "woningwaarde" bij elke maand 0..12 x tijdshorizon.
+    """
+    eigen_inbreng = woningprijs * eigen_inbreng_pct
+    overige_kosten = woningprijs * overige_kosten_pct
+    lening = woningprijs - eigen_inbreng
+    maandlast = float(bereken_maandlast(lening, rentevoet, looptijd_jaren))
+    maanden = 12 * tijdshorizon
+
+    # Per jaar (binnen een jaar is elke maand gelijk); jaar 1 is het aankoopmoment
+    jaren = np.arange(1, tijdshorizon + 1)
+    kost = np.where(jaren <= looptijd_jaren, maandlast, 0.0)
+    kost += (woningprijs * onderhoud_pct + verzekering_per_jaar + onroerende_voorheffing) / 12 + andere_kosten_per_maand
+    kost[:1] = 0.0
+    overschot = np.maximum(maandinkomen * (1 + inflatie) ** (jaren - 1) - kost, 0)
+    overschot[:1] = 0.0
+    kost, overschot = _per_maand(kost), _per_maand(overschot, None if maandelijkse_stortingen else 11)
+
+    # De koper stort op het einde van de maand: storting k op maand k + 1
+    groei = _groeifactoren(verwacht_rendement, maanden)
+    belegd = _belegging(0.0, overschot / groei[1:], groei)
+
+    # Eerste maandlast in maand 13: na maand m zijn er m - 12 maandlasten betaald, hoogstens (looptijd - 1) jaar
+    betaald = np.clip(np.arange(maanden + 1) - 12, 0, max(looptijd_jaren - 1, 0) * 12)
+    restschuld = bereken_restschuld(lening, rentevoet, looptijd_jaren, betaald)
+    woningwaarde = woningprijs * _groeifactoren(vastgoedgroei, maanden)
+
+    totale_kost = overige_kosten * (1 + groei) + np.concatenate(([0.0], np.cumsum(kost)))
+    netto_vermogen = woningwaarde - restschuld + belegd
+    # Maand 0 is vóór de aankoop, zoals horizon 0 in het jaarmodel
+    totale_kost[0] = 0.0
+    netto_vermogen[0] = eigen_inbreng + overige_kosten
+
+    return {
+        "maandlast": maandlast,
+        "totale_kost": totale_kost,
+        "netto_vermogen": netto_vermogen,
+        "restschuld": restschuld,
+        "woningwaarde": woningwaarde,
+    }
+
+
+@gememoiseerd
+def bereken_huur_maandelijks(
+    maandhuur,
+    huurindexatie,
+    verzekering_per_jaar,
+    maandlast_koper,
+    tijdshorizon,
+    woningprijs,
+    eigen_inbreng_pct,
+    overige_kosten_pct,
+    verwacht_rendement=DEFAULT_RENDEMENT,
+    maandinkomen=DEFAULT_MAANDINKOMEN,
+    inflatie=DEFAULT_INFLATIE,
+    andere_kosten_per_maand=0,
+    maandelijkse_stortingen=True
+):
+    """
+    De huurder van `calculator.bereken_huur` per maand. Geeft de arrays "totale_kost",
+    "netto_vermogen" en "belegd" bij elke maand 0..12 x tijdshorizon.
+    """
+    initieel_belegd = woningprijs * (eigen_inbreng_pct + overige_kosten_pct)
+    maanden = 12 * tijdshorizon
+
+    # Per jaar (binnen een jaar is elke maand gelijk)
+    jaren = np.arange(tijdshorizon)
+    huur = maandhuur * (1 + huurindexatie) ** jaren
+    kost = huur + verzekering_per_jaar / 12 + andere_kosten_per_maand
+    inleg = np.maximum(maandlast_koper - huur, 0) + np.maximum(maandinkomen * (1 + inflatie) ** jaren - kost, 0)
+    kost, inleg = _per_maand(kost), _per_maand(inleg, None if maandelijkse_stortingen else 0)
+
+    # De huurder stort bij het begin van de maand: storting k op maand k
+    groei = _groeifactoren(verwacht_rendement, maanden)
+    belegd = _belegging(initieel_belegd, inleg / groei[:-1], groei)
+    totale_kost = np.concatenate(([0.0], np.cumsum(kost)))
+
+    return {
+        "totale_kost": totale_kost,
+        "netto_vermogen": belegd - totale_kost,
+        "belegd": belegd,
+    }
@@ -0,0 +1,111 @@
+# montecarlo.py
+import numpy as np
+
+from batch import bereken_vergelijking_paden
+from constants import (
+    DEFAULT_AANTAL_PADEN,
+    DEFAULT_CORRELATIES,
+    DEFAULT_VOLATILITEIT_HUURINDEXATIE,
+    DEFAULT_VOLATILITEIT_INFLATIE,
+    DEFAULT_VOLATILITEIT_RENDEMENT,
+    DEFAULT_VOLATILITEIT_VASTGOEDGROEI,
+)
+
+PERCENTIELEN = (5, 50, 95)
+
+
+def trek_paden(
+    aantal_paden,
+    jaren,
+    gemiddelden,
+    volatiliteiten,
+    correlaties=DEFAULT_CORRELATIES,
+    seed=None
+):
+    """
+    Trek gecorreleerde jaarlijkse paden voor (rendement, vastgoedgroei, inflatie, huurindexatie).
+
+    Elk percentage is normaal verdeeld rond zijn gemiddelde; de correlaties worden via een
+    Cholesky-ontbinding opgelegd. Geeft vier arrays met vorm (aantal_paden, jaren).
+    """
+    rng = np.random.default_rng(seed)
+    cholesky = np.linalg.cholesky(np.asarray(correlaties, dtype=float))
+
+    schokken = rng.standard_normal((aantal_paden, jaren, len(gemiddelden))) @ cholesky.T
+    paden = np.asarray(gemiddelden) + np.asarray(volatiliteiten) * schokken
+
+    # Meer dan 100% verlies of krimp per jaar kan niet
+    paden = np.maximum(paden, -0.99)
+    return tuple(np.moveaxis(paden, -1, 0))
+
+
+def simuleer_monte_carlo(
+    woningprijs,
+    overige_kosten_pct,
+    eigen_inbreng_pct,
+    rentevoet,
+    looptijd_jaren,
+    onroerende_voorheffing,
+    onderhoud_pct,
+    verzekering_koper,
+    maandhuur,
+    huurindexatie,
+    verzekering_huurder,
+    tijdshorizon,
+    verwacht_rendement,
+    vastgoedgroei,
+    maandinkomen,
+    inflatie,
+    andere_kosten_koper=0,
+    andere_kosten_huurder=0,
+    aantal_paden=DEFAULT_AANTAL_PADEN,
+    volatiliteit_rendement=DEFAULT_VOLATILITEIT_RENDEMENT,
+    volatiliteit_vastgoedgroei=DEFAULT_VOLATILITEIT_VASTGOEDGROEI,
+    volatiliteit_inflatie=DEFAULT_VOLATILITEIT_INFLATIE,
+    volatiliteit_huurindexatie=DEFAULT_VOLATILITEIT_HUURINDEXATIE,
+    correlaties=DEFAULT_CORRELATIES,
+    seed=None
+):
+    """
+    Simuleer het verschil koper - huurder (reële euro's) over stochastische paden.
+
+    Rendement, vastgoedgroei, inflatie en huurindexatie zijn de gemiddelden van de paden.
+    Alle paden worden samen als (paden x jaren)-matrices doorgerekend. Geeft per jaar
+    0..tijdshorizon de P5/P50/P95-banden en de kans dat kopen wint.
+    """
+    rendement_paden, vastgoed_paden, inflatie_paden, huur_paden = trek_paden(
+        aantal_paden,
+        tijdshorizon,
+        gemiddelden=(verwacht_rendement, vastgoedgroei, inflatie, huurindexatie),
+        volatiliteiten=(volatiliteit_rendement, volatiliteit_vastgoedgroei, volatiliteit_inflatie, volatiliteit_huurindexatie),
+        correlaties=correlaties,
+        seed=seed,
+    )
+
+    paden = bereken_vergelijking_paden(
+        woningprijs=woningprijs,
+        overige_kosten_pct=overige_kosten_pct,
+        eigen_inbreng_pct=eigen_inbreng_pct,
+        rentevoet=rentevoet,
+        looptijd_jaren=looptijd_jaren,
+        onroerende_voorheffing=onroerende_voorheffing,
+        onderhoud_pct=onderhoud_pct,
+        verzekering_koper=verzekering_koper,
+        maandhuur=maandhuur,
+        huurindexatie=huur_paden,
+        verzekering_huurder=verzekering_huurder,
+        tijdshorizon=tijdshorizon,
+        verwacht_rendement=rendement_paden,
+        vastgoedgroei=vastgoed_paden,
+        maandinkomen=maandinkomen,
+        inflatie=inflatie_paden,
+        andere_kosten_koper=andere_kosten_koper,
+        andere_kosten_huurder=andere_kosten_huurder,
+    )
+    verschil = paden["verschil_reeel"]
+
+    return {
+        "jaren": np.arange(tijdshorizon + 1),
+        "percentielen": dict(zip(PERCENTIELEN, np.percentile(verschil, PERCENTIELEN, axis=0))),
+        "kans_kopen_wint": (verschil > 0).mean(axis=0),
+    }
@@ -0,0 +1,151 @@
+# opcentiemen.py
+import csv
+import hashlib
+import json
+import sys
+from functools import lru_cache
+from pathlib import Path
+from types import MappingProxyType
+
+from constants import BASISVOET_ONROERENDE_VOORHEFFING
+
+DATA_MAP = Path(__file__).resolve().parent / "data"
+GEMEENTE_CSV = DATA_MAP / "opcentiemen_gemeente.csv"
+PROVINCIE_CSV = DATA_MAP / "opcentiemen_provincie.csv"
+INDELING_CSV = DATA_MAP / "gemeente_provincie.csv"
+ARTEFACT = DATA_MAP / "opcentiemen.json"
+
+
+def _lees_opcentiemen(waarde):
+    waarde = float(waarde.strip().replace(",", "."))
+    if waarde < 0:
+        raise ValueError("negatief")
+    return waarde
+
+
+def _lees_csv(pad, naamkolom, waardekolom, normaliseer, lees_waarde=_lees_opcentiemen):
+    # Leest "naam;waarde" (standaard opcentiemen met decimale komma's) en valideert elke rij
+    with open(pad, encoding="utf-8-sig", newline="") as bestand:
+        lezer = csv.DictReader(bestand, delimiter=";")
+        if lezer.fieldnames != [naamkolom, waardekolom]:
+            raise ValueError(f"{pad.name}: verwachtte kolommen {naamkolom!r};{waardekolom!r}, kreeg {lezer.fieldnames}")
+
+        waarden = {}
+        for regel, rij in enumerate(lezer, start=2):
+            naam = normaliseer(rij[naamkolom].replace("\ufeff", "").strip())
+            if not naam:
+                raise ValueError(f"{pad.name}:{regel}: lege naam")
+            if naam in waarden:
+                raise ValueError(f"{pad.name}:{regel}: dubbele naam {naam!r}")
+            try:
+                waarden[naam] = lees_waarde(rij[waardekolom])
+            except (AttributeError, ValueError):
+                raise ValueError(f"{pad.name}:{regel}: ongeldige waarde {rij[waardekolom]!r} voor {naam!r}") from None
+
+    return dict(sorted(waarden.items()))
+
+
+def _bronhash(*paden):
+    sha = hashlib.sha256()
+    for pad in paden:
+        sha.update(pad.read_bytes())
+    return sha.hexdigest()
+
+
+def compileer_opcentiemen(gemeente_csv=GEMEENTE_CSV, provincie_csv=PROVINCIE_CSV, indeling_csv=INDELING_CSV, artefact=ARTEFACT):
+    """
+    Lees en valideer de opcentiemen-CSV's (BOM, spaties, dubbele namen, decimale komma's)
+    en de provincie van elke gemeente, en schrijf ze als gesorteerd JSON-artefact weg.
+    Geeft de gecompileerde data terug.
+    """
+    data = {
+        "bronhash": _bronhash(gemeente_csv, provincie_csv, indeling_csv),
+        "gemeenten": _lees_csv(gemeente_csv, "Gemeente", "Gemeentelijke Opcentiemen", str.upper),
+        "provincies": _lees_csv(provincie_csv, "Provincie", "Provinciale Opcentiemen", str),
+        "provincie_per_gemeente": _lees_csv(indeling_csv, "Gemeente", "Provincie", str.upper, str.strip),
+    }
+
+    # Elke gemeente moet precies één gekende provincie hebben
+    zonder_provincie = sorted(set(data["gemeenten"]) - set(data["provincie_per_gemeente"]))
+    onbekende_gemeenten = sorted(set(data["provincie_per_gemeente"]) - set(data["gemeenten"]))
+    onbekende_provincies = sorted(set(data["provincie_per_gemeente"].values()) - set(data["provincies"]))
+    if zonder_provincie or onbekende_gemeenten or onbekende_provincies:
+        raise ValueError(
+            f"{indeling_csv.name}: gemeenten zonder provincie {zonder_provincie}, "
+            f"onbekende gemeenten {onbekende_gemeenten}, onbekende provincies {onbekende_provincies}"
+        )
+    artefact.write_text(json.dumps(data, ensure_ascii=False, indent=1) + "\n", encoding="utf-8")
+    return data
+
+
+def artefact_is_actueel(gemeente_csv=GEMEENTE_CSV, provincie_csv=PROVINCIE_CSV, indeling_csv=INDELING_CSV, artefact=ARTEFACT):
+    """Controleer of het artefact gebouwd is uit de huidige CSV's."""
+    if not artefact.exists():
+        return False
+    return json.loads(artefact.read_text(encoding="utf-8"))["bronhash"] == _bronhash(gemeente_csv, provincie_csv, indeling_csv)
+
+
+@lru_cache(maxsize=None)
+def _laad_artefact(artefact=ARTEFACT):
+    return json.loads(Path(artefact).read_text(encoding="utf-8"))
+
+
+@lru_cache(maxsize=None)
+def laad_opcentiemen(artefact=ARTEFACT):
+    """
+    Laad het gecompileerde artefact als twee alleen-lezen dicts (gemeente en provincie
+    -> opcentiemen), alfabetisch gesorteerd. Wordt één keer per proces ingelezen.
+    """
+    data = _laad_artefact(artefact)
+    return MappingProxyType(data["gemeenten"]), MappingProxyType(data["provincies"])
+
+
+@lru_cache(maxsize=None)
+def laad_provincie_per_gemeente(artefact=ARTEFACT):
+    """Alleen-lezen dict gemeente -> provincie uit het gecompileerde artefact."""
+    return MappingProxyType(_laad_artefact(artefact)["provincie_per_gemeente"])
+
+
+@lru_cache(maxsize=None)
+def opcentiemen_tabel(artefact=ARTEFACT):
+    """
+    Alle gemeenten als kolommen: namen, provincie, gemeentelijke en provinciale opcentiemen
+    (alleen-lezen NumPy-arrays in alfabetische volgorde), voor berekeningen over alle gemeenten tegelijk.
+    """
+    # NumPy pas hier laden: de app en de dienst hebben bij het opstarten enkel de dicts nodig
+    import numpy as np
+
+    gemeenten, provincies = laad_opcentiemen(artefact)
+    provincie_per_gemeente = laad_provincie_per_gemeente(artefact)
+    tabel = {
+        "gemeente": np.array(list(gemeenten)),
+        "provincie": np.array([provincie_per_gemeente[gemeente] for gemeente in gemeenten]),
+        "gemeentelijke_opcentiemen": np.fromiter(gemeenten.values(), dtype=float, count=len(gemeenten)),
+    }
+    tabel["provinciale_opcentiemen"] = np.array([provincies[provincie] for provincie in tabel["provincie"]])
+    for kolom in tabel.values():
+        kolom.flags.writeable = False
+    return tabel
+
+
+def bereken_onroerende_voorheffing(gki, gemeente, provincie):
+    """
+    Bereken de jaarlijkse onroerende voorheffing uit het geïndexeerd kadastraal inkomen
+    en de gemeentelijke en provinciale opcentiemen.
+    """
+    gemeenten, provincies = laad_opcentiemen()
+    return onroerende_voorheffing(gki, gemeenten[gemeente], provincies[provincie])
+
+
+def onroerende_voorheffing(gki, gemeentelijke_opcentiemen, provinciale_opcentiemen):
+    """Onroerende voorheffing uit GKI en opcentiemen; werkt ook op NumPy-arrays."""
+    basisheffing = gki * BASISVOET_ONROERENDE_VOORHEFFING
+    return basisheffing * (1 + gemeentelijke_opcentiemen / 100 + provinciale_opcentiemen / 100)
+
+
+if __name__ == "__main__":
+    gecompileerd = compileer_opcentiemen()
+    print(
+        f"{ARTEFACT.name}: {len(gecompileerd['gemeenten'])} gemeenten, {len(gecompileerd['provincies'])} provincies",
+        file=sys.stderr,
+    )
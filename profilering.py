@@ -0,0 +1,163 @@
+# profilering.py
+"""
+Timers en tellers voor de fasen van een app-rerun (opcentiemen, rekenkern, grafieken, ...).
+
+    with profilering.meet("trajecten"):
+        ...
+    profilering.tel("gebeurtenissen", len(gebeurtenissen))
+
+Er wordt enkel gemeten tussen `start_rerun` en `einde_rerun`; daarbuiten geeft `meet` een
+gedeelde no-op context manager terug, zodat uitgeschakelde timers niet meer kosten dan één
+ContextVar-lookup. De meting van een rerun hoort bij de thread (en dus de sessie) die ze
+startte. Dezelfde fase mag meermaals gemeten worden: de tijden worden opgeteld.
+
+De app zet de metingen aan met HURENOFKOPEN_PROFIEL=1 of met de queryparameter `?profiel=1`.
+Met HURENOFKOPEN_PROFIEL_LOG=pad wordt elke rerun ook als JSON-regel aan dat bestand toegevoegd.
+"""
+import cProfile
+import io
+import json
+import marshal
+import os
+import pstats
+import time
+from contextvars import ContextVar
+
+from cache import RESULTATEN
+
+OMGEVINGSVARIABELE = "HURENOFKOPEN_PROFIEL"
+LOG_OMGEVINGSVARIABELE = "HURENOFKOPEN_PROFIEL_LOG"
+QUERY_PARAMETER = "profiel"
+DEFAULT_AANTAL_RERUNS = 20
+AANTAL_PROFIELREGELS = 30
+
+_meting = ContextVar("profilering_meting", default=None)
+
+
+def aan_via_omgeving():
+    return os.environ.get(OMGEVINGSVARIABELE, "") not in ("", "0")
+
+
+class _Niets:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *fout):
+        return False
+
+
+_NIETS = _Niets()
+
+
+class _Timer:
+    __slots__ = ("fasen", "fase", "start")
+
+    def __init__(self, fasen, fase):
+        self.fasen = fasen
+        self.fase = fase
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *fout):
+        self.fasen[self.fase] = self.fasen.get(self.fase, 0.0) + time.perf_counter() - self.start
+        return False
+
+
+def meet(fase):
+    """Context manager die de duur van `fase` bij de lopende meting telt (no-op zonder meting)."""
+    meting = _meting.get()
+    return _NIETS if meting is None else _Timer(meting["fasen"], fase)
+
+
+def tel(teller, aantal=1):
+    """Verhoog `teller` in de lopende meting (no-op zonder meting)."""
+    meting = _meting.get()
+    if meting is not None:
+        meting["tellers"][teller] = meting["tellers"].get(teller, 0) + aantal
+
+
+def start_rerun(profiel=False):
+    """Start de meting van een rerun; met `profiel=True` loopt ook cProfile mee."""
+    meting = {
+        "tijdstip": time.time(),
+        "fasen": {},
+        "tellers": {},
+        "_start": time.perf_counter(),
+        "_cache": (RESULTATEN.hits, RESULTATEN.misses),
+        "_profiler": None,
+    }
+    if profiel:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Er loopt al een andere profiler (bv. een debugger)
+            profiler = None
+        meting["_profiler"] = profiler
+    _meting.set(meting)
+    return meting
+
+
+def einde_rerun():
+    """
+    Sluit de lopende meting af. Geeft een dict met "tijdstip", "totaal" en de "fasen" in
+    seconden, de "tellers" (met de hits en misses van de resultatencache tijdens de rerun)
+    en, als cProfile meeliep, "profiel" (marshal-bytes zoals `cProfile.Profile.dump_stats`).
+    Geeft None als er geen meting liep.
+    """
+    meting = _meting.get()
+    if meting is None:
+        return None
+    _meting.set(None)
+    totaal = time.perf_counter() - meting["_start"]
+    profiler = meting["_profiler"]
+    if profiler is not None:
+        profiler.disable()
+        profiler.create_stats()
+
+    hits, misses = meting["_cache"]
+    resultaat = {
+        "tijdstip": meting["tijdstip"],
+        "totaal": totaal,
+        "fasen": meting["fasen"],
+        "tellers": {**meting["tellers"], "cache_hits": RESULTATEN.hits - hits, "cache_misses": RESULTATEN.misses - misses},
+        "profiel": marshal.dumps(profiler.stats) if profiler is not None else None,
+    }
+    log = os.environ.get(LOG_OMGEVINGSVARIABELE)
+    if log:
+        with open(log, "a", encoding="utf-8") as bestand:
+            bestand.write(als_json_lines([resultaat]))
+    return resultaat
+
+
+def als_json_lines(metingen):
+    """De metingen als JSON-regels, tijden in milliseconden (zonder cProfile-gegevens)."""
+    return "".join(
+        json.dumps({
+            "tijdstip": meting["tijdstip"],
+            "totaal_ms": round(meting["totaal"] * 1000, 3),
+            "fasen_ms": {fase: round(duur * 1000, 3) for fase, duur in meting["fasen"].items()},
+            "tellers": meting["tellers"],
+        }) + "\n"
+        for meting in metingen
+    )
+
+
+class _Opgeslagen:
+    # pstats.Stats leest `stats` van elk object met een `create_stats`
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def profiel_als_tekst(profiel, regels=AANTAL_PROFIELREGELS, sorteer="cumulative"):
+    """De duurste functies uit de marshal-bytes van `einde_rerun`, zoals `python -m pstats` ze toont."""
+    uitvoer = io.StringIO()
+    pstats.Stats(_Opgeslagen(marshal.loads(profiel)), stream=uitvoer).sort_stats(sorteer).print_stats(regels)
+    return uitvoer.getvalue()
@@ -0,0 +1,37 @@
+# rangschikking.py
+import numpy as np
+
+from batch import bereken_vergelijking_batch
+from cache import gememoiseerd
+from opcentiemen import onroerende_voorheffing, opcentiemen_tabel
+
+
+@gememoiseerd
+def rangschik_gemeenten(scenario, gki):
+    """
+    Bereken de onroerende voorheffing en de uitkomst huren versus kopen voor elke gemeente
+    tegelijk, bij dezelfde woningprijs, hetzelfde GKI en dezelfde andere invoer.
+
+    `scenario` bevat de invoer van `batch.bereken_vergelijking_batch` zonder
+    `onroerende_voorheffing`. De voorheffing is een array over alle gemeenten (met de
+    provincie van elke gemeente) en gaat in één batch-oproep door het model.
+
+    Geeft een dict met kolommen, gesorteerd van de gemeente waar kopen het meest oplevert
+    (grootste reële verschil koper - huurder) naar de minste, plus de rang (1 = beste).
+    """
+    tabel = opcentiemen_tabel()
+    voorheffing = onroerende_voorheffing(gki, tabel["gemeentelijke_opcentiemen"], tabel["provinciale_opcentiemen"])
+    resultaat = bereken_vergelijking_batch(**scenario, onroerende_voorheffing=voorheffing)
+
+    volgorde = np.argsort(-resultaat["verschil_reeel"], kind="stable")
+    return {
+        "rang": np.arange(1, len(volgorde) + 1),
+        "gemeente": tabel["gemeente"][volgorde],
+        "provincie": tabel["provincie"][volgorde],
+        "gemeentelijke_opcentiemen": tabel["gemeentelijke_opcentiemen"][volgorde],
+        "provinciale_opcentiemen": tabel["provinciale_opcentiemen"][volgorde],
+        "onroerende_voorheffing": voorheffing[volgorde],
+        "koper_netto_vermogen": resultaat["koper_netto_vermogen"][volgorde],
+        "huurder_netto_vermogen": resultaat["huurder_netto_vermogen"][volgorde],
+        "verschil_reeel": resultaat["verschil_reeel"][volgorde],
+    }
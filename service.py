@@ -0,0 +1,269 @@
+# service.py
+"""
+Lokale JSON/HTTP-dienst rond de rekenkern, voor tools die de cijfers nodig hebben zonder Streamlit.
+
+    python service.py --poort 8765
+
+    POST /bereken      één scenario als JSON-object -> resultaat als JSON-object
+    POST /gemeenten    scenario met `gki` i.p.v. de voorheffing -> alle gemeenten, gerangschikt
+    GET  /opcentiemen  de beschikbare gemeenten en provincies
+    GET  /gezondheid   {"status": "ok"}
+
+Een scenario bevat de parameters van `batch.bereken_vergelijking_batch`. In plaats van
+`onroerende_voorheffing` mag het `gemeente`, `provincie` en `gki` bevatten. Verbindingen blijven
+open (HTTP/1.1 keep-alive). Verzoeken die binnen een kort venster binnenkomen, worden
+gebundeld tot één gevectoriseerde batch-berekening.
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import math
+import sys
+from http import HTTPStatus
+
+import numpy as np
+
+from batch import bereken_vergelijking_batch
+from constants import MAX_LOOPTIJD_JAREN, MAX_TIJDSHORIZON
+from opcentiemen import bereken_onroerende_voorheffing, laad_opcentiemen
+from rangschikking import rangschik_gemeenten
+
+PARAMETERS = inspect.signature(bereken_vergelijking_batch).parameters
+VERPLICHT = [naam for naam, parameter in PARAMETERS.items() if parameter.default is inspect.Parameter.empty]
+VOORHEFFING_VELDEN = ("gemeente", "provincie", "gki")
+# Gehele aantallen jaren met hun grenzen: een te grote horizon legt de hele bundel stil
+JAARVELDEN = {"tijdshorizon": MAX_TIJDSHORIZON, "looptijd_jaren": MAX_LOOPTIJD_JAREN}
+
+DEFAULT_VENSTER_MS = 2.0
+DEFAULT_MAX_BUNDEL = 4096
+MAX_LICHAAM = 64 * 1024
+
+
+class OngeldigVerzoek(ValueError):
+    pass
+
+
+def lees_scenario(gegevens, zonder=()):
+    """
+    Zet een JSON-object om naar de argumenten van `bereken_vergelijking_batch`, behalve de
+    parameters in `zonder`. Leidt de onroerende voorheffing af uit gemeente, provincie en GKI
+    als ze niet gegeven is.
+    """
+    if not isinstance(gegevens, dict):
+        raise OngeldigVerzoek("verwachtte een JSON-object")
+    gegevens = dict(gegevens)
+    parameters = {naam: parameter for naam, parameter in PARAMETERS.items() if naam not in zonder}
+
+    if "onroerende_voorheffing" not in gegevens and all(veld in gegevens for veld in VOORHEFFING_VELDEN):
+        gemeente, provincie, gki = (gegevens.pop(veld) for veld in VOORHEFFING_VELDEN)
+        try:
+            gegevens["onroerende_voorheffing"] = bereken_onroerende_voorheffing(lees_getal("gki", gki), str(gemeente).upper(), provincie)
+        except KeyError as fout:
+            raise OngeldigVerzoek(f"onbekende gemeente of provincie: {fout.args[0]}") from None
+
+    onbekend = sorted(set(gegevens) - set(parameters))
+    if onbekend:
+        raise OngeldigVerzoek(f"onbekende velden: {', '.join(onbekend)}")
+    ontbrekend = [naam for naam in VERPLICHT if naam in parameters and naam not in gegevens]
+    if ontbrekend:
+        raise OngeldigVerzoek(f"ontbrekende velden: {', '.join(ontbrekend)}")
+
+    scenario = {}
+    for naam, parameter in parameters.items():
+        scenario[naam] = lees_getal(naam, gegevens.get(naam, parameter.default))
+    for naam, maximum in JAARVELDEN.items():
+        if naam in scenario and not (1 <= scenario[naam] <= maximum and scenario[naam] == int(scenario[naam])):
+            raise OngeldigVerzoek(f"{naam} moet een geheel getal van 1 tot {maximum} zijn")
+    return scenario
+
+
+def lees_getal(naam, waarde):
+    """Een eindig JSON-getal als float; `json.loads` aanvaardt ook NaN en Infinity."""
+    if isinstance(waarde, bool) or not isinstance(waarde, (int, float)):
+        raise OngeldigVerzoek(f"{naam} moet een getal zijn")
+    waarde = float(waarde)
+    if not math.isfinite(waarde):
+        raise OngeldigVerzoek(f"{naam} moet een eindig getal zijn")
+    return waarde
+
+
+def bereken_bundel(scenarios):
+    """Bereken een lijst scenario's in één batch-oproep. Geeft een lijst resultaat-dicts."""
+    kolommen = {naam: np.array([scenario[naam] for scenario in scenarios]) for naam in PARAMETERS}
+    kolommen["tijdshorizon"] = kolommen["tijdshorizon"].astype(int)
+    resultaat = bereken_vergelijking_batch(**kolommen)
+    return [dict(zip(resultaat.dtype.names, map(float, rij))) for rij in resultaat.tolist()]
+
+
+class Bundelaar:
+    """
+    Verzamelt scenario's van gelijktijdige verzoeken. Het eerste scenario opent een venster van
+    `venster_ms`; alles wat in dat venster binnenkomt (tot `max_bundel`) wordt samen berekend.
+    De berekening draait in een thread, zodat de event loop nieuwe verzoeken blijft aannemen.
+    """
+
+    def __init__(self, venster_ms=DEFAULT_VENSTER_MS, max_bundel=DEFAULT_MAX_BUNDEL):
+        self.venster = venster_ms / 1000
+        self.max_bundel = max_bundel
+        self._wachtend = []
+        self._timer = None
+        self.bundels = 0
+        self.scenarios = 0
+
+    async def bereken(self, scenario):
+        toekomst = asyncio.get_running_loop().create_future()
+        self._wachtend.append((scenario, toekomst))
+        if len(self._wachtend) >= self.max_bundel:
+            self._verstuur()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.venster, self._verstuur)
+        return await toekomst
+
+    def _verstuur(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        bundel, self._wachtend = self._wachtend, []
+        if bundel:
+            self.bundels += 1
+            self.scenarios += len(bundel)
+            asyncio.get_running_loop().create_task(self._bereken(bundel))
+
+    async def _bereken(self, bundel):
+        try:
+            resultaten = await asyncio.to_thread(bereken_bundel, [scenario for scenario, _ in bundel])
+        except Exception as fout:
+            if len(bundel) > 1:
+                # Eén fout scenario mag de rest van de bundel niet meesleuren: elk apart opnieuw
+                await asyncio.gather(*(self._bereken([verzoek]) for verzoek in bundel))
+                return
+            _, toekomst = bundel[0]
+            if not toekomst.done():
+                toekomst.set_exception(fout)
+            return
+        for (_, toekomst), resultaat in zip(bundel, resultaten):
+            if not toekomst.done():
+                toekomst.set_result(resultaat)
+
+
+class Dienst:
+    """Minimale HTTP/1.1-server op asyncio-streams met keep-alive en JSON-antwoorden."""
+
+    def __init__(self, bundelaar=None):
+        self.bundelaar = bundelaar or Bundelaar()
+        gemeenten, provincies = laad_opcentiemen()
+        self._opcentiemen = json.dumps({"gemeenten": list(gemeenten), "provincies": list(provincies)}).encode()
+
+    async def behandel_verbinding(self, lezer, schrijver):
+        try:
+            while True:
+                verzoek = await self._lees_verzoek(lezer)
+                if verzoek is None:
+                    break
+                methode, pad, versie, headers, lichaam = verzoek
+                status, antwoord = await self._beantwoord(methode, pad, lichaam)
+
+                verbinding = headers.get("connection", "").lower()
+                open_houden = verbinding == "keep-alive" if versie == "HTTP/1.0" else verbinding != "close"
+                schrijver.write(
+                    f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(antwoord)}\r\n"
+                    f"Connection: {'keep-alive' if open_houden else 'close'}\r\n\r\n".encode("latin-1")
+                    + antwoord
+                )
+                await schrijver.drain()
+                if not open_houden:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            schrijver.close()
+
+    async def _lees_verzoek(self, lezer):
+        regel = await lezer.readline()
+        if not regel.strip():
+            return None
+        methode, pad, versie = regel.decode("latin-1").split()
+        headers = {}
+        while (regel := await lezer.readline()) not in (b"\r\n", b"\n", b""):
+            naam, _, waarde = regel.decode("latin-1").partition(":")
+            headers[naam.strip().lower()] = waarde.strip()
+        lengte = int(headers.get("content-length", 0))
+        if lengte > MAX_LICHAAM:
+            raise ValueError("verzoek te groot")
+        lichaam = await lezer.readexactly(lengte) if lengte else b""
+        return methode, pad.split("?", 1)[0], versie, headers, lichaam
+
+    async def _beantwoord(self, methode, pad, lichaam):
+        if pad == "/gezondheid" and methode == "GET":
+            return HTTPStatus.OK, b'{"status": "ok"}'
+        if pad == "/opcentiemen" and methode == "GET":
+            return HTTPStatus.OK, self._opcentiemen
+        if pad not in ("/bereken", "/gemeenten"):
+            return HTTPStatus.NOT_FOUND, _fout("onbekend pad")
+        if methode != "POST":
+            return HTTPStatus.METHOD_NOT_ALLOWED, _fout("gebruik POST")
+
+        try:
+            gegevens = json.loads(lichaam or b"null")
+            if pad == "/gemeenten":
+                gki = lees_getal("gki", gegevens.pop("gki", None) if isinstance(gegevens, dict) else None)
+                scenario = lees_scenario(gegevens, zonder=("onroerende_voorheffing",))
+            else:
+                scenario = lees_scenario(gegevens)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return HTTPStatus.BAD_REQUEST, _fout("ongeldige JSON")
+        except OngeldigVerzoek as fout:
+            return HTTPStatus.BAD_REQUEST, _fout(str(fout))
+
+        try:
+            if pad == "/gemeenten":
+                # Al gevectoriseerd over alle gemeenten: niet bundelen, wel buiten de event loop
+                rangschikking = await asyncio.to_thread(rangschik_gemeenten, scenario, gki)
+                resultaat = [dict(zip(rangschikking, rij)) for rij in zip(*(kolom.tolist() for kolom in rangschikking.values()))]
+            else:
+                resultaat = await self.bundelaar.bereken(scenario)
+        except (ValueError, FloatingPointError) as fout:
+            return HTTPStatus.UNPROCESSABLE_ENTITY, _fout(str(fout))
+        try:
+            # Kale NaN of Infinity is geen geldige JSON
+            return HTTPStatus.OK, json.dumps(resultaat, allow_nan=False).encode()
+        except ValueError:
+            return HTTPStatus.UNPROCESSABLE_ENTITY, _fout("het resultaat is niet eindig voor deze invoer")
+
+
+def _fout(boodschap):
+    return json.dumps({"fout": boodschap}).encode()
+
+
+async def start(host="127.0.0.1", poort=8765, bundelaar=None):
+    """Start de dienst en geef de `asyncio.Server` terug."""
+    dienst = Dienst(bundelaar)
+    return await asyncio.start_server(dienst.behandel_verbinding, host, poort, limit=MAX_LICHAAM)
+
+
+async def _draai(args):
+    server = await start(args.host, args.poort, Bundelaar(args.venster_ms, args.max_bundel))
+    print(f"Luistert op http://{args.host}:{args.poort}", file=sys.stderr)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--poort", type=int, default=8765)
+    parser.add_argument("--venster-ms", type=float, default=DEFAULT_VENSTER_MS, help="bundelvenster in milliseconden")
+    parser.add_argument("--max-bundel", type=int, default=DEFAULT_MAX_BUNDEL, help="maximum aantal scenario's per bundel")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_draai(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,99 +1,767 @@
-from calculator import bereken_kopen, bereken_huur
-
-# Parameters
-tijdshorizon = 20
-
-# Kopen scenario
-resultaat_kopen = bereken_kopen(
-    woningprijs = 300_000,
-    overige_kosten_pct = 0.07,         
-    eigen_inbreng_pct = 0.20,
-    rentevoet = 0.03,
-    looptijd_jaren = 25,
-    onroerende_voorheffing = 1000,
-    onderhoud_pct = 0.01,
-    verzekering_per_jaar = 400,
-    tijdshorizon = tijdshorizon,
-)
+import asyncio
+import json
+from pathlib import Path
 
-# Huur scenario
-resultaat_huur = bereken_huur(
-    maandhuur = 1000,
-    huurindexatie = 0.02,
-    verzekering_per_jaar = 200,
-    maandlast_koper = resultaat_kopen["maandlast"],
-    tijdshorizon = tijdshorizon,
-)
+import numpy as np
+import pytest
 
-# Print resultaten
-print("🏠 Kopen")
-print(f"Totale kost: €{resultaat_kopen['totale_kost']:,.0f}")
-print(f"Netto vermogen: €{resultaat_kopen['netto_vermogen']:,.0f}\n")
-
-print("🏡 Huren")
-print(f"Totale kost: €{resultaat_huur['totale_kost']:,.0f}")
-print(f"Netto vermogen: €{resultaat_huur['netto_vermogen']:,.0f}")
-
-
-from calculator import bereken_kopen, bereken_huur
-import matplotlib.pyplot as plt
-
-# Parameters
-tijdshorizon = 20
-woningprijs = 300_000
-overige_kosten_pct = 0.07
-eigen_inbreng_pct = 0.20
-rentevoet = 0.03
-looptijd_jaren = 25
-onroerende_voorheffing = 1000
-onderhoud_pct = 0.01
-verzekering_kopen = 400
-verzekering_huur = 200
-maandhuur = 1000
-huurindexatie = 0.02
-verwacht_rendement = 0.04
-vastgoedgroei = 0.02
-maandinkomen = 3000
-
-# Simuleer jaar-op-jaar evolutie
-kopers_netto = []
-huurders_netto = []
-
-for jaar in range(1, tijdshorizon + 1):
-    koper = bereken_kopen(
-    woningprijs=woningprijs,
-    overige_kosten_pct=overige_kosten_pct,
-    eigen_inbreng_pct=eigen_inbreng_pct,
-    rentevoet=rentevoet,
-    looptijd_jaren=looptijd_jaren,
-    onroerende_voorheffing=onroerende_voorheffing,
-    onderhoud_pct=onderhoud_pct,
-    verzekering_per_jaar=verzekering_kopen,
-    tijdshorizon=jaar,
-    verwacht_rendement=verwacht_rendement,
-    vastgoedgroei=vastgoedgroei,
-    maandinkomen=maandinkomen
+import cli
+import kernels
+import profilering
+import service
+from amortization import bereken_aflossingstabel, bereken_maandlast
+from backtest import bereken_backtest, laad_historiek
+import breakeven
+from financiering import optimaliseer_financiering
+from gevoeligheid import bereken_gevoeligheid, verstoorde_waarden
+from cache import LRUCache, _canoniek, gememoiseerd
+from batch import bereken_vergelijking_batch, bereken_vergelijking_paden
+from kasstromen import als_csv, kasstroom_blokken, kasstroom_rijen
+from constants import DEFAULT_CORRELATIES
+from opcentiemen import artefact_is_actueel, bereken_onroerende_voorheffing, compileer_opcentiemen
+from calculator import bereken_huur, bereken_huur_traject, bereken_kopen, bereken_kopen_traject
+from lening import bereken_leningverloop, extra_aflossing, herfinanciering, variabele_rente
+from vooruitrekenen import Vooruitrekenaar, buren
+from voorberekend import bereken_vergelijking, bouw_rooster, laad_rooster, rooster_is_actueel
+from werkruimte import bereken_werkruimte, bewaar_scenario, lege_werkruimte, verwijder_scenario
+from rangschikking import rangschik_gemeenten
+from montecarlo import simuleer_monte_carlo, trek_paden
+from maandelijks import bereken_huur_maandelijks, bereken_kopen_maandelijks, per_jaar
+
+# Golden values, vastgelegd met `python benchmarks/regressie.py --golden-bijwerken`
+GOLDEN = json.loads((Path(__file__).resolve().parent / "benchmarks" / "golden.json").read_text())
+FUNCTIES = {"bereken_kopen": bereken_kopen, "bereken_huur": bereken_huur}
+
+
+@pytest.mark.parametrize(
+    "geval",
+    GOLDEN["gevallen"],
+    ids=lambda g: f"{g['functie']}-r{g['invoer'].get('rentevoet', '')}-l{g['invoer'].get('looptijd_jaren', '')}-h{g['invoer']['tijdshorizon']}",
 )
+def test_golden_values(geval):
+    uitvoer = FUNCTIES[geval["functie"]](**geval["invoer"])
+    for sleutel, verwacht in geval["uitvoer"].items():
+        assert uitvoer[sleutel] == pytest.approx(verwacht, rel=1e-9, abs=1e-6), sleutel
+
+
+def test_evolutie_gelijk_aan_berekening_per_jaar():
+    evolutie = GOLDEN["evolutie"]
+    tijdshorizon = len(evolutie["kopers_netto"])
+
+    koper = bereken_kopen_traject(**{**evolutie["kopen"], "tijdshorizon": tijdshorizon})
+    huurder = bereken_huur_traject(
+        **{**evolutie["huur"], "tijdshorizon": tijdshorizon, "maandlast_koper": koper["maandlast"]}
+    )
+
+    assert koper["netto_vermogen"][:tijdshorizon] == pytest.approx(evolutie["kopers_netto"], rel=1e-9)
+    assert huurder["netto_vermogen"][:tijdshorizon] == pytest.approx(evolutie["huurders_netto"], rel=1e-9)
+
+
+
+def _leningverloop_per_maand(lening, rentevoet, looptijd_jaren, tijdshorizon, gebeurtenissen):
+    # Referentie: maand per maand, met de maandlast herberekend na elke gebeurtenis
+    saldo, maanden, einde, restschuld = lening, looptijd_jaren * 12, looptijd_jaren, [lening]
+    for jaar in range(1, tijdshorizon + 1):
+        for gebeurtenis in (g for g in gebeurtenissen if g["jaar"] == jaar):
+            if gebeurtenis["soort"] == "extra_aflossing":
+                saldo -= gebeurtenis["bedrag"]
+            else:
+                rentevoet = gebeurtenis["rentevoet"]
+                if gebeurtenis.get("looptijd_jaren"):
+                    maanden, einde = gebeurtenis["looptijd_jaren"] * 12, jaar - 1 + gebeurtenis["looptijd_jaren"]
+        if 2 <= jaar <= einde:
+            maandrente = rentevoet / 12
+            maandlast = saldo * maandrente / (1 - (1 + maandrente) ** -maanden)
+            for _ in range(12):
+                saldo, maanden = saldo * (1 + maandrente) - maandlast, maanden - 1
+        restschuld.append(saldo)
+    return restschuld
+
+
+def test_leningverloop_met_gebeurtenissen():
+    gebeurtenissen = (
+        extra_aflossing(5, 40_000),
+        *variabele_rente(6, [0.04, 0.05, 0.025], periode=3),
+        herfinanciering(15, 0.02, looptijd_jaren=10, kosten=2_500),
+    )
+    verloop = bereken_leningverloop(300_000, 0.03, 25, 30, gebeurtenissen)
+
+    assert verloop["restschuld"] == pytest.approx(_leningverloop_per_maand(300_000, 0.03, 25, 30, gebeurtenissen), abs=1e-6)
+    assert verloop["restschuld"][-1] == pytest.approx(0, abs=1e-6)
+    assert verloop["eenmalig"][[4, 14]] == pytest.approx([40_000, 2_500])
+
+
+def test_backends_bitgelijk():
+    pytest.importorskip("numba")
+    rng = np.random.default_rng(1)
+    aantal = 500
+    scenarios = dict(
+        woningprijs=rng.uniform(150_000, 800_000, aantal),
+        overige_kosten_pct=rng.uniform(0.02, 0.15, aantal),
+        eigen_inbreng_pct=rng.uniform(0.0, 0.5, aantal),
+        rentevoet=rng.uniform(0.0, 0.07, aantal),
+        looptijd_jaren=rng.integers(1, 41, aantal),
+        onroerende_voorheffing=rng.uniform(500, 3_000, aantal),
+        onderhoud_pct=0.015,
+        verzekering_koper=400,
+        maandhuur=rng.uniform(500, 2_500, aantal),
+        huurindexatie=rng.uniform(0.0, 0.04, aantal),
+        verzekering_huurder=200,
+        tijdshorizon=rng.integers(0, 41, aantal),
+        verwacht_rendement=rng.uniform(-0.02, 0.12, aantal),
+        maandinkomen=rng.uniform(1_500, 10_000, aantal),
+    )
+    resultaten = {}
+    for backend in ("numpy", "numba"):
+        vorige = kernels.kies_backend(backend)
+        try:
+            resultaten[backend] = bereken_vergelijking_batch(**scenarios)
+        finally:
+            kernels.kies_backend(vorige)
+    for veld in resultaten["numpy"].dtype.names:
+        assert np.array_equal(resultaten["numpy"][veld], resultaten["numba"][veld]), veld
+
+
+@pytest.mark.parametrize("rentevoet,looptijd_jaren,tijdshorizon", [(0.035, 25, 30), (0.0, 10, 15), (0.05, 30, 1)])
+def test_maandresolutie(rentevoet, looptijd_jaren, tijdshorizon):
+    kopen = dict(
+        woningprijs=350_000, overige_kosten_pct=0.1, eigen_inbreng_pct=0.2, rentevoet=rentevoet,
+        looptijd_jaren=looptijd_jaren, onroerende_voorheffing=1_200, onderhoud_pct=0.015,
+        verzekering_per_jaar=400, tijdshorizon=tijdshorizon, verwacht_rendement=0.03, maandinkomen=3_000,
+        inflatie=0.02, andere_kosten_per_maand=100,
+    )
+    koper_jaar = bereken_kopen_traject(**kopen)
+    huren = dict(
+        maandhuur=1_100, huurindexatie=0.02, verzekering_per_jaar=200, maandlast_koper=koper_jaar["maandlast"],
+        tijdshorizon=tijdshorizon, woningprijs=350_000, eigen_inbreng_pct=0.2, overige_kosten_pct=0.1,
+    )
+    huurder_jaar = bereken_huur_traject(**huren)
+
+    # Met per jaar gebundelde stortingen is het jaaroverzicht het jaarmodel
+    koper = per_jaar(bereken_kopen_maandelijks(**kopen, maandelijkse_stortingen=False))
+    huurder = per_jaar(bereken_huur_maandelijks(**huren, maandelijkse_stortingen=False))
+    for sleutel in ("totale_kost", "netto_vermogen", "restschuld"):
+        assert koper[sleutel] == pytest.approx(koper_jaar[sleutel], rel=1e-9, abs=1e-6), sleutel
+    for sleutel in ("totale_kost", "netto_vermogen"):
+        assert huurder[sleutel] == pytest.approx(huurder_jaar[sleutel], rel=1e-9, abs=1e-6), sleutel
+
+    # Maandelijks: de belegging van de koper tegenover een lus over de maanden
+    koper = bereken_kopen_maandelijks(**kopen)
+    groei, belegd = 1.03 ** (1 / 12), 0.0
+    for maand in range(12 * tijdshorizon):
+        jaar = maand // 12 + 1
+        kost = (koper["maandlast"] if jaar <= looptijd_jaren else 0) + (350_000 * 0.015 + 400 + 1_200) / 12 + 100
+        belegd = belegd * groei + (max(3_000 * 1.02 ** (jaar - 1) - kost, 0) if jaar > 1 else 0)
+    netto = koper["woningwaarde"][-1] - koper["restschuld"][-1] + belegd
+    assert koper["netto_vermogen"][-1] == pytest.approx(netto, rel=1e-9)
+    assert bereken_kopen(**kopen, resolutie="maand")["netto_vermogen"] == pytest.approx(netto, rel=1e-9)
+
+
+def test_profilering():
+    # Zonder lopende meting zijn timers en tellers no-ops
+    with profilering.meet("niets"):
+        profilering.tel("niets")
+    assert profilering.einde_rerun() is None
+
+    profilering.start_rerun(profiel=True)
+    for _ in range(2):
+        with profilering.meet("fase"):
+            sum(range(1000))
+    profilering.tel("teller", 3)
+    meting = profilering.einde_rerun()
+
+    assert set(meting["fasen"]) == {"fase"} and 0 < meting["fasen"]["fase"] <= meting["totaal"]
+    assert meting["tellers"]["teller"] == 3
+    regel = json.loads(profilering.als_json_lines([meting]))
+    assert regel["fasen_ms"]["fase"] == pytest.approx(meting["fasen"]["fase"] * 1000, abs=1e-3)
+    assert "cumulative" in profilering.profiel_als_tekst(meting["profiel"])
+
+
+def test_vooruitrekenen():
+    scenario = {"woningprijs": 380_000, "rentevoet": 0.03, "tijdshorizon": 1}
+    assert [buur for _, buur in buren(scenario, [("rentevoet", -1), ("tijdshorizon", 0)])] == [
+        {**scenario, "rentevoet": 0.0299}, {**scenario, "rentevoet": 0.0301}, {**scenario, "tijdshorizon": 2},
+    ]
+
+    berekend = []
+    vooruitrekenaar = Vooruitrekenaar(max_in_uitvoering=2)
+    vooruitrekenaar.registreer("taak", berekend.append)
+    assert vooruitrekenaar.plan(scenario) == 2
+    vooruitrekenaar.wacht()
+    vooruitrekenaar.plan({**scenario, "woningprijs": 379_000})
+    vooruitrekenaar.wacht()
+    # Na een daling van de woningprijs komt de volgende stap omlaag eerst
+    assert berekend[-2]["woningprijs"] == 378_000 and vooruitrekenaar.statistieken()["recent"] == ["woningprijs"]
+    assert vooruitrekenaar.statistieken()["lopend"] == 0
+
 
+def test_werkruimte_gelijk_aan_batch():
+    basis = dict(
+        woningprijs=380_000, overige_kosten_pct=0.12, eigen_inbreng_pct=0.2, rentevoet=0.03, looptijd_jaren=25,
+        onroerende_voorheffing=743.33, onderhoud_pct=0.01, verzekering_koper=300, maandhuur=1000,
+        huurindexatie=0.02, verzekering_huurder=200, tijdshorizon=20,
+    )
+    scenarios = {
+        "basis": basis,
+        "duurder": {**basis, "woningprijs": 450_000, "tijdshorizon": 35, "inflatie": 0.03},
+        "kort": {**basis, "rentevoet": 0.045, "tijdshorizon": 5, "verwacht_rendement": 0.07},
+    }
+    werkruimte = lege_werkruimte()
+    for naam, scenario in scenarios.items():
+        werkruimte = bewaar_scenario(werkruimte, naam, scenario, gemeente="aalst", provincie="oost-vlaanderen", gki=2500)
+    werkruimte = bewaar_scenario(werkruimte, "basis", {**basis, "maandhuur": 1100})
+    scenarios["basis"]["maandhuur"] = 1100
+
+    resultaat = bereken_werkruimte(werkruimte)
+    assert list(resultaat["naam"]) == list(scenarios) and len(resultaat["jaren"]) == 36
+    for i, scenario in enumerate(scenarios.values()):
+        batch = bereken_vergelijking_batch(**scenario)
+        assert resultaat["eind_verschil_reeel"][i] == pytest.approx(batch["verschil_reeel"], rel=1e-10)
+        assert resultaat["maandlast"][i] == pytest.approx(batch["maandlast"], rel=1e-12)
+        assert np.isnan(resultaat["verschil_reeel"][i, scenario["tijdshorizon"] + 1:]).all()
+
+    assert list(verwijder_scenario(werkruimte, "kort")["naam"]) == ["basis", "duurder"]
+    with pytest.raises(ValueError):
+        bewaar_scenario(werkruimte, "onvolledig", {"woningprijs": 300_000})
+
+
+def test_kasstromen():
+    scenario = dict(
+        woningprijs=380_000, overige_kosten_pct=0.12, eigen_inbreng_pct=0.2, rentevoet=0.03, looptijd_jaren=10,
+        onroerende_voorheffing=743.33, onderhoud_pct=0.01, verzekering_koper=300, maandhuur=1000,
+        huurindexatie=0.02, verzekering_huurder=200, tijdshorizon=15, andere_kosten_koper=50,
+    )
+    rijen = list(kasstroom_rijen(scenario))
+    assert [rij["jaar"] for rij in rijen] == list(range(16))
+
+    koper = bereken_kopen(
+        scenario["woningprijs"], scenario["overige_kosten_pct"], scenario["eigen_inbreng_pct"], scenario["rentevoet"],
+        scenario["looptijd_jaren"], scenario["onroerende_voorheffing"], scenario["onderhoud_pct"],
+        scenario["verzekering_koper"], scenario["tijdshorizon"], andere_kosten_per_maand=50,
+    )
     huurder = bereken_huur(
-    maandhuur=maandhuur,
-    huurindexatie=huurindexatie,
-    verzekering_per_jaar=verzekering_huur,
-    maandlast_koper=koper["maandlast"],
-    tijdshorizon=jaar,
-    verwacht_rendement=verwacht_rendement,
-    maandinkomen=maandinkomen
-)
+        scenario["maandhuur"], scenario["huurindexatie"], scenario["verzekering_huurder"], koper["maandlast"],
+        scenario["tijdshorizon"], scenario["woningprijs"], scenario["eigen_inbreng_pct"], scenario["overige_kosten_pct"],
+    )
+    assert rijen[-1]["koper_netto_vermogen"] == pytest.approx(koper["netto_vermogen"], rel=1e-10)
+    assert rijen[-1]["koper_totale_kost"] == pytest.approx(koper["totale_kost"], rel=1e-10)
+    assert rijen[-1]["huurder_netto_vermogen"] == pytest.approx(huurder["netto_vermogen"], rel=1e-10)
+    for vorige, rij in zip(rijen, rijen[1:]):
+        assert rij["koper_rente"] + rij["koper_aflossing"] == pytest.approx(rij["koper_afbetaling"])
+        assert rij["koper_belegd"] == pytest.approx(vorige["koper_belegd"] + rij["koper_overschot"] + rij["koper_rendement"])
+        assert rij["huurder_belegd"] == pytest.approx(vorige["huurder_belegd"] + rij["huurder_inleg"] + rij["huurder_rendement"])
+    # Rente en kapitaal komen uit het aflossingsschema: jaar t betaalt leningjaar t - 1
+    tabel = bereken_aflossingstabel(380_000 * 0.8, 0.03, 10)
+    assert [rij["koper_rente"] for rij in rijen[2:11]] == pytest.approx(tabel["rente_per_jaar"][:9], rel=1e-12)
+    for vorige, rij in zip(rijen, rijen[1:]):
+        assert rij["koper_aflossing"] == pytest.approx(vorige["restschuld"] - rij["restschuld"], abs=1e-6)
+    # De laatste afbetaling valt in jaar `looptijd_jaren`, daarna blijven enkel de vaste kosten
+    assert rijen[11]["koper_afbetaling"] == 0 and rijen[10]["koper_afbetaling"] > 0
+
+    csv = als_csv(rijen)
+    assert csv.count("\n") == 17 and csv.startswith("jaar,woningwaarde,")
+
+    # Blokken over scenario's met elk hun eigen horizon, ook over de blokgrens heen
+    horizonnen = np.array([0, 3, 50, 7, 1])
+    blokken = list(kasstroom_blokken({**scenario, "tijdshorizon": horizonnen}, blokgrootte=2, begin=100))
+    assert len(blokken) == 3
+    rij = np.concatenate([blok["rij"] for blok in blokken])
+    assert np.array_equal(np.bincount(rij - 100), horizonnen + 1)
+    eind = np.concatenate([blok["verschil_reeel"][np.r_[blok["rij"][1:] != blok["rij"][:-1], True]] for blok in blokken])
+    batch = bereken_vergelijking_batch(**{**scenario, "tijdshorizon": horizonnen})
+    assert eind == pytest.approx(batch["verschil_reeel"], rel=1e-10)
+
+
+def test_maandlast_vereist_looptijd():
+    assert bereken_maandlast(120_000, 0.0, 10) == pytest.approx(1000)
+    with pytest.raises(ValueError):
+        bereken_maandlast(100_000, 0.03, 0)
+    with pytest.raises(ValueError):
+        bereken_maandlast(100_000, 0.03, np.array([10, 0]))
+
+
+def test_batch_gelijk_aan_calculator():
+    rng = np.random.default_rng(3)
+    aantal = 200
+    scenarios = dict(
+        woningprijs=rng.uniform(150_000, 800_000, aantal),
+        overige_kosten_pct=rng.uniform(0.02, 0.15, aantal),
+        eigen_inbreng_pct=rng.uniform(0.0, 0.5, aantal),
+        rentevoet=rng.uniform(0.0, 0.07, aantal),
+        looptijd_jaren=rng.integers(1, 41, aantal),
+        onroerende_voorheffing=rng.uniform(500, 3_000, aantal),
+        onderhoud_pct=rng.uniform(0.0, 0.02, aantal),
+        verzekering_koper=rng.uniform(0, 800, aantal),
+        maandhuur=rng.uniform(500, 2_500, aantal),
+        huurindexatie=rng.uniform(0.0, 0.04, aantal),
+        verzekering_huurder=rng.uniform(0, 400, aantal),
+        tijdshorizon=rng.integers(0, 51, aantal),
+        verwacht_rendement=rng.uniform(-0.02, 0.12, aantal),
+        vastgoedgroei=rng.uniform(-0.01, 0.06, aantal),
+        maandinkomen=rng.uniform(1_500, 10_000, aantal),
+        inflatie=rng.uniform(0.0, 0.05, aantal),
+        andere_kosten_koper=rng.uniform(0, 200, aantal),
+        andere_kosten_huurder=rng.uniform(0, 200, aantal),
+    )
+    batch = bereken_vergelijking_batch(**scenarios)
+    for i in range(aantal):
+        s = {naam: waarden[i].item() for naam, waarden in scenarios.items()}
+        koper = bereken_kopen.__wrapped__(
+            s["woningprijs"], s["overige_kosten_pct"], s["eigen_inbreng_pct"], s["rentevoet"], s["looptijd_jaren"],
+            s["onroerende_voorheffing"], s["onderhoud_pct"], s["verzekering_koper"], s["tijdshorizon"],
+            s["verwacht_rendement"], s["vastgoedgroei"], s["maandinkomen"], s["inflatie"], s["andere_kosten_koper"],
+        )
+        huurder = bereken_huur.__wrapped__(
+            s["maandhuur"], s["huurindexatie"], s["verzekering_huurder"], koper["maandlast"], s["tijdshorizon"],
+            s["woningprijs"], s["eigen_inbreng_pct"], s["overige_kosten_pct"], s["verwacht_rendement"],
+            s["maandinkomen"], s["inflatie"], s["andere_kosten_huurder"],
+        )
+        assert batch["koper_netto_vermogen"][i] == pytest.approx(koper["netto_vermogen"], rel=1e-10)
+        assert batch["koper_totale_kost"][i] == pytest.approx(koper["totale_kost"], rel=1e-10, abs=1e-6)
+        assert batch["huurder_netto_vermogen"][i] == pytest.approx(huurder["netto_vermogen"], rel=1e-10)
+        assert batch["huurder_totale_kost"][i] == pytest.approx(huurder["totale_kost"], rel=1e-10, abs=1e-6)
+
+
+def _vergelijkingsscenario(**wijzigingen):
+    scenario = dict(
+        woningprijs=380_000, overige_kosten_pct=0.12, eigen_inbreng_pct=0.2, rentevoet=0.03, looptijd_jaren=25,
+        onroerende_voorheffing=743.33, onderhoud_pct=0.01, verzekering_koper=300, maandhuur=1000,
+        huurindexatie=0.02, verzekering_huurder=200, tijdshorizon=20,
+    )
+    return {**scenario, **wijzigingen}
+
+
+@pytest.mark.parametrize("tijdshorizon", [-1, 2.5, 101, float("nan"), float("inf")])
+def test_batch_weigert_ongeldige_horizon(tijdshorizon):
+    with pytest.raises(ValueError):
+        bereken_vergelijking_batch(**{**_vergelijkingsscenario(), "tijdshorizon": np.array([10, tijdshorizon])})
+    with pytest.raises(ValueError):
+        bereken_vergelijking_paden(**{**_vergelijkingsscenario(), "tijdshorizon": tijdshorizon})
+
+
+def test_trek_paden():
+    gemiddelden = (0.06, 0.03, 0.02, 0.02)
+    volatiliteiten = (0.1, 0.05, 0.01, 0.01)
+    paden = np.stack(trek_paden(20_000, 10, gemiddelden, volatiliteiten, seed=1))
+    assert paden.shape == (4, 20_000, 10)
+    # Correlaties, gemiddelden en spreiding volgen de invoer
+    assert np.corrcoef(paden.reshape(4, -1)) == pytest.approx(np.array(DEFAULT_CORRELATIES), abs=0.02)
+    assert paden.mean(axis=(1, 2)) == pytest.approx(gemiddelden, abs=0.002)
+    assert paden.std(axis=(1, 2)) == pytest.approx(volatiliteiten, rel=0.02)
+
+    # Reproduceerbaar met dezelfde seed, anders met een andere
+    def trek(seed):
+        return np.stack(trek_paden(100, 5, gemiddelden, volatiliteiten, seed=seed))
+
+    assert np.array_equal(trek(7), trek(7))
+    assert not np.array_equal(trek(7), trek(8))
+
+    # Meer dan 100% verlies per jaar wordt afgeknipt op -99%
+    extreem = np.stack(trek_paden(1_000, 5, (0.0,) * 4, (2.0,) * 4, seed=2))
+    assert extreem.min() == -0.99 and (extreem == -0.99).any()
+
+
+def test_monte_carlo_zonder_volatiliteit_is_deterministisch():
+    scenario = _vergelijkingsscenario(verwacht_rendement=0.06, vastgoedgroei=0.03, maandinkomen=4_000, inflatie=0.02)
+    simulatie = simuleer_monte_carlo(
+        **scenario, aantal_paden=50, volatiliteit_rendement=0, volatiliteit_vastgoedgroei=0,
+        volatiliteit_inflatie=0, volatiliteit_huurindexatie=0, seed=0,
+    )
+    verwacht = bereken_vergelijking_paden(**scenario)["verschil_reeel"]
+    for percentiel in simulatie["percentielen"].values():
+        assert percentiel == pytest.approx(verwacht, rel=1e-10, abs=1e-6)
+    assert np.array_equal(simulatie["kans_kopen_wint"], (verwacht > 0).astype(float))
+
+
+def test_breakeven_status_en_residu():
+    scenario = _vergelijkingsscenario()
+    zonder = {naam: waarde for naam, waarde in scenario.items() if naam != "maandhuur"}
+
+    resultaat = breakeven.zoek_breakeven("maandhuur", {**zonder, "tijdshorizon": np.array([5, 20, 40])})
+    assert list(resultaat["status"]) == [breakeven.GEVONDEN] * 3
+    # Bij de gevonden huur zijn koper en huurder (bijna) even rijk, op een eurocent per miljoen
+    controle = bereken_vergelijking_batch(**{**zonder, "tijdshorizon": np.array([5, 20, 40])}, maandhuur=resultaat["breakeven"])
+    assert np.abs(controle["verschil_reeel"]).max() < 1e-3
+    assert resultaat["residu"] == pytest.approx(controle["verschil_reeel"], abs=1e-6)
+
+    # Tekenwissel maar te weinig iteraties: geen stille NaN, maar een status
+    te_kort = breakeven.zoek_breakeven("maandhuur", zonder, max_iteraties=2)
+    assert np.isnan(te_kort["breakeven"]) and te_kort["status"] == breakeven.NIET_GECONVERGEERD
+
+    # Geen omslagpunt binnen het standaard zoekinterval van de rentevoet
+    geen = breakeven.zoek_breakeven("rentevoet", {naam: waarde for naam, waarde in scenario.items() if naam != "rentevoet"})
+    assert np.isnan(geen["breakeven"]) and geen["status"] == breakeven.GEEN_TEKENWISSEL
+
+
+def test_lru_cache():
+    # Eviction op aantal items: de minst recent gebruikte gaat eerst
+    cache = LRUCache(max_items=2, max_bytes=1_000)
+    cache.zet("a", 1, 10)
+    cache.zet("b", 2, 10)
+    assert cache.haal("a") == (True, 1)
+    cache.zet("c", 3, 10)
+    assert cache.haal("b") == (False, None) and cache.haal("a") == (True, 1)
+    assert cache.statistieken()["evicties"] == 1
+
+    # Eviction op bytes, en een item groter dan het hele budget wordt niet bewaard
+    cache = LRUCache(max_items=10, max_bytes=100)
+    for sleutel in "abc":
+        cache.zet(sleutel, sleutel, 40)
+    assert [cache.haal(sleutel)[0] for sleutel in "abc"] == [False, True, True]
+    cache.zet("groot", 0, 101)
+    assert cache.haal("groot") == (False, None) and cache.statistieken()["bytes"] == 80
+
+    statistieken = cache.statistieken()
+    assert (statistieken["hits"], statistieken["misses"]) == (2, 2)
+    assert statistieken["hit_ratio"] == 0.5
+
+
+def test_gememoiseerd():
+    oproepen = []
+
+    @gememoiseerd(cache=LRUCache())
+    def reken(x, factor=2.0):
+        oproepen.append(x)
+        return {"waarde": np.arange(3) * factor}
+
+    eerste = reken(0.1 + 0.2)
+    # Afronding op 10 decimalen: 0.1 + 0.2 en 0.3 delen een sleutel, net als het ingevulde standaardargument
+    assert reken(0.3, factor=2.0)["waarde"] is eerste["waarde"] and oproepen == [0.1 + 0.2]
+    assert reken.cache.statistieken()["hits"] == 1
+    with pytest.raises(ValueError):
+        eerste["waarde"][0] = 1
+    # Het teruggegeven dict is een kopie: een sessie kan er sleutels aan toevoegen zonder de cache te raken
+    eerste["extra"] = 1
+    assert "extra" not in reken(0.3)
+
+    assert _canoniek(0.3, 10) == _canoniek(0.1 + 0.2, 10) and _canoniek(0.3, 10) != _canoniek(0.3000001, 10)
+    assert _canoniek(float("nan"), 10) == _canoniek(float("nan"), 10)
+    assert _canoniek(np.array([1.0, np.nan]), 10) == _canoniek(np.array([1.0, np.nan]), 10)
+    assert _canoniek(np.array([1.0, 2.0]), 10) != _canoniek(np.array([[1.0, 2.0]]), 10)
+    assert _canoniek({"b": 1, "a": [1, 2]}, 10) == _canoniek({"a": (1, 2), "b": 1}, 10)
+    with pytest.raises(TypeError):
+        _canoniek(object(), 10)
+
+
+def _opcentiemen_csvs(map_, gemeenten):
+    (map_ / "gemeente.csv").write_text("\ufeffGemeente;Gemeentelijke Opcentiemen\n" + gemeenten, encoding="utf-8")
+    (map_ / "provincie.csv").write_text("Provincie;Provinciale Opcentiemen\nLimburg;214,52\n", encoding="utf-8")
+    (map_ / "indeling.csv").write_text("Gemeente;Provincie\nGENK;Limburg\nHASSELT; Limburg\n", encoding="utf-8")
+    return dict(
+        gemeente_csv=map_ / "gemeente.csv", provincie_csv=map_ / "provincie.csv",
+        indeling_csv=map_ / "indeling.csv", artefact=map_ / "opcentiemen.json",
+    )
+
+
+@pytest.mark.parametrize("gemeenten,fout", [
+    ("GENK;900\nHASSELT;-1\n", "ongeldige waarde '-1'"),
+    ("GENK;900\n genk ;950\nHASSELT;800\n", "dubbele naam 'GENK'"),
+    ("GENK;900\n \ufeff;950\nHASSELT;800\n", "lege naam"),
+    ("GENK;negen\nHASSELT;800\n", "ongeldige waarde"),
+    ("GENK;900\n", "gemeenten zonder provincie"),
+])
+def test_opcentiemen_validatie(tmp_path, gemeenten, fout):
+    with pytest.raises(ValueError, match=fout):
+        compileer_opcentiemen(**_opcentiemen_csvs(tmp_path, gemeenten))
+
+
+def test_opcentiemen_compileren(tmp_path):
+    # BOM, spaties rond namen en waarden, kleine letters en decimale komma's worden genormaliseerd
+    paden = _opcentiemen_csvs(tmp_path, " hasselt ; 800,5 \n\ufeffGenk;900\n")
+    data = compileer_opcentiemen(**paden)
+    assert data["gemeenten"] == {"GENK": 900.0, "HASSELT": 800.5}
+    assert data["provincies"] == {"Limburg": 214.52}
+    assert data["provincie_per_gemeente"] == {"GENK": "Limburg", "HASSELT": "Limburg"}
+
+    assert artefact_is_actueel(**paden)
+    paden["gemeente_csv"].write_text("Gemeente;Gemeentelijke Opcentiemen\nGENK;901\nHASSELT;800\n", encoding="utf-8")
+    assert not artefact_is_actueel(**paden)
+
+
+def test_gevoeligheid_tornado():
+    scenario = _vergelijkingsscenario(verwacht_rendement=0.06, inflatie=0.02, looptijd_jaren=3)
+    gevoeligheid = bereken_gevoeligheid(scenario)
+
+    impact = np.abs(gevoeligheid["verschil_hoog"] - gevoeligheid["verschil_laag"])
+    assert list(impact) == sorted(impact, reverse=True)
+    assert sorted(gevoeligheid["parameters"]) == sorted(naam for naam in scenario if naam != "tijdshorizon")
+    assert gevoeligheid["basis"] == pytest.approx(bereken_vergelijking_batch(**scenario)["verschil_reeel"], rel=1e-12)
+
+    # Elke balk is het scenario met enkel die parameter verstoord, binnen de geldige grenzen
+    for index, naam in enumerate(gevoeligheid["parameters"]):
+        for kant in ("laag", "hoog"):
+            waarde = gevoeligheid[f"waarde_{kant}"][index]
+            verwacht = bereken_vergelijking_batch(**{**scenario, naam: waarde})["verschil_reeel"]
+            assert gevoeligheid[f"verschil_{kant}"][index] == pytest.approx(verwacht, rel=1e-12), (naam, kant)
+    assert verstoorde_waarden("looptijd_jaren", 3) == (1, 8)
+    assert verstoorde_waarden("eigen_inbreng_pct", 0.995) == pytest.approx((0.985, 1.0))
+
+
+def test_backtest_vensters(tmp_path):
+    pad = tmp_path / "historiek.csv"
+    regels = ["Jaar;Rendement;Vastgoedgroei;Inflatie;Hypotheekrente"]
+    for index, jaar in enumerate(range(2000, 2008)):
+        regels.append(f"{jaar};{2 + index:.1f};{1 + index / 2:.1f};{1 + index / 4:.2f};{5 - index / 4:.2f}".replace(".", ","))
+    pad.write_text("\n".join(regels), encoding="utf-8")
+    historiek = laad_historiek(pad)
+    assert historiek["huurindexatie"] is historiek["inflatie"]
+
+    scenario = _vergelijkingsscenario(maandinkomen=4_000, tijdshorizon=5)
+    backtest = bereken_backtest(scenario, historiek)
+    assert list(backtest["aantal_startjaren"]) == [8, 8, 7, 6, 5, 4]
+
+    # Elk startjaar rekent met de reeksen vanaf dat jaar en de hypotheekrente van dat jaar
+    for start in range(8):
+        horizon = min(5, 8 - start)
+        venster = slice(start, start + horizon)
+        verwacht = bereken_vergelijking_paden(**{
+            **scenario,
+            "tijdshorizon": horizon,
+            "verwacht_rendement": historiek["verwacht_rendement"][venster],
+            "vastgoedgroei": historiek["vastgoedgroei"][venster],
+            "inflatie": historiek["inflatie"][venster],
+            "huurindexatie": historiek["huurindexatie"][venster],
+            "rentevoet": historiek["rentevoet"][start],
+        })["verschil_reeel"]
+        assert backtest["verschil_reeel"][start, :horizon + 1] == pytest.approx(verwacht, rel=1e-12), start
+        assert np.isnan(backtest["verschil_reeel"][start, horizon + 1:]).all()
+
+    with pytest.raises(ValueError):
+        bereken_backtest({**scenario, "tijdshorizon": 9}, historiek)
+
+
+def test_rangschikking_gelijk_aan_gemeente_per_gemeente():
+    scenario = _vergelijkingsscenario(maandinkomen=4_000)
+    del scenario["onroerende_voorheffing"]
+    rangschikking = rangschik_gemeenten(scenario, 2_500)
+    assert list(rangschikking["rang"]) == list(range(1, len(rangschikking["gemeente"]) + 1))
+
+    verschillen = []
+    for gemeente, provincie in zip(rangschikking["gemeente"], rangschikking["provincie"]):
+        voorheffing = bereken_onroerende_voorheffing(2_500, gemeente, provincie)
+        verschillen.append(float(bereken_vergelijking_batch(**scenario, onroerende_voorheffing=voorheffing)["verschil_reeel"]))
+    assert rangschikking["verschil_reeel"] == pytest.approx(verschillen, rel=1e-12)
+    assert verschillen == sorted(verschillen, reverse=True)
+
+
+@pytest.mark.parametrize("doel", ["koper", "verschil"])
+def test_financiering_optimum(doel):
+    scenario = _vergelijkingsscenario(maandinkomen=4_000, verwacht_rendement=0.06, inflatie=0.02)
+    optimum = optimaliseer_financiering(scenario, eigen_inbreng_bereik=(0.1, 0.5), doel=doel)
+    assert optimum["haalbaar"] and optimum["maandlast"] <= optimum["max_maandlast"]
+    assert optimum["waarde"] >= np.nanmax(optimum["landschap"]["waarde"])
+
+    # Brute kracht over een fijn rooster met dezelfde doelfunctie
+    inbreng, looptijd = np.meshgrid(np.linspace(0.1, 0.5, 401), np.arange(1, 41), indexing="ij")
+    resultaat = bereken_vergelijking_batch(**{**scenario, "eigen_inbreng_pct": inbreng, "looptijd_jaren": looptijd})
+    if doel == "verschil":
+        waarde = resultaat["verschil_reeel"]
+    else:
+        niet_ingebracht = (0.5 - inbreng) * scenario["woningprijs"] * 1.06 ** 20
+        waarde = (resultaat["koper_netto_vermogen"] + niet_ingebracht) / 1.02 ** 20
+    waarde = np.where(resultaat["maandlast"] <= 4_000 / 3, waarde, -np.inf)
+    beste = np.argmax(waarde)
+    assert optimum["looptijd_jaren"] == looptijd.flat[beste]
+    assert optimum["eigen_inbreng_pct"] == pytest.approx(inbreng.flat[beste], abs=0.001)
+    assert optimum["waarde"] == pytest.approx(waarde.flat[beste], rel=1e-5)
+
+
+async def _stuur_verzoeken(verzoeken, bundelaar=None):
+    # Alle verzoeken na elkaar over één keep-alive-verbinding; geeft (status, antwoord) per verzoek
+    server = await service.start(poort=0, bundelaar=bundelaar)
+    lezer, schrijver = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+    antwoorden = []
+    for pad, lichaam in verzoeken:
+        schrijver.write(f"POST {pad} HTTP/1.1\r\nContent-Length: {len(lichaam)}\r\n\r\n".encode() + lichaam)
+        status = int((await lezer.readline()).split()[1])
+        headers = {}
+        while (regel := await lezer.readline()) != b"\r\n":
+            naam, _, waarde = regel.decode().partition(":")
+            headers[naam.lower()] = waarde.strip()
+        assert headers["connection"] == "keep-alive"
+        antwoorden.append((status, json.loads(await lezer.readexactly(int(headers["content-length"])))))
+    schrijver.close()
+    await schrijver.wait_closed()
+    server.close()
+    await server.wait_closed()
+    return antwoorden
+
+
+def test_dienst_valideert_invoer():
+    scenario = _vergelijkingsscenario()
+    verzoeken = [
+        ("/bereken", json.dumps(scenario).encode()),
+        ("/bereken", json.dumps({**scenario, "tijdshorizon": float("nan")}).encode()),
+        ("/bereken", json.dumps({**scenario, "tijdshorizon": float("inf")}).encode()),
+        ("/bereken", json.dumps({**scenario, "rentevoet": float("nan")}).encode()),
+        ("/bereken", json.dumps({**scenario, "looptijd_jaren": 0}).encode()),
+        ("/bereken", json.dumps({**scenario, "tijdshorizon": 2_000_000}).encode()),
+        ("/gemeenten", json.dumps({**scenario, "gki": float("inf")}).encode()),
+        ("/bereken", json.dumps({**scenario, "inflatie": -1}).encode()),
+        ("/bereken", b"{"),
+    ]
+    with np.errstate(divide="ignore"):
+        antwoorden = asyncio.run(_stuur_verzoeken(verzoeken))
+    assert [status for status, _ in antwoorden] == [200, 400, 400, 400, 400, 400, 400, 422, 400]
+    assert antwoorden[0][1]["verschil_reeel"] == pytest.approx(float(bereken_vergelijking_batch(**scenario)["verschil_reeel"]))
+    assert antwoorden[1][1] == {"fout": "tijdshorizon moet een eindig getal zijn"}
+    assert antwoorden[5][1] == {"fout": "tijdshorizon moet een geheel getal van 1 tot 100 zijn"}
+
+
+def test_dienst_isoleert_fouten_in_bundel(monkeypatch):
+    bereken_bundel = service.bereken_bundel
+
+    def faalt_bij_negatieve_prijs(scenarios):
+        if any(scenario["woningprijs"] < 0 for scenario in scenarios):
+            raise ValueError("negatieve woningprijs")
+        return bereken_bundel(scenarios)
+
+    monkeypatch.setattr(service, "bereken_bundel", faalt_bij_negatieve_prijs)
+    bundelaar = service.Bundelaar(venster_ms=50)
+    scenario = service.lees_scenario(_vergelijkingsscenario())
+
+    async def gelijktijdig():
+        return await asyncio.gather(
+            bundelaar.bereken(scenario), bundelaar.bereken({**scenario, "woningprijs": -1.0}), bundelaar.bereken(scenario),
+            return_exceptions=True,
+        )
+
+    goed, fout, ook_goed = asyncio.run(gelijktijdig())
+    assert bundelaar.bundels == 1 and bundelaar.scenarios == 3
+    assert isinstance(fout, ValueError)
+    assert goed == ook_goed and goed["verschil_reeel"] == pytest.approx(float(bereken_vergelijking_batch(**scenario)["verschil_reeel"]))
+
+
+def test_voorberekend_rooster(tmp_path):
+    rooster, metadata = tmp_path / "rooster.npy", tmp_path / "rooster.json"
+    assert laad_rooster(rooster, metadata, bouwen=False) is None and not metadata.exists()
+
+    # Zonder rooster wordt het bij het eerste gebruik gebouwd
+    scenario = {**laad_rooster(rooster, metadata)[0]["basis"], "woningprijs": 412_345.0, "rentevoet": 0.03321, "tijdshorizon": 17}
+    assert rooster_is_actueel(rooster, metadata)
+    foutgrens = json.loads(metadata.read_text())["foutgrens"]
+
+    # Binnen het rooster: geïnterpoleerd, binnen de foutgrens van het exacte model; op een roosterpunt exact
+    rng = np.random.default_rng(0)
+    for woningprijs, rentevoet, tijdshorizon in zip(rng.uniform(200_000, 600_000, 200), rng.uniform(0.02, 0.05, 200), rng.integers(10, 31, 200)):
+        punt = {**scenario, "woningprijs": woningprijs, "rentevoet": rentevoet, "tijdshorizon": int(tijdshorizon)}
+        geinterpoleerd = bereken_vergelijking(punt, rooster=rooster, metadata=metadata)
+        exact = bereken_vergelijking(punt, exact=True)
+        assert geinterpoleerd["bron"] == "rooster" and exact["bron"] == "exact"
+        for veld, grens in foutgrens.items():
+            assert abs(geinterpoleerd[veld] - exact[veld]) <= grens + 1e-6, veld
+    knoop = {**scenario, "woningprijs": 300_000.0, "rentevoet": 0.035}
+    assert bereken_vergelijking(knoop, rooster=rooster, metadata=metadata)["verschil_reeel"] == pytest.approx(
+        bereken_vergelijking(knoop, exact=True)["verschil_reeel"], rel=1e-12
+    )
+
+    # Buiten het rooster, of met andere invoer dan de basis: exact
+    for buiten in ({"woningprijs": 650_000.0}, {"rentevoet": 0.06}, {"tijdshorizon": 35}, {"maandhuur": 1_100}):
+        assert bereken_vergelijking({**scenario, **buiten}, rooster=rooster, metadata=metadata)["bron"] == "exact"
+
+    # Een rooster van een ander model wordt niet gebruikt, maar opnieuw gebouwd
+    rooster, metadata = tmp_path / "oud.npy", tmp_path / "oud.json"
+    bouw_rooster(rooster, metadata)
+    verouderd = json.loads(metadata.read_text())
+    metadata.write_text(json.dumps({**verouderd, "modelhash": "ander model"}))
+    assert not rooster_is_actueel(rooster, metadata)
+    assert laad_rooster(rooster, metadata, bouwen=False) is None
+    assert bereken_vergelijking(scenario, rooster=rooster, metadata=metadata)["bron"] == "rooster"
+    assert rooster_is_actueel(rooster, metadata)
+
+
+def _aflossingsschema_per_maand(lening, rentevoet, looptijd_jaren):
+    # Referentie: maand per maand, zoals een bank het schema opstelt
+    maanden = looptijd_jaren * 12
+    maandlast = lening / maanden if rentevoet == 0 else lening * (rentevoet / 12) / (1 - (1 + rentevoet / 12) ** -maanden)
+    schuld, rente, aflossing, restschuld = lening, [], [], [lening]
+    for _ in range(maanden):
+        rente.append(schuld * rentevoet / 12)
+        aflossing.append(maandlast - rente[-1])
+        schuld -= aflossing[-1]
+        restschuld.append(schuld)
+    return maandlast, np.array(rente), np.array(aflossing), np.array(restschuld)
+
+
+@pytest.mark.parametrize("rentevoet,looptijd_jaren", [(0.035, 25), (0.0, 10), (0.08, 1)])
+def test_aflossingstabel(rentevoet, looptijd_jaren):
+    tabel = bereken_aflossingstabel(250_000, rentevoet, looptijd_jaren)
+    maandlast, rente, aflossing, restschuld = _aflossingsschema_per_maand(250_000, rentevoet, looptijd_jaren)
+    assert tabel["maandlast"] == pytest.approx(maandlast, rel=1e-12)
+    assert tabel["rente_per_maand"] == pytest.approx(rente, abs=1e-6)
+    assert tabel["aflossing_per_maand"] == pytest.approx(aflossing, abs=1e-6)
+    assert tabel["restschuld_per_maand"] == pytest.approx(restschuld, abs=1e-6)
+    assert tabel["rente_per_jaar"] == pytest.approx(rente.reshape(-1, 12).sum(axis=1), abs=1e-6)
+    assert tabel["aflossing_per_jaar"] == pytest.approx(aflossing.reshape(-1, 12).sum(axis=1), abs=1e-6)
+    assert tabel["restschuld_per_jaar"] == pytest.approx(restschuld[::12], abs=1e-6)
+    assert tabel["aflossing_per_jaar"].sum() == pytest.approx(250_000)
+
+
+def test_aflossingstabel_met_verschillende_looptijden():
+    # Over scenario's met elk hun looptijd: het schema loopt tot de langste, met nullen daarna
+    tabel = bereken_aflossingstabel(np.array([100_000, 200_000]), np.array([0.03, 0.0]), np.array([2, 5]))
+    assert tabel["rente_per_jaar"].shape == (2, 5)
+    kort = bereken_aflossingstabel(100_000, 0.03, 2)
+    assert tabel["aflossing_per_jaar"][0, :2] == pytest.approx(kort["aflossing_per_jaar"], rel=1e-12)
+    assert np.all(tabel["rente_per_jaar"][0, 2:] == 0) and np.all(tabel["aflossing_per_jaar"][0, 2:] == 0)
+    assert tabel["restschuld_per_jaar"][0, 2:] == pytest.approx(0, abs=1e-6)
+    assert tabel["aflossing_per_jaar"][1] == pytest.approx(np.full(5, 40_000))
+
+
+def _scenariobestand(pad, rijen):
+    kolommen = list(_vergelijkingsscenario()) + ["klant"]
+    regels = [",".join(kolommen)] + [",".join(str(rij.get(kolom, "")) for kolom in kolommen) for rij in rijen]
+    pad.write_text("\n".join(regels) + "\n")
+    return pad
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_cli_schrijft_ongeldige_rijen_met_fout(tmp_path, workers):
+    rijen = [
+        {**_vergelijkingsscenario(), "klant": "a"},
+        {**_vergelijkingsscenario(looptijd_jaren=0), "klant": "b"},
+        {**_vergelijkingsscenario(tijdshorizon=""), "klant": "c"},
+        {**_vergelijkingsscenario(tijdshorizon=5, maandhuur="veel"), "klant": "d"},
+        {**_vergelijkingsscenario(tijdshorizon=5), "klant": "e"},
+    ]
+    invoer = _scenariobestand(tmp_path / "scenarios.csv", rijen)
+    vorige = kernels.kies_backend("auto")
+    try:
+        aantal, ongeldig = cli.verwerk(
+            invoer, tmp_path / "resultaten.csv", traject=tmp_path / "trajecten.csv", workers=workers, blokgrootte=2,
+            backend="numpy", kasstromen=tmp_path / "kasstromen.csv",
+        )
+        # De backend van het hoofdproces blijft ongewijzigd
+        assert kernels.kies_backend(vorige) == "auto"
+    finally:
+        kernels.kies_backend(vorige)
+    assert (aantal, ongeldig) == (5, 3)
+
+    import pandas as pd
+
+    resultaten = pd.read_csv(tmp_path / "resultaten.csv", keep_default_na=False, na_values=[""])
+    assert resultaten["rij"].tolist() == [0, 1, 2, 3, 4]
+    assert resultaten["klant"].tolist() == list("abcde")
+    assert resultaten["fout"].fillna("").tolist() == [
+        "",
+        "looptijd_jaren moet een geheel getal van 1 tot 100 zijn",
+        "tijdshorizon ontbreekt",
+        "maandhuur moet een getal zijn",
+        "",
+    ]
+    assert resultaten.loc[[1, 2, 3], "verschil_reeel"].isna().all()
+    for index, horizon in ((0, 20), (4, 5)):
+        verwacht = bereken_vergelijking_batch(**_vergelijkingsscenario(tijdshorizon=horizon))
+        assert resultaten.loc[index, "verschil_reeel"] == pytest.approx(float(verwacht["verschil_reeel"]), rel=1e-12)
+
+    trajecten = pd.read_csv(tmp_path / "trajecten.csv")
+    kasstromen = pd.read_csv(tmp_path / "kasstromen.csv")
+    for uitvoer in (trajecten, kasstromen):
+        assert uitvoer.groupby("rij")["jaar"].max().to_dict() == {0: 20, 4: 5}
 
 
-# Plot resultaten
-plt.figure(figsize=(10, 5))
-plt.plot(range(1, tijdshorizon + 1), kopers_netto, label='Kopen')
-plt.plot(range(1, tijdshorizon + 1), huurders_netto, label='Huren')
-plt.xlabel("Jaar")
-plt.ylabel("Netto vermogen (€)")
-plt.title("Netto Vermogen: Huren vs. Kopen (incl. maandinkomen)")
-plt.legend()
-plt.grid(True)
-plt.tight_layout()
-plt.show()
+def test_cli_weigert_ontbrekende_kolom(tmp_path):
+    pad = tmp_path / "scenarios.csv"
+    pad.write_text("woningprijs,maandhuur\n380000,1000\n")
+    with pytest.raises(ValueError, match="Ontbrekende kolommen"):
+        cli.verwerk(pad, tmp_path / "resultaten.csv", workers=1)
@@ -0,0 +1,217 @@
+# voorberekend.py
+"""
+Voorberekend rooster van resultaten voor het drukst bezochte invoergebied.
+
+    python voorberekend.py    # bouw data/voorberekend.npy en data/voorberekend.json (vooraf)
+
+Het rooster bevat `batch.bereken_vergelijking_batch` voor elke combinatie van woningprijs
+(200k-600k), rentevoet (2-5 %) en tijdshorizon (10-30 jaar), met alle andere invoer op de
+standaardwaarden van app.py (`basis_scenario`). Tussen de roosterpunten wordt bilineair geïnterpoleerd
+over woningprijs en rentevoet; de tijdshorizon valt altijd op een roosterpunt.
+
+Foutgrens: bij het bouwen wordt het exacte model ook in het midden van elke roostercel
+geëvalueerd, waar de interpolatiefout van een gladde functie het grootst is. De grootste
+absolute afwijking per veld staat als `foutgrens` in de metadata; `bereken_vergelijking`
+geeft ze mee met elk geïnterpoleerd antwoord. Het model is niet overal glad (het overschot
+wordt op 0 begrensd), dus de grens is empirisch, niet bewezen.
+
+Het rooster wordt met `mmap_mode="r"` geopend: alle workers op dezelfde machine delen
+dezelfde pagina's van het besturingssysteem in plaats van elk een kopie in te lezen.
+
+De metadata bevat een `modelhash` over de modelcode, de assen en de basisinvoer. Ontbreekt
+het rooster of hoort het bij een ander model, dan bouwt `laad_rooster` het eerst opnieuw
+(een tiende van een seconde); een verouderd rooster wordt nooit gebruikt.
+"""
+import hashlib
+import json
+import math
+import os
+import sys
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from batch import VERGELIJKING_DTYPE, bereken_vergelijking_batch, maak_rooster
+from constants import (
+    DEFAULT_INFLATIE,
+    DEFAULT_MAANDINKOMEN,
+    DEFAULT_OVERIGE_KOSTEN_PCT,
+    DEFAULT_RENDEMENT,
+    DEFAULT_VASTGOEDGROEI,
+)
+from opcentiemen import bereken_onroerende_voorheffing, laad_opcentiemen, laad_provincie_per_gemeente
+
+BRONMAP = Path(__file__).resolve().parent
+DATA_MAP = BRONMAP / "data"
+ROOSTER = DATA_MAP / "voorberekend.npy"
+METADATA = DATA_MAP / "voorberekend.json"
+
+# Gelijkmatige assen: (start, stap, aantal)
+ASSEN = {
+    "woningprijs": (200_000.0, 5_000.0, 81),
+    "rentevoet": (0.02, 0.0005, 61),
+    "tijdshorizon": (10, 1, 21),
+}
+VELDEN = VERGELIJKING_DTYPE.names
+# De broncode achter `bereken_vergelijking_batch`: een wijziging maakt het rooster ongeldig
+MODELBESTANDEN = ("batch.py", "amortization.py", "kernels.py", "constants.py")
+
+
+def basis_scenario():
+    """De standaardinvoer van app.py, zonder de drie roosterassen."""
+    gemeente = next(iter(laad_opcentiemen()[0]))
+    return dict(
+        overige_kosten_pct=DEFAULT_OVERIGE_KOSTEN_PCT,
+        eigen_inbreng_pct=0.20,
+        looptijd_jaren=25,
+        onroerende_voorheffing=bereken_onroerende_voorheffing(2500, gemeente, laad_provincie_per_gemeente()[gemeente]),
+        onderhoud_pct=0.015,
+        verzekering_koper=400,
+        maandhuur=1000,
+        huurindexatie=0.02,
+        verzekering_huurder=200,
+        verwacht_rendement=DEFAULT_RENDEMENT,
+        vastgoedgroei=DEFAULT_VASTGOEDGROEI,
+        maandinkomen=DEFAULT_MAANDINKOMEN,
+        inflatie=DEFAULT_INFLATIE,
+        andere_kosten_koper=0,
+        andere_kosten_huurder=0,
+    )
+
+
+def modelhash(basis):
+    """Hash van de modelcode, de assen en de basisinvoer waarmee een rooster gebouwd is."""
+    sha = hashlib.sha256()
+    for naam in MODELBESTANDEN:
+        sha.update((BRONMAP / naam).read_bytes())
+    sha.update(json.dumps({"assen": ASSEN, "basis": basis}, sort_keys=True).encode())
+    return sha.hexdigest()
+
+
+def _as(naam):
+    start, stap, aantal = ASSEN[naam]
+    return start + stap * np.arange(aantal)
+
+
+def _als_array(resultaat):
+    # Structured array (..., ) -> gewone array (velden, ...) zodat één veld aaneengesloten in het geheugen staat
+    return np.stack([resultaat[veld] for veld in VELDEN])
+
+
+def bouw_rooster(rooster=ROOSTER, metadata=METADATA):
+    """Evalueer het model op het rooster en in alle celmiddens, en schrijf rooster en metadata weg."""
+    basis = basis_scenario()
+    prijzen, renten, horizonnen = _as("woningprijs"), _as("rentevoet"), _as("tijdshorizon")
+
+    waarden = _als_array(bereken_vergelijking_batch(
+        **basis, **maak_rooster(woningprijs=prijzen, rentevoet=renten, tijdshorizon=horizonnen)
+    ))
+
+    # Foutgrens: interpolatie in de celmiddens tegenover het exacte model
+    midden_prijzen = (prijzen[:-1] + prijzen[1:]) / 2
+    midden_renten = (renten[:-1] + renten[1:]) / 2
+    exact = _als_array(bereken_vergelijking_batch(
+        **basis, **maak_rooster(woningprijs=midden_prijzen, rentevoet=midden_renten, tijdshorizon=horizonnen)
+    ))
+    geinterpoleerd = (waarden[:, :-1, :-1] + waarden[:, 1:, :-1] + waarden[:, :-1, 1:] + waarden[:, 1:, 1:]) / 4
+    foutgrens = np.abs(geinterpoleerd - exact).max(axis=(1, 2, 3))
+
+    # Eerst naar een tijdelijk bestand en dan vervangen: andere processen zien nooit een half
+    # rooster. De metadata (met de hash) komt als laatste, dus een rooster zonder passende
+    # metadata geldt als verouderd.
+    rooster, metadata = Path(rooster), Path(metadata)
+    for doel, schrijf in (
+        (rooster, lambda bestand: np.save(bestand, waarden)),
+        (metadata, lambda bestand: bestand.write(json.dumps({
+            "assen": ASSEN,
+            "velden": list(VELDEN),
+            "basis": basis,
+            "modelhash": modelhash(basis),
+            "foutgrens": dict(zip(VELDEN, foutgrens.tolist())),
+        }, indent=1).encode() + b"\n")),
+    ):
+        tijdelijk = doel.with_name(f"{doel.name}.{os.getpid()}.tmp")
+        with open(tijdelijk, "wb") as bestand:
+            schrijf(bestand)
+        os.replace(tijdelijk, doel)
+    return foutgrens
+
+
+def rooster_is_actueel(rooster=ROOSTER, metadata=METADATA):
+    """Controleer of het rooster bestaat en gebouwd is met de huidige modelcode, assen en basisinvoer."""
+    if not (Path(rooster).exists() and Path(metadata).exists()):
+        return False
+    gegevens = json.loads(Path(metadata).read_text())
+    return gegevens.get("modelhash") == modelhash(basis_scenario())
+
+
+@lru_cache(maxsize=None)
+def laad_rooster(rooster=ROOSTER, metadata=METADATA, bouwen=True):
+    """
+    Open het rooster als alleen-lezen memory map. Geeft (metadata, array).
+
+    Ontbreekt het rooster of is het verouderd, dan wordt het eerst gebouwd; met `bouwen=False`,
+    of als het niet weggeschreven kan worden, is het resultaat None (en rekent
+    `bereken_vergelijking` exact).
+    """
+    if not rooster_is_actueel(rooster, metadata):
+        if not bouwen:
+            return None
+        try:
+            bouw_rooster(rooster, metadata)
+        except OSError:
+            return None
+    return json.loads(Path(metadata).read_text()), np.load(rooster, mmap_mode="r")
+
+
+def _interpoleer(rooster, assen, scenario):
+    # Positie op de gelijkmatige assen; None als het scenario buiten het rooster valt
+    posities = []
+    for naam in ("woningprijs", "rentevoet"):
+        start, stap, aantal = assen[naam]
+        positie = (scenario[naam] - start) / stap
+        if not -1e-9 <= positie <= aantal - 1 + 1e-9:
+            return None
+        index = min(int(positie), aantal - 2)
+        posities.append((index, min(max(positie - index, 0.0), 1.0)))
+
+    start, stap, aantal = assen["tijdshorizon"]
+    horizon = scenario["tijdshorizon"] - start
+    if horizon != int(horizon) or not 0 <= horizon < aantal:
+        return None
+
+    (i, fi), (j, fj) = posities
+    cel = rooster[:, i:i + 2, j:j + 2, int(horizon)]
+    gewichten = np.array([[(1 - fi) * (1 - fj), (1 - fi) * fj], [fi * (1 - fj), fi * fj]])
+    return (cel * gewichten).sum(axis=(1, 2))
+
+
+def bereken_vergelijking(scenario, exact=False, rooster=ROOSTER, metadata=METADATA):
+    """
+    Resultaat van `batch.bereken_vergelijking_batch` voor één scenario, als dict van floats.
+
+    Ligt het scenario in het voorberekende rooster (alle andere invoer gelijk aan de basis),
+    dan wordt geïnterpoleerd: "bron" is dan "rooster" en "foutgrens" bevat de foutgrens per
+    veld. Anders, met `exact=True`, of zonder actueel rooster rekent het exacte model ("bron"
+    is "exact").
+    """
+    geladen = None if exact else laad_rooster(rooster, metadata)
+    if geladen is not None:
+        metadata, rooster = geladen
+        basis = metadata["basis"]
+        buiten_basis = set(scenario) - set(metadata["assen"])
+        if buiten_basis <= set(basis) and all(math.isclose(scenario[naam], basis[naam], abs_tol=1e-12) for naam in buiten_basis):
+            waarden = _interpoleer(rooster, metadata["assen"], scenario)
+            if waarden is not None:
+                return {**dict(zip(metadata["velden"], waarden.tolist())), "bron": "rooster", "foutgrens": metadata["foutgrens"]}
+
+    resultaat = bereken_vergelijking_batch(**scenario)
+    return {**{veld: float(resultaat[veld]) for veld in VELDEN}, "bron": "exact", "foutgrens": None}
+
+
+if __name__ == "__main__":
+    grens = bouw_rooster()
+    print(f"{ROOSTER.name}: {ROOSTER.stat().st_size / 2**20:.1f} MB", file=sys.stderr)
+    for veld, fout in zip(VELDEN, grens):
+        print(f"  foutgrens {veld}: {fout:,.2f}", file=sys.stderr)
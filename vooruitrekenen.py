@@ -0,0 +1,179 @@
+# vooruitrekenen.py
+"""
+Speculatief vooruitrekenen: terwijl de gebruiker naar het resultaat kijkt, rekent een
+achtergrondthread de waarschijnlijke volgende invoer al uit, zodat de volgende klik op een
++/- knop van een `number_input` een cache-hit is.
+
+Waarschijnlijk zijn de buren op één widgetstap (`STAPPEN`) van de parameters die recent
+veranderden, de richting van de laatste wijziging eerst; zonder recente wijzigingen die van
+`DEFAULT_PARAMETERS`. Elke sessie registreert taken: functies van een scenario die de gecachete
+berekeningen van een sectie oproepen (`gememoiseerd`), zodat de resultaten in de begrensde
+LRU-caches van cache.py en grafieken.py terechtkomen. Een thread en geen proces: een werkproces
+zou zijn eigen caches vullen.
+
+Per sessie staan hoogstens `max_in_uitvoering` buren tegelijk ingepland. `annuleer` (bij het
+begin van elke rerun) schrapt de buren die nog niet gestart zijn; een lopende buur stopt na
+de taak waarmee hij bezig is.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+OMGEVINGSVARIABELE = "HURENOFKOPEN_VOORUITREKENEN"
+
+# Eén widgetstap per parameter, in de eenheden van het scenario, met de grenzen van de widget
+STAPPEN = {
+    "woningprijs": (1000, 50_000, 2_000_000),
+    "overige_kosten_pct": (0.001, 0.0, 0.10),
+    "eigen_inbreng_pct": (0.01, 0.0, 1.0),
+    "rentevoet": (0.0001, 0.0, 0.10),
+    "looptijd_jaren": (1, 1, 40),
+    "onderhoud_pct": (0.001, 0.0, 0.05),
+    "verzekering_koper": (1, 0, 2000),
+    "andere_kosten_koper": (1, 0, 5000),
+    "maandhuur": (1, 300, 5000),
+    "huurindexatie": (0.0001, 0.0, 0.10),
+    "verzekering_huurder": (1, 0, 2000),
+    "andere_kosten_huurder": (1, 0, 5000),
+    "tijdshorizon": (1, 1, 50),
+    "maandinkomen": (100, 1000, 10_000),
+    "verwacht_rendement": (0.001, 0.0, 0.15),
+    "vastgoedgroei": (0.0001, 0.0, 0.10),
+    "inflatie": (0.0001, 0.0, 0.10),
+}
+DEFAULT_PARAMETERS = ("woningprijs", "rentevoet", "tijdshorizon")
+DEFAULT_MAX_RECENT = 3
+DEFAULT_MAX_IN_UITVOERING = 4
+AANTAL_WORKERS = 1
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def aan_via_omgeving():
+    return os.environ.get(OMGEVINGSVARIABELE, "1") not in ("", "0")
+
+
+def _werkers():
+    # Eén gedeelde pool voor alle sessies, pas gestart bij het eerste gebruik
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=AANTAL_WORKERS, thread_name_prefix="vooruitrekenen")
+        return _pool
+
+
+def buren(scenario, parameters):
+    """
+    (parameter, scenario) voor de buren op één stap van elke parameter, binnen de widgetgrenzen.
+    `parameters` is een reeks (parameter, richting): richting +1 of -1 komt eerst, 0 geeft beide op volgorde.
+    """
+    for parameter, richting in parameters:
+        if parameter not in STAPPEN or parameter not in scenario:
+            continue
+        stap, minimum, maximum = STAPPEN[parameter]
+        for teken in ((richting, -richting) if richting else (1, -1)):
+            waarde = round(scenario[parameter] + teken * stap, 10)
+            if minimum <= waarde <= maximum:
+                yield parameter, {**scenario, parameter: waarde}
+
+
+class Vooruitrekenaar:
+    """Speculatieve berekeningen van één sessie: geregistreerde taken, recente wijzigingen en lopend werk."""
+
+    def __init__(self, max_in_uitvoering=DEFAULT_MAX_IN_UITVOERING, max_recent=DEFAULT_MAX_RECENT):
+        self.max_in_uitvoering = max_in_uitvoering
+        self.max_recent = max_recent
+        self._taken = {}
+        self._recent = []
+        self._vorig = None
+        self._generatie = 0
+        self._lopend = []
+        # Reentrant: een toekomst die al klaar of geannuleerd is, roept `_klaar` meteen op
+        self._lock = threading.RLock()
+        self.ingepland = self.voltooid = self.geannuleerd = 0
+
+    def registreer(self, naam, taak):
+        """Registreer (of vervang) `taak(scenario)`; ze wordt voor elke buur opgeroepen."""
+        with self._lock:
+            self._taken[naam] = taak
+
+    def annuleer(self):
+        """Schrap de buren die nog niet gestart zijn; lopende buren stoppen na hun huidige taak."""
+        with self._lock:
+            self._generatie += 1
+            for toekomst in list(self._lopend):
+                if toekomst.cancel():
+                    self.geannuleerd += 1
+            self._lopend = [toekomst for toekomst in self._lopend if not toekomst.done()]
+
+    def _onthoud_wijzigingen(self, scenario):
+        if self._vorig is not None:
+            for parameter in STAPPEN:
+                oud, nieuw = self._vorig.get(parameter), scenario.get(parameter)
+                if oud is None or nieuw is None or oud == nieuw:
+                    continue
+                self._recent = [(parameter, 1 if nieuw > oud else -1)] + [
+                    (naam, richting) for naam, richting in self._recent if naam != parameter
+                ]
+        self._recent = self._recent[:self.max_recent]
+        self._vorig = dict(scenario)
+
+    def plan(self, scenario):
+        """Onthoud welke parameters veranderden en plan hun buren in, tot de limiet van lopend werk."""
+        self.annuleer()
+        with self._lock:
+            self._onthoud_wijzigingen(scenario)
+            recent = [naam for naam, _ in self._recent]
+            parameters = self._recent + [(naam, 0) for naam in DEFAULT_PARAMETERS if naam not in recent]
+            taken = list(self._taken.values())
+            generatie = self._generatie
+            vrij = self.max_in_uitvoering - len(self._lopend)
+            if not taken or vrij <= 0:
+                return 0
+            ingepland = 0
+            for _, buur in buren(scenario, parameters):
+                if ingepland == vrij:
+                    break
+                toekomst = _werkers().submit(self._reken, buur, taken, generatie)
+                self._lopend.append(toekomst)
+                toekomst.add_done_callback(self._klaar)
+                ingepland += 1
+            self.ingepland += ingepland
+            return ingepland
+
+    def _reken(self, scenario, taken, generatie):
+        for taak in taken:
+            if generatie != self._generatie:
+                return False
+            try:
+                taak(scenario)
+            except Exception:
+                # Speculatief: een fout komt straks gewoon in de echte rerun aan het licht
+                return False
+        return True
+
+    def _klaar(self, toekomst):
+        with self._lock:
+            if not toekomst.cancelled() and toekomst.result():
+                self.voltooid += 1
+            if toekomst in self._lopend:
+                self._lopend.remove(toekomst)
+
+    def wacht(self, timeout=None):
+        """Wacht tot het lopende werk klaar is (voor tests en benchmarks)."""
+        with self._lock:
+            lopend = list(self._lopend)
+        for toekomst in lopend:
+            if not toekomst.cancelled():
+                toekomst.exception(timeout=timeout)
+
+    def statistieken(self):
+        with self._lock:
+            return {
+                "lopend": len(self._lopend),
+                "ingepland": self.ingepland,
+                "voltooid": self.voltooid,
+                "geannuleerd": self.geannuleerd,
+                "recent": [naam for naam, _ in self._recent],
+            }
@@ -0,0 +1,105 @@
+# werkruimte.py
+"""
+Werkruimte met bewaarde scenario's om naast elkaar te vergelijken.
+
+De werkruimte is kolomsgewijs: een dict met één array per kolom en één rij per scenario.
+Naast de parameters van `batch.bereken_vergelijking_paden` (met de onroerende voorheffing zoals
+ze uit gemeente, provincie en GKI volgde) bewaart ze de naam en die herkomst. Zo past de
+werkruimte compact in de sessie en gaat ze rechtstreeks, zonder omzetting, naar de rekenkern:
+alle scenario's en al hun jaren worden in één gevectoriseerde oproep berekend.
+"""
+import inspect
+import math
+
+import numpy as np
+
+from batch import JAARPERCENTAGES, bereken_vergelijking_paden
+from cache import gememoiseerd
+
+PARAMETERS = inspect.signature(bereken_vergelijking_paden).parameters
+TEKSTKOLOMMEN = ("naam", "gemeente", "provincie")
+MAX_SCENARIOS = 20
+
+
+def lege_werkruimte():
+    return {
+        **{kolom: np.array([], dtype=str) for kolom in TEKSTKOLOMMEN},
+        **{naam: np.array([], dtype=float) for naam in PARAMETERS},
+        "gki": np.array([], dtype=float),
+    }
+
+
+def aantal_scenarios(werkruimte):
+    return len(werkruimte["naam"])
+
+
+def bewaar_scenario(werkruimte, naam, scenario, gemeente="", provincie="", gki=math.nan):
+    """
+    Geeft een nieuwe werkruimte met `scenario` (parameters van `bereken_vergelijking_paden`)
+    onder `naam`: achteraan, of op de plaats van het scenario met dezelfde naam.
+    """
+    ontbrekend = [p for p, parameter in PARAMETERS.items() if parameter.default is inspect.Parameter.empty and p not in scenario]
+    if ontbrekend:
+        raise ValueError(f"Ontbrekende parameters: {', '.join(ontbrekend)}")
+    rij = {
+        "naam": naam,
+        "gemeente": gemeente,
+        "provincie": provincie,
+        **{p: scenario.get(p, parameter.default) for p, parameter in PARAMETERS.items()},
+        "gki": gki,
+    }
+
+    bestaand = np.flatnonzero(werkruimte["naam"] == naam)
+    if len(bestaand):
+        nieuw = {kolom: waarden.copy() for kolom, waarden in werkruimte.items()}
+        for kolom, waarden in nieuw.items():
+            if kolom in TEKSTKOLOMMEN:
+                # Een langere tekst past niet altijd in het bestaande stringtype
+                waarden = nieuw[kolom] = waarden.astype(np.result_type(waarden, np.array(rij[kolom])))
+            waarden[bestaand[0]] = rij[kolom]
+        return nieuw
+    if aantal_scenarios(werkruimte) >= MAX_SCENARIOS:
+        raise ValueError(f"De werkruimte bevat al {MAX_SCENARIOS} scenario's")
+    return {kolom: np.append(waarden, rij[kolom]) for kolom, waarden in werkruimte.items()}
+
+
+def verwijder_scenario(werkruimte, naam):
+    """Geeft een nieuwe werkruimte zonder het scenario `naam`."""
+    behouden = werkruimte["naam"] != naam
+    return {kolom: waarden[behouden] for kolom, waarden in werkruimte.items()}
+
+
+@gememoiseerd
+def _bereken_kolommen(kolommen):
+    horizonnen = kolommen["tijdshorizon"].astype(int)
+    max_horizon = int(horizonnen.max())
+    paden = bereken_vergelijking_paden(**{
+        **kolommen,
+        **{naam: kolommen[naam][:, None] for naam in JAARPERCENTAGES},
+        "tijdshorizon": max_horizon,
+    })
+
+    # Reëel en afgeknipt op de eigen horizon van elk scenario (NaN daarna)
+    jaren = np.arange(max_horizon + 1)
+    buiten_horizon = jaren > horizonnen[:, None]
+    prijsindex = (1 + kolommen["inflatie"][:, None]) ** jaren
+    reeksen = {
+        "koper_netto_reeel": paden["koper_netto_vermogen"] / prijsindex,
+        "huurder_netto_reeel": paden["huurder_netto_vermogen"] / prijsindex,
+        "verschil_reeel": paden["verschil_reeel"],
+    }
+    reeksen = {veld: np.where(buiten_horizon, np.nan, reeks) for veld, reeks in reeksen.items()}
+    eind = {f"eind_{veld}": reeks[np.arange(len(horizonnen)), horizonnen] for veld, reeks in reeksen.items()}
+    return {"jaren": jaren, **reeksen, **eind, "maandlast": paden["maandlast"]}
+
+
+def bereken_werkruimte(werkruimte):
+    """
+    Bereken alle scenario's van de werkruimte in één oproep van `bereken_vergelijking_paden`,
+    tot de grootste horizon. Geeft "naam", "jaren" (0..grootste horizon), de reeksen
+    "koper_netto_reeel", "huurder_netto_reeel" en "verschil_reeel" met vorm (scenario's, jaren)
+    en NaN na de eigen horizon, hun waarde bij de eigen horizon ("eind_...") en de "maandlast".
+    """
+    if not aantal_scenarios(werkruimte):
+        return None
+    return {"naam": werkruimte["naam"], **_bereken_kolommen({naam: werkruimte[naam] for naam in PARAMETERS})}